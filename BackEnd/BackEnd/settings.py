@@ -116,6 +116,33 @@ else:
     }
 
 
+# Caché (locmem por defecto; CACHE_BACKEND y CACHE_LOCATION permiten usar Redis, Memcached, etc.)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='triage-cache'),
+    }
+}
+
+# Vigencia en segundos de los reportes del dashboard en caché
+REPORTES_CACHE_TTL_HISTORICO = config('REPORTES_CACHE_TTL_HISTORICO', default=60 * 60 * 24, cast=int)  # Periodos cerrados
+REPORTES_CACHE_TTL_DIA_ACTUAL = config('REPORTES_CACHE_TTL_DIA_ACTUAL', default=60, cast=int)          # Periodos que incluyen hoy
+
+# La cola de la sala de espera solo confía en la generación guardada en la caché si todos los procesos
+# comparten la caché. Sin valor se deduce del backend (locmem y dummy son por proceso: la cola se
+# resincroniza con la base de datos en cada lectura); true/false lo fuerza, p. ej. true con un solo proceso
+COLA_ESPERA_CACHE_COMPARTIDA = config(
+    'COLA_ESPERA_CACHE_COMPARTIDA', default='',
+    cast=lambda valor: None if valor == '' else valor.lower() in ('1', 'true', 'yes', 'on')
+)
+
+# Hora local de inicio de cada turno para los reportes (el turno de noche termina al iniciar el de mañana)
+TURNOS_INICIO = {
+    'MANANA': config('TURNO_MANANA_INICIO', default=7, cast=int),
+    'TARDE': config('TURNO_TARDE_INICIO', default=13, cast=int),
+    'NOCHE': config('TURNO_NOCHE_INICIO', default=19, cast=int),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
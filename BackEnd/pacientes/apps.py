@@ -5,3 +5,7 @@ class PacientesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pacientes"
     verbose_name = "Gestion de pacientes"
+
+    def ready(self):
+        # Mantener la cola de la sala de espera al cambiar pacientes
+        from . import signals  # noqa: F401
@@ -0,0 +1,131 @@
+"""
+Búsqueda de pacientes por nombre y documento, insensible a tildes y mayúsculas.
+
+Cada paciente guarda sus nombres y documento normalizados (sin tildes, en minúscula) en
+Paciente.busqueda y una fila por término en PacienteTermino, indexada por (termino, paciente).
+Cada palabra buscada se resuelve como un rango sobre ese índice ("gom" -> ["gom", "gon")),
+que funciona igual en SQLite y MySQL, a diferencia de icontains que recorre la tabla.
+"""
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+# Campos de Paciente que forman los términos de búsqueda
+CAMPOS_BUSQUEDA = ('primer_nombre', 'segundo_nombre', 'primer_apellido', 'segundo_apellido', 'numero_documento')
+
+# Alfabeto de los términos normalizados, en el orden en que lo comparan ambos motores
+ALFABETO = '0123456789abcdefghijklmnopqrstuvwxyz'
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+LONGITUD_TERMINO = 40
+MAXIMO_PALABRAS = 6
+
+
+def normalizar(texto):
+    """Quita tildes, pasa a minúscula y separa en palabras alfanuméricas ("Ana-María" -> ["ana", "maria"])."""
+    if not texto:
+        return []
+    sin_tildes = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return [palabra[:LONGITUD_TERMINO] for palabra in _NO_ALFANUMERICO.split(sin_tildes.lower()) if palabra]
+
+
+def siguiente_prefijo(prefijo):
+    """Menor término que ya no empieza por el prefijo, o None si no hay cota superior."""
+    while prefijo:
+        posicion = ALFABETO.index(prefijo[-1])
+        if posicion + 1 < len(ALFABETO):
+            return prefijo[:-1] + ALFABETO[posicion + 1]
+        prefijo = prefijo[:-1]
+    return None
+
+
+class BusquedaPacientes:
+    """
+    Mantiene y consulta el índice de búsqueda de pacientes.
+    Los modelos pueden pasarse explícitamente para usar los modelos históricos en migraciones.
+    """
+
+    @staticmethod
+    def _modelos(pacientes, terminos):
+        if pacientes is None or terminos is None:
+            from .models import Paciente, PacienteTermino  # Import local para evitar circular
+            return Paciente, PacienteTermino
+        return pacientes, terminos
+
+    @staticmethod
+    def terminos(paciente):
+        """Términos únicos del paciente, en el orden de sus campos."""
+        terminos = []
+        for campo in CAMPOS_BUSQUEDA:
+            for termino in normalizar(getattr(paciente, campo)):
+                if termino not in terminos:
+                    terminos.append(termino)
+        return terminos
+
+    @classmethod
+    def texto(cls, paciente):
+        """Contenido de Paciente.busqueda."""
+        return ' '.join(cls.terminos(paciente))
+
+    @classmethod
+    def indexar(cls, paciente):
+        """Reemplaza los términos del paciente por los de su Paciente.busqueda actual."""
+        _, Termino = cls._modelos(None, None)
+        with transaction.atomic(savepoint=False):
+            Termino.objects.filter(paciente_id=paciente.pk).delete()
+            Termino.objects.bulk_create([
+                Termino(paciente_id=paciente.pk, termino=termino)
+                for termino in paciente.busqueda.split()
+            ])
+
+    @classmethod
+    def rellenar(cls, pacientes=None, terminos=None, lote=2000):
+        """Recalcula Paciente.busqueda y los términos de todos los pacientes."""
+        Paciente, Termino = cls._modelos(pacientes, terminos)
+        Termino.objects.all().delete()
+        total = 0
+        ultimo_id = 0
+        while True:
+            bloque = list(Paciente.objects.filter(pk__gt=ultimo_id).order_by('pk').only('pk', *CAMPOS_BUSQUEDA)[:lote])
+            if not bloque:
+                return total
+            filas = []
+            for paciente in bloque:
+                paciente.busqueda = cls.texto(paciente)
+                filas.extend(Termino(paciente_id=paciente.pk, termino=t) for t in paciente.busqueda.split())
+            Paciente.objects.bulk_update(bloque, ['busqueda'])
+            Termino.objects.bulk_create(filas)
+            total += len(bloque)
+            ultimo_id = bloque[-1].pk
+
+    @staticmethod
+    def _rango(palabra):
+        """Filtro de los términos que empiezan por la palabra."""
+        rango = {'termino__gte': palabra}
+        cota = siguiente_prefijo(palabra)
+        if cota:
+            rango['termino__lt'] = cota
+        return rango
+
+    @classmethod
+    def filtrar(cls, queryset, texto):
+        """
+        Pacientes con un término que empiece por cada palabra buscada (todas deben coincidir).
+        La palabra más larga (la más selectiva en la práctica) trae los candidatos desde el índice
+        y las demás se comprueban sobre los términos de cada candidato.
+        Sin texto no se filtra; un texto sin letras ni dígitos ("¿?", "--") no coincide con nadie.
+        """
+        palabras = list(dict.fromkeys(normalizar(texto)))[:MAXIMO_PALABRAS]
+        if not palabras:
+            return queryset.none() if texto and texto.strip() else queryset
+        _, Termino = cls._modelos(None, None)
+        principal = max(palabras, key=len)
+        queryset = queryset.filter(pk__in=Termino.objects.filter(**cls._rango(principal)).values('paciente_id'))
+        for palabra in palabras:
+            if palabra != principal:
+                queryset = queryset.filter(Exists(
+                    Termino.objects.filter(paciente_id=OuterRef('pk'), **cls._rango(palabra))
+                ))
+        return queryset
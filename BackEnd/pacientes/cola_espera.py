@@ -0,0 +1,214 @@
+"""
+Cola de la sala de espera: pacientes EN_ESPERA y EN_ATENCION ordenados por el nivel ESI de
+su sesión más reciente (los no clasificados al final) y luego por hora de llegada.
+
+La cola vive en memoria de cada proceso y se construye desde la base de datos en el primer
+acceso. Los cambios de estado y de sesión la actualizan al confirmar la transacción (ver
+pacientes/signals.py y triage/utils/ultima_sesion.py). Cada cambio recibe una versión, de
+modo que los clientes que consultan periódicamente piden solo lo ocurrido desde la última
+versión que recibieron.
+
+Con varios procesos, cada cambio avanza además una generación compartida en la caché
+(CACHES); el proceso que encuentra una generación distinta a la suya se resincroniza con
+una sola consulta y calcula los cambios comparando con lo que tenía. La generación solo sirve
+si la caché es compartida: con una caché por proceso (locmem, dummy) cada lectura recarga la
+cola completa, por lo que con varios procesos se requiere una caché compartida (ver
+COLA_ESPERA_CACHE_COMPARTIDA en settings y .env.example).
+"""
+import bisect
+import threading
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+
+ESTADOS_COLA = ('EN_ESPERA', 'EN_ATENCION')
+NIVEL_SIN_CLASIFICAR = 6
+CLAVE_GENERACION = 'pacientes:cola_espera:generacion'
+
+# Backends de caché cuyo contenido es propio de cada proceso
+BACKENDS_POR_PROCESO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Columnas de Paciente que forman una entrada de la cola
+CAMPOS_COLA = (
+    'id', 'primer_nombre', 'primer_apellido', 'estado', 'creado',
+    'ultima_sesion_nivel', 'ultima_sesion_inicio', 'ultima_sesion_completada',
+)
+
+
+def _avanzar_generacion():
+    """Avanza la generación compartida y devuelve su nuevo valor."""
+    # add solo crea la clave si no existe; incr es atómico en los backends que lo soportan
+    if cache.add(CLAVE_GENERACION, 1, None):
+        return 1
+    try:
+        return cache.incr(CLAVE_GENERACION)
+    except ValueError:
+        cache.set(CLAVE_GENERACION, 1, None)
+        return 1
+
+
+def generacion_confiable():
+    """Indica si la generación de la caché la ven todos los procesos."""
+    compartida = getattr(settings, 'COLA_ESPERA_CACHE_COMPARTIDA', None)
+    if compartida is None:
+        return settings.CACHES['default']['BACKEND'] not in BACKENDS_POR_PROCESO
+    return compartida
+
+
+class ColaEspera:
+    """Índice de prioridad de la sala de espera, uno por proceso."""
+    _instancia = None
+    _lock = threading.Lock()
+
+    # Eliminaciones recordadas para responder lecturas incrementales
+    HISTORIAL = 1000
+
+    def __init__(self):
+        self.id_instancia = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.version_minima = 0
+        self.entradas = {}
+        self.orden = []
+        self.eliminados = deque()
+        self.generacion = None
+        self.lock = threading.RLock()
+
+    @classmethod
+    def obtener(cls):
+        """Devuelve la cola del proceso, construyéndola desde la base de datos si aún no existe."""
+        cola = cls._instancia
+        if cola is None:
+            with cls._lock:
+                if cls._instancia is None:
+                    nueva = cls()
+                    nueva.sincronizar()
+                    cls._instancia = nueva
+                cola = cls._instancia
+        return cola
+
+    @classmethod
+    def invalidar(cls):
+        """Descarta la cola del proceso; se reconstruye en el siguiente acceso."""
+        with cls._lock:
+            cls._instancia = None
+
+    @classmethod
+    def notificar(cls, paciente_id):
+        """Registra un cambio en un paciente: actualiza la cola del proceso y avisa a los demás."""
+        cola = cls._instancia
+        if cola is None:
+            _avanzar_generacion()
+        else:
+            cola.refrescar([paciente_id])
+
+    @staticmethod
+    def clave(entrada):
+        return (entrada['nivel_triage'] or NIVEL_SIN_CLASIFICAR, entrada['llegada'], entrada['id'])
+
+    @staticmethod
+    def _filas(paciente_ids=None):
+        from .models import Paciente  # Import local para evitar circular
+        queryset = Paciente.objects.filter(estado__in=ESTADOS_COLA)
+        if paciente_ids is not None:
+            queryset = queryset.filter(pk__in=paciente_ids)
+        return queryset.order_by().values(*CAMPOS_COLA)
+
+    @staticmethod
+    def _entrada(fila):
+        return {
+            'id': fila['id'],
+            'primer_nombre': fila['primer_nombre'],
+            'primer_apellido': fila['primer_apellido'],
+            'estado': fila['estado'],
+            'nivel_triage': fila['ultima_sesion_nivel'],
+            'triage_completado': fila['ultima_sesion_completada'],
+            'llegada': fila['creado'],
+            'inicio_triage': fila['ultima_sesion_inicio'],
+        }
+
+    def _aplicar(self, paciente_id, entrada):
+        """Inserta, reemplaza o elimina (entrada None) un paciente; solo versiona si algo cambió."""
+        actual = self.entradas.get(paciente_id)
+        if actual is not None:
+            sin_version = {campo: valor for campo, valor in actual.items() if campo != 'version'}
+            if sin_version == entrada:
+                return
+            del self.orden[bisect.bisect_left(self.orden, self.clave(actual))]
+        elif entrada is None:
+            return
+
+        self.version += 1
+        if entrada is None:
+            del self.entradas[paciente_id]
+            if len(self.eliminados) == self.HISTORIAL:
+                # Las lecturas anteriores a la eliminación olvidada ya no pueden ser incrementales
+                self.version_minima = self.eliminados.popleft()[0]
+            self.eliminados.append((self.version, paciente_id))
+        else:
+            if actual is None and any(eliminado == paciente_id for _, eliminado in self.eliminados):
+                # Vuelve a la cola: la entrada nueva reemplaza a la eliminación en las lecturas incrementales
+                self.eliminados = deque(
+                    (version, eliminado) for version, eliminado in self.eliminados if eliminado != paciente_id
+                )
+            entrada['version'] = self.version
+            self.entradas[paciente_id] = entrada
+            bisect.insort(self.orden, self.clave(entrada))
+
+    def sincronizar(self):
+        """Recarga la cola desde la base de datos, versionando solo las diferencias."""
+        with self.lock:
+            self.generacion = cache.get(CLAVE_GENERACION)
+            filas = {fila['id']: self._entrada(fila) for fila in self._filas()}
+            for paciente_id in set(self.entradas) - set(filas):
+                self._aplicar(paciente_id, None)
+            for paciente_id, entrada in filas.items():
+                self._aplicar(paciente_id, entrada)
+
+    def refrescar(self, paciente_ids):
+        """Relee de la base de datos los pacientes indicados (una consulta)."""
+        with self.lock:
+            filas = {fila['id']: self._entrada(fila) for fila in self._filas(paciente_ids)}
+            for paciente_id in paciente_ids:
+                self._aplicar(paciente_id, filas.get(paciente_id))
+            generacion = _avanzar_generacion()
+            # Si otro proceso avanzó la generación entretanto, la siguiente lectura se resincroniza
+            if generacion == (self.generacion or 0) + 1:
+                self.generacion = generacion
+
+    def _version_cliente(self, since):
+        """Versión local de un token 'instancia.version', o None si no permite una lectura incremental."""
+        if not since:
+            return None
+        instancia, _, numero = since.partition('.')
+        if instancia != self.id_instancia or not numero.isdigit():
+            return None
+        numero = int(numero)
+        if numero < self.version_minima or numero > self.version:
+            return None
+        return numero
+
+    def leer(self, since=None):
+        """
+        Cola ordenada completa o, con el token de versión de una lectura anterior, solo los
+        pacientes que cambiaron y los que salieron de la cola desde entonces.
+        """
+        if not generacion_confiable() or cache.get(CLAVE_GENERACION) != self.generacion:
+            self.sincronizar()
+        with self.lock:
+            pacientes = [self.entradas[clave[2]] for clave in self.orden]
+            respuesta = {'version': f'{self.id_instancia}.{self.version}', 'total': len(pacientes)}
+            desde = self._version_cliente(since)
+            if desde is None:
+                respuesta.update(completo=True, pacientes=pacientes)
+            else:
+                respuesta.update(
+                    completo=False,
+                    cambios=[entrada for entrada in pacientes if entrada['version'] > desde],
+                    eliminados=[paciente_id for version, paciente_id in self.eliminados if version > desde],
+                )
+            return respuesta
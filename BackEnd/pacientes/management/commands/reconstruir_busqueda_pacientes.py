@@ -0,0 +1,27 @@
+"""
+Reconstruye el índice de búsqueda de pacientes (Paciente.busqueda y PacienteTermino).
+Necesario tras cargas masivas con bulk_create o update(), que no pasan por Paciente.save().
+
+Uso:
+    python manage.py reconstruir_busqueda_pacientes [--lote 2000]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from pacientes.busqueda import BusquedaPacientes
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los términos de búsqueda de todos los pacientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=2000, help='Pacientes procesados por pasada')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+
+        with transaction.atomic():
+            total = BusquedaPacientes.rellenar(lote=options['lote'])
+
+        self.stdout.write(self.style.SUCCESS(f'Índice de búsqueda reconstruido: {total} pacientes.'))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0003_paciente_pac_tipo_num_doc_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(fields=['creado'], name='pac_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(fields=['estado', 'creado'], name='pac_estado_creado_idx'),
+        ),
+    ]
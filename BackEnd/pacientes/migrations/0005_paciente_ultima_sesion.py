@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def rellenar_ultima_sesion(apps, schema_editor):
+    """Copia en cada paciente los datos de su sesión más reciente."""
+    from triage.utils.ultima_sesion import UltimaSesionHelper
+
+    UltimaSesionHelper.rellenar(apps.get_model('pacientes', 'Paciente'), apps.get_model('triage', 'SesionTriage'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0004_indices_consultas'),
+        ('triage', '0005_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paciente',
+            name='ultima_sesion',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='triage.sesiontriage'),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='ultima_sesion_completada',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='ultima_sesion_fin',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='ultima_sesion_inicio',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='ultima_sesion_nivel',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(fields=['ultima_sesion_completada', 'ultima_sesion_inicio'], name='pac_ult_compl_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(fields=['ultima_sesion_completada', 'ultima_sesion_nivel', 'ultima_sesion_inicio'], name='pac_ult_compl_nivel_idx'),
+        ),
+        migrations.RunPython(rellenar_ultima_sesion, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0005_paciente_ultima_sesion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(fields=['ultima_sesion_inicio'], name='pac_ult_inicio_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def rellenar_busqueda(apps, schema_editor):
+    """Normaliza nombres y documento de los pacientes existentes y crea sus términos."""
+    from pacientes.busqueda import BusquedaPacientes
+
+    BusquedaPacientes.rellenar(apps.get_model('pacientes', 'Paciente'), apps.get_model('pacientes', 'PacienteTermino'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0006_indice_ultima_sesion_inicio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PacienteTermino',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=40)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='pacientetermino',
+            name='paciente',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos', to='pacientes.paciente'),
+        ),
+        migrations.AddIndex(
+            model_name='pacientetermino',
+            index=models.Index(fields=['termino', 'paciente'], name='pac_termino_idx'),
+        ),
+        migrations.RunPython(rellenar_busqueda, migrations.RunPython.noop),
+    ]
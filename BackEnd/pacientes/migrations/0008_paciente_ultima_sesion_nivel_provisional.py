@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:25
+
+from django.db import migrations, models
+
+
+def rellenar_nivel_provisional(apps, schema_editor):
+    """Copia en cada paciente el ESI provisional de su sesión más reciente."""
+    from triage.utils.ultima_sesion import UltimaSesionHelper
+
+    UltimaSesionHelper.rellenar(apps.get_model('pacientes', 'Paciente'), apps.get_model('triage', 'SesionTriage'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0007_busqueda_pacientes'),
+        ('triage', '0007_sesiontriage_esi_provisional'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paciente',
+            name='ultima_sesion_nivel_provisional',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(rellenar_nivel_provisional, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:52
+
+from django.db import migrations, models
+
+
+def rellenar_turno(apps, schema_editor):
+    """Copia en cada paciente el turno de su sesión más reciente."""
+    from triage.utils.ultima_sesion import UltimaSesionHelper
+
+    UltimaSesionHelper.rellenar(apps.get_model('pacientes', 'Paciente'), apps.get_model('triage', 'SesionTriage'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0008_paciente_ultima_sesion_nivel_provisional'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paciente',
+            name='ultima_sesion_turno',
+            field=models.CharField(blank=True, editable=False, max_length=10, null=True),
+        ),
+        migrations.RunPython(rellenar_turno, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from datetime import date
+from .busqueda import BusquedaPacientes, CAMPOS_BUSQUEDA
 from utils.choices import DOC_CHOICES, SEX_CHOICES, EPS_CHOICES, REGIMEN_EPS_CHOICES, ESTADO_ATENCION_CHOICES
 
 # Entidad principal
@@ -22,6 +23,21 @@ class Paciente(models.Model):
     estado = models.CharField(max_length=20, choices=ESTADO_ATENCION_CHOICES, default='EN_ESPERA')
     creado = models.DateTimeField(auto_now_add=True)
     
+    # Datos de la sesión de triage más reciente (por fecha de inicio), mantenidos por
+    # SesionTriage en la misma transacción (ver triage/utils/ultima_sesion.py)
+    ultima_sesion = models.ForeignKey(
+        'triage.SesionTriage', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+'
+    )
+    ultima_sesion_nivel = models.IntegerField(null=True, blank=True, editable=False)
+    ultima_sesion_nivel_provisional = models.IntegerField(null=True, blank=True, editable=False)
+    ultima_sesion_inicio = models.DateTimeField(null=True, blank=True, editable=False)
+    ultima_sesion_fin = models.DateTimeField(null=True, blank=True, editable=False)
+    ultima_sesion_completada = models.BooleanField(default=False, editable=False)
+    ultima_sesion_turno = models.CharField(max_length=10, null=True, blank=True, editable=False)
+
+    # Nombres y documento normalizados para la búsqueda (ver pacientes/busqueda.py)
+    busqueda = models.TextField(blank=True, default='', editable=False)
+    
     # Indexar para realizar consulta más eficientes a la base de datos
     class Meta:
         verbose_name = 'Paciente'
@@ -34,12 +50,37 @@ class Paciente(models.Model):
             models.Index(fields=['primer_nombre'], name='pac_primer_nom_idx'),
             models.Index(fields=['primer_apellido'], name='pac_primer_ape_idx'),
             models.Index(fields=['numero_documento'], name='pac_num_doc_idx'),
+            # Rangos de llegada de los reportes y listados ordenados por fecha de registro
+            models.Index(fields=['creado'], name='pac_creado_idx'),
+            # Pacientes en un estado ordenados por llegada (sala de espera, reportes filtrados por estado)
+            models.Index(fields=['estado', 'creado'], name='pac_estado_creado_idx'),
+            # Listado del personal: triage completado, filtro por nivel ESI y orden por llegada sin joins
+            models.Index(fields=['ultima_sesion_completada', 'ultima_sesion_inicio'], name='pac_ult_compl_inicio_idx'),
+            models.Index(fields=['ultima_sesion_completada', 'ultima_sesion_nivel', 'ultima_sesion_inicio'], name='pac_ult_compl_nivel_idx'),
+            # Paginación por cursor sin filtros: (ultima_sesion_inicio, id), el id lo agrega el motor al índice
+            models.Index(fields=['ultima_sesion_inicio'], name='pac_ult_inicio_idx'),
         ]
 
     # Representación en cadena del modelo para el admin y tener una visualización clara de los pacientes
     # Esto es útil para identificar rápidamente a los pacientes en la interfaz de administración
     def __str__(self):
         return f"{self.primer_nombre} {self.primer_apellido} ({self.numero_documento})"
+
+    def save(self, *args, **kwargs):
+        # Los términos solo se reescriben cuando cambian nombres o documento
+        update_fields = kwargs.get('update_fields')
+        busqueda = self.busqueda
+        if update_fields is None or set(CAMPOS_BUSQUEDA).intersection(update_fields):
+            busqueda = BusquedaPacientes.texto(self)
+        if busqueda == self.busqueda and not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        self.busqueda = busqueda
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'busqueda'}
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            BusquedaPacientes.indexar(self)
     
     @property
     def edad(self):
@@ -52,6 +93,32 @@ class Paciente(models.Model):
             edad -= 1
         return edad
 
+    @property
+    def contacto_principal(self):
+        """
+        Contacto de emergencia más reciente. Usa los contactos precargados con
+        prefetch_related('contacto_emergencia') si existen; si no, hace una consulta.
+        """
+        precargados = getattr(self, '_prefetched_objects_cache', {})
+        if 'contacto_emergencia' in precargados:
+            return max(precargados['contacto_emergencia'], key=lambda contacto: contacto.pk, default=None)
+        return self.contacto_emergencia.order_by('-id').first()
+
+
+# Términos de búsqueda de cada paciente, uno por fila (ver pacientes/busqueda.py)
+class PacienteTermino(models.Model):
+    paciente = models.ForeignKey(Paciente, on_delete=models.CASCADE, related_name='terminos')
+    termino = models.CharField(max_length=40)
+
+    class Meta:
+        indexes = [
+            # Búsqueda por prefijo: rango sobre termino que devuelve los pacientes desde el índice
+            models.Index(fields=['termino', 'paciente'], name='pac_termino_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.termino} ({self.paciente_id})"
+
 
 # Modelo de contacto de emergencia para pacientes
 class ContactoEmergencia(models.Model):
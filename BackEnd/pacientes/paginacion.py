@@ -0,0 +1,181 @@
+"""
+Paginación del listado de pacientes.
+
+- StandardResultsSetPagination: por número de página (la del frontend). Con ?contar=false
+  omite el COUNT(*) y detecta la página siguiente leyendo una fila de más.
+- UltimaSesionCursorPagination: por cursor (keyset) sobre (ultima_sesion_inicio, id).
+  Cada página es una búsqueda por índice a partir de la última fila entregada, sin
+  OFFSET ni COUNT(*): la página N cuesta lo mismo que la primera.
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def debe_contar(request, por_defecto):
+    """Lee el parámetro ?contar=true|false del request."""
+    valor = request.query_params.get('contar')
+    if valor is None:
+        return por_defecto
+    return valor.lower() not in ('false', '0', 'no')
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.contar = debe_contar(request, por_defecto=True)
+        if self.contar:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.numero = int(request.query_params.get(self.page_query_param, 1))
+            if self.numero < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound('Página inválida.')
+
+        # Una fila adicional indica si existe la página siguiente sin contar el total
+        desde = (self.numero - 1) * page_size
+        filas = list(queryset[desde:desde + page_size + 1])
+        self.hay_siguiente = len(filas) > page_size
+        return filas[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.contar:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if self.contar:
+            return super().get_next_link()
+        if not self.hay_siguiente:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.numero + 1)
+
+    def get_previous_link(self):
+        if self.contar:
+            return super().get_previous_link()
+        if self.numero <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.numero == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.numero - 1)
+
+
+class UltimaSesionCursorPagination(BasePagination):
+    """
+    Paginación por cursor opaco sobre (ultima_sesion_inicio, id), hacia adelante.
+    Admite el orden descendente (por defecto) y el ascendente de ultima_sesion_inicio;
+    los pacientes sin sesión (NULL) quedan al final en orden descendente y al inicio en
+    ascendente, como los ordenan SQLite y MySQL, de modo que el índice sirve en ambos casos.
+    El total solo se calcula con ?contar=true.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    campo = 'ultima_sesion_inicio'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def _descendente(self, queryset):
+        """Dirección pedida por el ordenamiento de la vista; solo se admite el campo del cursor."""
+        orden = list(queryset.query.order_by) or [f'-{self.campo}']
+        if str(orden[0]).lstrip('-') != self.campo:
+            raise ValidationError({
+                'ordering': f'La paginación por cursor solo admite ordenar por {self.campo}.'
+            })
+        return str(orden[0]).startswith('-')
+
+    def codificar_cursor(self, paciente):
+        valor = getattr(paciente, self.campo)
+        datos = {'v': valor.isoformat() if valor else None, 'id': paciente.pk, 'd': self.descendente}
+        return base64.urlsafe_b64encode(json.dumps(datos, separators=(',', ':')).encode()).decode()
+
+    def decodificar_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            valor = parse_datetime(datos['v']) if datos['v'] is not None else None
+            if datos['v'] is not None and valor is None:
+                raise ValueError
+            posicion = (valor, int(datos['id']))
+        except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+            raise NotFound('Cursor inválido.')
+        # Un cursor solo vale para la dirección con la que se generó
+        if datos.get('d') != self.descendente:
+            raise NotFound('Cursor inválido.')
+        return posicion
+
+    def filtro_despues_de(self, valor, pk):
+        """Filas posteriores a (valor, pk) en el orden de la página."""
+        operador = 'lt' if self.descendente else 'gt'
+        if valor is None:
+            filtro = Q(**{f'{self.campo}__isnull': True, f'pk__{operador}': pk})
+            if not self.descendente:
+                filtro |= Q(**{f'{self.campo}__isnull': False})
+            return filtro
+        filtro = Q(**{f'{self.campo}__{operador}': valor}) | Q(**{self.campo: valor, f'pk__{operador}': pk})
+        if self.descendente:
+            filtro |= Q(**{f'{self.campo}__isnull': True})
+        return filtro
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.descendente = self._descendente(queryset)
+        self.contar = debe_contar(request, por_defecto=False)
+        self.total = queryset.count() if self.contar else None
+
+        if self.descendente:
+            queryset = queryset.order_by(f'-{self.campo}', '-pk')
+        else:
+            queryset = queryset.order_by(self.campo, 'pk')
+        posicion = self.decodificar_cursor(request)
+        if posicion is not None:
+            queryset = queryset.filter(self.filtro_despues_de(*posicion))
+
+        filas = list(queryset[:self.page_size + 1])
+        self.siguiente = filas[self.page_size - 1] if len(filas) > self.page_size else None
+        return filas[:self.page_size]
+
+    def get_next_link(self):
+        if self.siguiente is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.codificar_cursor(self.siguiente)
+        )
+
+    def get_paginated_response(self, data):
+        respuesta = OrderedDict([('next', self.get_next_link()), ('results', data)])
+        if self.contar:
+            respuesta['count'] = self.total
+            respuesta.move_to_end('count', last=False)
+        return Response(respuesta)
@@ -137,7 +137,7 @@ class PacienteSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Paciente
-        fields = '__all__'
+        exclude = ('busqueda',)  # Texto interno del índice de búsqueda
 
     # Método para crear un paciente y su contacto de emergencia
     def create(self, validated_data):
@@ -150,15 +150,9 @@ class PacienteSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         
-        # Obtener el contacto de emergencia de forma segura
-        try:
-            contacto = instance.contacto_emergencia.first()
-            if contacto:
-                representation['contacto_emergencia'] = ContactoEmergenciaSerializer(contacto).data
-            else:
-                representation['contacto_emergencia'] = None
-        except Exception:
-            representation['contacto_emergencia'] = None
+        # Contacto de emergencia más reciente, sin consulta si las vistas lo precargaron
+        contacto = instance.contacto_principal
+        representation['contacto_emergencia'] = ContactoEmergenciaSerializer(contacto).data if contacto else None
             
         return representation
     
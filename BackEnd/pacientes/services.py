@@ -1,8 +1,16 @@
 import csv
-import io
-from django.http import HttpResponse
+from django.db.models import Exists, OuterRef, Subquery
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from .models import Paciente
+from triage.models import SesionTriage
+from .models import Paciente, ContactoEmergencia
+
+
+class _EscrituraDirecta:
+    """Objeto tipo archivo cuyo write devuelve la línea en lugar de almacenarla."""
+    
+    def write(self, valor):
+        return valor
 
 
 class PacienteCsvService:
@@ -11,80 +19,93 @@ class PacienteCsvService:
     Siguiendo el principio de Single Responsibility Pattern.
     """
     
-    def exportar_pacientes_csv(self):
+    # Filas leídas de la base de datos por cada viaje; la memoria no depende del total de pacientes
+    TAMANO_LOTE = 500
+    
+    ENCABEZADOS = [
+        'ID', 'Primer Nombre', 'Segundo Nombre', 'Primer Apellido', 'Segundo Apellido',
+        'Edad', 'Tipo Documento', 'Número Documento', 'Sexo', 'Teléfono',
+        'EPS', 'Régimen EPS', 'Nivel ESI', 'Estado Atención', 'Síntomas Iniciales',
+        'Fecha Llegada', 'Fecha Fin Triage', 'Tiempo Total (min)',
+        'Contacto Emergencia', 'Teléfono Emergencia'
+    ]
+    
+    def obtener_queryset(self):
         """
-        Genera un archivo CSV con la tabla de pacientes.
-        
-        Returns:
-            HttpResponse con el archivo CSV
+        Pacientes con triage completado, con los datos de su sesión más reciente (columnas
+        ultima_sesion_* de Paciente) y de su contacto de emergencia más reciente en una sola consulta.
         """
-        # Obtener todos los pacientes con triage completado
-        queryset = Paciente.objects.select_related().prefetch_related(
-            'sesiones_triage',
-            'contacto_emergencia'
-        ).filter(
-            sesiones_triage__completado=True
-        ).distinct().order_by('-sesiones_triage__fecha_inicio')
+        ultimo_contacto = ContactoEmergencia.objects.filter(paciente=OuterRef('pk')).order_by('-id')
+        
+        return Paciente.objects.filter(
+            Exists(SesionTriage.objects.filter(paciente=OuterRef('pk'), completado=True))
+        ).annotate(
+            contacto_primer_nombre=Subquery(ultimo_contacto.values('primer_nombre')[:1]),
+            contacto_primer_apellido=Subquery(ultimo_contacto.values('primer_apellido')[:1]),
+            contacto_prefijo_telefonico=Subquery(ultimo_contacto.values('prefijo_telefonico')[:1]),
+            contacto_telefono=Subquery(ultimo_contacto.values('telefono')[:1]),
+        ).order_by('-ultima_sesion_inicio')
+    
+    def construir_fila(self, paciente):
+        """Fila CSV de un paciente anotado por obtener_queryset."""
+        fecha_inicio = paciente.ultima_sesion_inicio
+        fecha_fin = paciente.ultima_sesion_fin
         
-        # Crear archivo CSV en memoria
-        output = io.StringIO()
-        writer = csv.writer(output)
+        # Calcular tiempo total si existe fecha fin
+        tiempo_total = ''
+        if fecha_inicio and fecha_fin:
+            tiempo_minutos = (fecha_fin - fecha_inicio).total_seconds() / 60
+            tiempo_total = f'{tiempo_minutos:.1f}'
         
-        # Escribir encabezados según el formato solicitado
-        headers = [
-            'ID', 'Primer Nombre', 'Segundo Nombre', 'Primer Apellido', 'Segundo Apellido',
-            'Edad', 'Tipo Documento', 'Número Documento', 'Sexo', 'Teléfono',
-            'EPS', 'Régimen EPS', 'Nivel ESI', 'Estado Atención', 'Síntomas Iniciales',
-            'Fecha Llegada', 'Fecha Fin Triage', 'Tiempo Total (min)',
-            'Contacto Emergencia', 'Teléfono Emergencia'
+        # Información de contacto de emergencia
+        contacto_nombre = ''
+        contacto_telefono = ''
+        if paciente.contacto_primer_nombre is not None:
+            contacto_nombre = f"{paciente.contacto_primer_nombre} {paciente.contacto_primer_apellido}"
+            contacto_telefono = f"{paciente.contacto_prefijo_telefonico}{paciente.contacto_telefono}"
+        
+        return [
+            paciente.id,
+            paciente.primer_nombre,
+            paciente.segundo_nombre or '',
+            paciente.primer_apellido,
+            paciente.segundo_apellido or '',
+            paciente.edad,
+            paciente.get_tipo_documento_display(),
+            paciente.numero_documento,
+            paciente.get_sexo_display(),
+            f"{paciente.prefijo_telefonico}{paciente.telefono}",
+            paciente.get_eps_display(),
+            paciente.get_regimen_eps_display(),
+            f"ESI {paciente.ultima_sesion_nivel}" if paciente.ultima_sesion_nivel else 'Sin clasificar',
+            paciente.get_estado_display(),
+            paciente.sintomas_iniciales,
+            fecha_inicio.strftime('%Y-%m-%d %H:%M:%S') if fecha_inicio else '',
+            fecha_fin.strftime('%Y-%m-%d %H:%M:%S') if fecha_fin else '',
+            tiempo_total,
+            contacto_nombre,
+            contacto_telefono
         ]
-        writer.writerow(headers)
+    
+    def generar_filas(self):
+        """
+        Genera el CSV línea por línea recorriendo los pacientes por lotes.
+        """
+        writer = csv.writer(_EscrituraDirecta())
+        yield writer.writerow(self.ENCABEZADOS)
         
-        # Escribir datos de pacientes
-        for paciente in queryset:
-            sesion_triage = paciente.sesiones_triage.first()
-            contacto_emergencia = paciente.contacto_emergencia.first()
-            
-            # Calcular tiempo total si existe fecha fin
-            tiempo_total = ''
-            if sesion_triage and sesion_triage.fecha_fin:
-                tiempo_minutos = (sesion_triage.fecha_fin - sesion_triage.fecha_inicio).total_seconds() / 60
-                tiempo_total = f'{tiempo_minutos:.1f}'
-            
-            # Información de contacto de emergencia
-            contacto_nombre = ''
-            contacto_telefono = ''
-            if contacto_emergencia:
-                contacto_nombre = f"{contacto_emergencia.primer_nombre} {contacto_emergencia.primer_apellido}"
-                contacto_telefono = f"{contacto_emergencia.prefijo_telefonico}{contacto_emergencia.telefono}"
-            
-            row = [
-                paciente.id,
-                paciente.primer_nombre,
-                paciente.segundo_nombre or '',
-                paciente.primer_apellido,
-                paciente.segundo_apellido or '',
-                paciente.edad,
-                paciente.get_tipo_documento_display(),
-                paciente.numero_documento,
-                paciente.get_sexo_display(),
-                f"{paciente.prefijo_telefonico}{paciente.telefono}",
-                paciente.get_eps_display(),
-                paciente.get_regimen_eps_display(),
-                f"ESI {sesion_triage.nivel_triage}" if sesion_triage and sesion_triage.nivel_triage else 'Sin clasificar',
-                paciente.get_estado_display(),
-                paciente.sintomas_iniciales,
-                sesion_triage.fecha_inicio.strftime('%Y-%m-%d %H:%M:%S') if sesion_triage else '',
-                sesion_triage.fecha_fin.strftime('%Y-%m-%d %H:%M:%S') if sesion_triage and sesion_triage.fecha_fin else '',
-                tiempo_total,
-                contacto_nombre,
-                contacto_telefono
-            ]
-            writer.writerow(row)
+        for paciente in self.obtener_queryset().iterator(chunk_size=self.TAMANO_LOTE):
+            yield writer.writerow(self.construir_fila(paciente))
+    
+    def exportar_pacientes_csv(self):
+        """
+        Genera un archivo CSV con la tabla de pacientes.
         
-        # Preparar respuesta HTTP
-        response = HttpResponse(
-            output.getvalue(),
+        Returns:
+            StreamingHttpResponse con el archivo CSV, enviado a medida que se genera
+        """
+        response = StreamingHttpResponse(
+            self.generar_filas(),
             content_type='text/csv; charset=utf-8'
         )
         
@@ -92,4 +113,4 @@ class PacienteCsvService:
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         response['Content-Encoding'] = 'utf-8'
         
-        return response
\ No newline at end of file
+        return response
@@ -0,0 +1,25 @@
+"""
+Señales de pacientes: mantienen la cola de la sala de espera al registrar, modificar o
+eliminar pacientes (los cambios de sesión la actualizan desde triage/utils/ultima_sesion.py).
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cola_espera import CAMPOS_COLA, ColaEspera
+from .models import Paciente
+
+
+def _programar_notificacion(paciente_id):
+    transaction.on_commit(lambda: ColaEspera.notificar(paciente_id))
+
+
+@receiver(post_save, sender=Paciente)
+def actualizar_cola_paciente(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or set(CAMPOS_COLA).intersection(update_fields):
+        _programar_notificacion(instance.pk)
+
+
+@receiver(post_delete, sender=Paciente)
+def eliminar_cola_paciente(sender, instance, **kwargs):
+    _programar_notificacion(instance.pk)
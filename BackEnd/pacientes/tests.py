@@ -0,0 +1,391 @@
+"""
+Tests de pacientes: contrato de consultas de la serialización
+"""
+
+import csv
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from triage.models import SesionTriage
+from .busqueda import BusquedaPacientes
+from .cola_espera import ColaEspera
+from .models import Paciente, ContactoEmergencia
+from .paginacion import StandardResultsSetPagination
+from .services import PacienteCsvService
+
+
+def crear_paciente(documento, sexo='F', edad=30, **campos):
+    """Paciente con los campos obligatorios; campos reemplaza cualquier valor por defecto"""
+    hoy = date.today()
+    datos = {
+        'primer_nombre': 'Paciente', 'primer_apellido': 'Prueba', 'fecha_nacimiento': date(hoy.year - edad - 1, 1, 1),
+        'tipo_documento': 'CC', 'numero_documento': str(documento), 'sexo': sexo,
+        'prefijo_telefonico': '+57', 'telefono': '3001234567', 'regimen_eps': 'SISBEN', 'eps': 'SURA',
+        'sintomas_iniciales': 'Dolor',
+    }
+    datos.update(campos)
+    return Paciente.objects.create(**datos)
+
+
+class SerializacionPacientesTestCase(TestCase):
+    """Listado y detalle se serializan con un número fijo de consultas, sin importar las filas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for indice in range(StandardResultsSetPagination.max_page_size):
+            paciente = crear_paciente(1000000000 + indice, primer_apellido='Contrato')
+            for nombre in ('Antiguo', 'Reciente'):
+                ContactoEmergencia.objects.create(
+                    paciente=paciente, primer_nombre=nombre, primer_apellido='Contacto',
+                    prefijo_telefonico='+57', telefono='3007654321', relacion_parentesco='Hermano',
+                )
+            SesionTriage.objects.create(paciente=paciente, completado=True, nivel_triage=3)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _consultas(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return len(consultas.captured_queries), respuesta.json()['data']
+
+    def test_listado_con_consultas_constantes(self):
+        """Conteo, página, sesiones y contactos: cuatro consultas para 1 o 100 filas"""
+        consultas_una, _ = self._consultas('/api/v1/pacientes/?page_size=1')
+        consultas_cien, datos = self._consultas('/api/v1/pacientes/?page_size=100')
+
+        self.assertEqual(len(datos['results']), 100)
+        self.assertEqual(consultas_cien, 4)
+        self.assertEqual(consultas_una, consultas_cien)
+        # Con varios contactos se muestra el más reciente, igual que antes
+        self.assertEqual({p['contacto_emergencia']['primer_nombre'] for p in datos['results']}, {'Reciente'})
+
+    def test_detalle_y_sin_precarga(self):
+        """El detalle usa la precarga; sin ella el contacto cuesta una sola consulta"""
+        paciente = Paciente.objects.order_by('id').first()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='admin', password='clave-segura', document_type='CC', document_number='100',
+            birth_date=date(1990, 1, 1), phone='3000000000', is_staff=True
+        ))
+        consultas, datos = self._consultas(f'/api/v1/pacientes/{paciente.id}')
+        self.assertEqual(consultas, 3)
+        self.assertEqual(datos['contacto_emergencia']['primer_nombre'], 'Reciente')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(paciente.contacto_principal.primer_nombre, 'Reciente')
+
+
+class UltimaSesionPacientesTestCase(TestCase):
+    """Las columnas ultima_sesion_* de Paciente siguen a la sesión más reciente"""
+
+    def test_listado_pacientes_usa_columnas_de_ultima_sesion(self):
+        """El listado filtra y ordena por las columnas desnormalizadas, sin joins ni DISTINCT"""
+        antiguo = crear_paciente(1000000300, 'M', 40)
+        reciente = crear_paciente(1000000301)
+        ahora = timezone.now()
+        SesionTriage.objects.create(paciente=antiguo, completado=True, nivel_triage=2,
+                                    fecha_inicio=ahora - timedelta(hours=1), fecha_fin=ahora - timedelta(minutes=50))
+        sesion = SesionTriage.objects.create(paciente=reciente)
+        sesion.completado, sesion.nivel_triage, sesion.fecha_fin = True, 3, ahora
+        sesion.save(update_fields=['completado', 'nivel_triage', 'fecha_fin'])
+        SesionTriage.objects.create(paciente=antiguo, fecha_inicio=ahora - timedelta(days=1))
+        SesionTriage.objects.create(paciente=antiguo, fecha_inicio=ahora - timedelta(minutes=30))
+
+        antiguo.refresh_from_db()
+        reciente.refresh_from_db()
+        # Una sesión creada después pero con fecha anterior no reemplaza a la más reciente
+        self.assertEqual((antiguo.ultima_sesion_nivel, antiguo.ultima_sesion_completada), (None, False))
+        self.assertEqual(antiguo.ultima_sesion_inicio, ahora - timedelta(minutes=30))
+        self.assertEqual((reciente.ultima_sesion_id, reciente.ultima_sesion_nivel), (sesion.id, 3))
+        self.assertTrue(reciente.ultima_sesion_completada)
+
+        with CaptureQueriesContext(connection) as consultas:
+            datos = self.client.get(
+                '/api/v1/pacientes/?triage_completado=true&ordering=-sesiones_triage__fecha_inicio'
+            ).json()
+        self.assertEqual([p['id'] for p in datos['data']['results']], [reciente.id])
+        tabla_sesiones = SesionTriage._meta.db_table
+        principal = [q['sql'] for q in consultas.captured_queries if 'FROM "pacientes_paciente"' in q['sql']]
+        self.assertTrue(principal)
+        for sql in principal:
+            self.assertNotIn('DISTINCT', sql)
+            self.assertNotIn(f'JOIN "{tabla_sesiones}"', sql)
+
+        sesion.delete()
+        reciente.refresh_from_db()
+        self.assertIsNone(reciente.ultima_sesion_id)
+        self.assertFalse(reciente.ultima_sesion_completada)
+
+
+class PaginacionPacientesTestCase(TestCase):
+    """Paginación por cursor y por número sin total del listado de pacientes"""
+
+    def test_paginacion_por_cursor_recorre_el_listado_con_costo_constante(self):
+        """El cursor recorre todo el listado sin repetir ni saltar filas, sin COUNT ni OFFSET"""
+        ahora = timezone.now()
+        for indice in range(20):
+            paciente = crear_paciente(1000000400 + indice)
+            if indice < 16:
+                # Cada cuatro pacientes comparten hora de llegada para probar el desempate por id
+                SesionTriage.objects.create(paciente=paciente, fecha_inicio=ahora - timedelta(minutes=indice // 4))
+        esperado = list(Paciente.objects.order_by('-ultima_sesion_inicio', '-id').values_list('id', flat=True))
+
+        recorrido, consultas_por_pagina = [], []
+        url = '/api/v1/pacientes/?paginacion=cursor&page_size=6'
+        while url:
+            with CaptureQueriesContext(connection) as consultas:
+                datos = self.client.get(url).json()['data']
+            consultas_por_pagina.append(len(consultas.captured_queries))
+            for sql in (q['sql'] for q in consultas.captured_queries):
+                self.assertNotIn('COUNT(', sql)
+                self.assertNotIn('OFFSET', sql)
+            self.assertNotIn('count', datos)
+            recorrido.extend(p['id'] for p in datos['results'])
+            url = datos['next']
+
+        self.assertEqual(recorrido, esperado)
+        self.assertEqual(len(set(consultas_por_pagina)), 1, consultas_por_pagina)
+
+        ascendente = self.client.get(
+            '/api/v1/pacientes/?paginacion=cursor&page_size=15&contar=true&ordering=sesiones_triage__fecha_inicio'
+        ).json()['data']
+        self.assertEqual(ascendente['count'], 20)
+        siguiente = self.client.get(ascendente['next']).json()['data']
+        self.assertEqual([p['id'] for p in ascendente['results'] + siguiente['results']], esperado[::-1])
+
+        self.assertEqual(self.client.get('/api/v1/pacientes/?cursor=invalido').status_code, 404)
+        self.assertEqual(self.client.get('/api/v1/pacientes/?paginacion=cursor&ordering=primer_nombre').status_code, 400)
+
+        # Paginación por número sin total
+        with CaptureQueriesContext(connection) as consultas:
+            datos = self.client.get('/api/v1/pacientes/?page=2&page_size=6&contar=false').json()['data']
+        self.assertFalse(any('COUNT(' in q['sql'] for q in consultas.captured_queries))
+        self.assertNotIn('count', datos)
+        self.assertEqual([p['id'] for p in datos['results']], esperado[6:12])
+        self.assertIsNotNone(datos['next'])
+        self.assertIsNotNone(datos['previous'])
+
+
+class ExportarPacientesCsvTestCase(TestCase):
+    """Exportación CSV: encabezado, filas y consultas constantes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='admin', password='clave-segura', document_type='CC', document_number='100',
+            birth_date=date(1990, 1, 1), phone='3000000000', is_staff=True
+        ))
+
+    def _exportar(self):
+        """Consultas y filas del CSV, consumiendo la respuesta completa"""
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get('/api/v1/pacientes/exportar-csv/')
+            contenido = b''.join(respuesta.streaming_content).decode('utf-8')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta['Content-Type'].startswith('text/csv'))
+        return len(consultas.captured_queries), list(csv.reader(contenido.splitlines()))
+
+    def test_encabezado_y_filas(self):
+        """Solo pacientes con triage completado; sin contacto las columnas del contacto quedan vacías"""
+        ahora = timezone.now().replace(microsecond=0)
+        con_contacto = crear_paciente(1000000700, 'M', 45, segundo_nombre='José')
+        for nombre in ('Antiguo', 'Reciente'):
+            ContactoEmergencia.objects.create(
+                paciente=con_contacto, primer_nombre=nombre, primer_apellido='Contacto',
+                prefijo_telefonico='+57', telefono='3007654321', relacion_parentesco='Hermano',
+            )
+        SesionTriage.objects.create(paciente=con_contacto, completado=True, nivel_triage=2,
+                                    fecha_inicio=ahora - timedelta(hours=1), fecha_fin=ahora - timedelta(minutes=30))
+        sin_contacto = crear_paciente(1000000701)
+        SesionTriage.objects.create(paciente=sin_contacto, completado=True, nivel_triage=4, fecha_inicio=ahora)
+        # Sin sesión ni contacto, o con el triage sin terminar: no se exportan
+        crear_paciente(1000000702)
+        SesionTriage.objects.create(paciente=crear_paciente(1000000703), fecha_inicio=ahora)
+
+        _, filas = self._exportar()
+        self.assertEqual(filas[0], PacienteCsvService.ENCABEZADOS)
+        self.assertEqual([fila[0] for fila in filas[1:]], [str(sin_contacto.id), str(con_contacto.id)])
+
+        inicio = (ahora - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+        fin = (ahora - timedelta(minutes=30)).strftime('%Y-%m-%d %H:%M:%S')
+        self.assertEqual(filas[2], [
+            str(con_contacto.id), 'Paciente', 'José', 'Prueba', '',
+            str(con_contacto.edad), con_contacto.get_tipo_documento_display(), '1000000700',
+            con_contacto.get_sexo_display(), '+573001234567', con_contacto.get_eps_display(),
+            con_contacto.get_regimen_eps_display(), 'ESI 2', con_contacto.get_estado_display(), 'Dolor',
+            inicio, fin, '30.0', 'Reciente Contacto', '+573007654321',
+        ])
+
+        fila = dict(zip(PacienteCsvService.ENCABEZADOS, filas[1]))
+        self.assertEqual((fila['Nivel ESI'], fila['Fecha Fin Triage'], fila['Tiempo Total (min)']), ('ESI 4', '', ''))
+        self.assertEqual((fila['Contacto Emergencia'], fila['Teléfono Emergencia']), ('', ''))
+
+    def test_consultas_constantes(self):
+        """Una sola consulta de pacientes para 1 o 30 filas"""
+        paciente = crear_paciente(1000000710)
+        SesionTriage.objects.create(paciente=paciente, completado=True, nivel_triage=3)
+        consultas_una, filas = self._exportar()
+        self.assertEqual(len(filas), 2)
+
+        for indice in range(1, 30):
+            paciente = crear_paciente(1000000710 + indice)
+            ContactoEmergencia.objects.create(
+                paciente=paciente, primer_nombre='Contacto', primer_apellido='Prueba',
+                prefijo_telefonico='+57', telefono='3007654321', relacion_parentesco='Madre',
+            )
+            SesionTriage.objects.create(paciente=paciente, completado=True, nivel_triage=3)
+        consultas_treinta, filas = self._exportar()
+        self.assertEqual(len(filas), 31)
+        self.assertEqual(consultas_una, 1)
+        self.assertEqual(consultas_una, consultas_treinta)
+
+
+class BusquedaPacientesTestCase(TestCase):
+    """Búsqueda por nombres y documento sobre el índice de términos"""
+
+    def _buscar(self, texto):
+        datos = self.client.get('/api/v1/pacientes/', {'search': texto}).json()['data']
+        return {p['id'] for p in datos['results']}
+
+    def test_busqueda_de_pacientes_insensible_a_tildes_y_por_indice(self):
+        """La búsqueda ignora tildes y mayúsculas, cruza los cuatro nombres y el documento y usa el índice"""
+        gomez = crear_paciente(1032456789, primer_nombre='María', segundo_nombre='José', segundo_apellido='Gómez')
+        otro = crear_paciente(1032999999, 'M', 40)
+
+        self.assertEqual(self._buscar('gomez'), {gomez.id})
+        self.assertEqual(self._buscar('GÓMEZ maria'), {gomez.id})
+        self.assertEqual(self._buscar('jose prueba'), {gomez.id})
+        self.assertEqual(self._buscar('1032'), {gomez.id, otro.id})
+        self.assertEqual(self._buscar('1032456'), {gomez.id})
+        self.assertEqual(self._buscar('maria perez'), set())
+        self.assertNotIn('busqueda', self.client.get('/api/v1/pacientes/').json()['data']['results'][0])
+
+        # Cambios que no tocan nombres ni documento no reescriben los términos
+        with CaptureQueriesContext(connection) as consultas:
+            gomez.estado = 'EN_ATENCION'
+            gomez.save()
+        self.assertEqual(len(consultas.captured_queries), 1)
+
+        gomez.segundo_apellido = None
+        gomez.save(update_fields=['segundo_apellido'])
+        self.assertEqual(self._buscar('gomez'), set())
+
+        if connection.vendor == 'sqlite':
+            plan = BusquedaPacientes.filtrar(Paciente.objects.order_by(), 'gom 1032').explain()
+            self.assertIn('pac_termino_idx', plan)
+
+    def test_busqueda_sin_palabras_validas_no_devuelve_pacientes(self):
+        """Un texto que al normalizarse queda vacío no devuelve el listado completo"""
+        paciente = crear_paciente(1032456789)
+
+        self.assertEqual(self._buscar('¿?'), set())
+        self.assertEqual(self._buscar(' -- '), set())
+        self.assertEqual(self._buscar(''), {paciente.id})
+        self.assertEqual(self._buscar('   '), {paciente.id})
+
+
+class ColaEsperaTestCase(TestCase):
+    """Cola de la sala de espera ordenada por ESI y llegada, con lecturas incrementales"""
+
+    def setUp(self):
+        ColaEspera.invalidar()
+        self.addCleanup(ColaEspera.invalidar)
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='enfermera', password='clave-segura', document_type='CC',
+            document_number='100', birth_date=date(1990, 1, 1), phone='3000000000'
+        ))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.primero = crear_paciente(1000000500)
+            self.segundo = crear_paciente(1000000501, 'M', 40)
+            self.tercero = crear_paciente(1000000502, 'F', 50)
+            SesionTriage.objects.create(paciente=self.primero, completado=True, nivel_triage=3)
+            SesionTriage.objects.create(paciente=self.segundo, completado=True, nivel_triage=3)
+            SesionTriage.objects.create(paciente=self.tercero, completado=True, nivel_triage=2)
+
+    def _leer(self, since=None):
+        parametros = {'since': since} if since else {}
+        respuesta = self.client.get('/api/v1/pacientes/cola-espera', parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()['data']
+
+    def _cambiar_estado(self, paciente, estado):
+        with self.captureOnCommitCallbacks(execute=True):
+            paciente.estado = estado
+            paciente.save(update_fields=['estado'])
+
+    @override_settings(COLA_ESPERA_CACHE_COMPARTIDA=True)
+    def test_cola_de_espera_ordenada_y_con_lecturas_incrementales(self):
+        """Con la caché compartida, una lectura con since solo trae los cambios sin consultar la base"""
+        cola = self._leer()
+        self.assertTrue(cola['completo'])
+        self.assertEqual([p['id'] for p in cola['pacientes']], [self.tercero.id, self.primero.id, self.segundo.id])
+
+        with CaptureQueriesContext(connection) as consultas:
+            delta = self._leer(cola['version'])
+        self.assertEqual(len(consultas.captured_queries), 0)
+        self.assertEqual((delta['completo'], delta['cambios'], delta['eliminados']), (False, [], []))
+
+        self._cambiar_estado(self.primero, 'ATENDIDO')
+        with self.captureOnCommitCallbacks(execute=True):
+            sesion = SesionTriage.objects.create(paciente=self.segundo)
+            sesion.completado, sesion.nivel_triage = True, 1
+            sesion.save(update_fields=['completado', 'nivel_triage'])
+
+        delta = self._leer(cola['version'])
+        self.assertFalse(delta['completo'])
+        self.assertEqual(delta['eliminados'], [self.primero.id])
+        self.assertEqual([(p['id'], p['nivel_triage']) for p in delta['cambios']], [(self.segundo.id, 1)])
+        self.assertEqual([p['id'] for p in self._leer()['pacientes']], [self.segundo.id, self.tercero.id])
+
+        # Un token de otra instancia o inválido recibe la cola completa
+        self.assertTrue(self._leer('otra.1')['completo'])
+        self.assertTrue(self._leer('basura')['completo'])
+
+    def test_cliente_reconstruye_la_cola_aplicando_los_cambios(self):
+        """Aplicar eliminados y cambios sobre la lectura anterior da la misma cola que una lectura completa"""
+        cola = self._leer()
+        local = {p['id']: p for p in cola['pacientes']}
+
+        # El primero sale y vuelve a la cola entre dos lecturas: no puede llegar a la vez como eliminado y cambio
+        self._cambiar_estado(self.primero, 'ATENDIDO')
+        self._cambiar_estado(self.tercero, 'ATENDIDO')
+        self._cambiar_estado(self.primero, 'EN_ESPERA')
+        cuarto = crear_paciente(1000000503)
+        with self.captureOnCommitCallbacks(execute=True):
+            SesionTriage.objects.create(paciente=cuarto, completado=True, nivel_triage=1)
+
+        delta = self._leer(cola['version'])
+        self.assertFalse(delta['completo'])
+        cambiados = {p['id'] for p in delta['cambios']}
+        self.assertFalse(cambiados & set(delta['eliminados']))
+        self.assertEqual(delta['eliminados'], [self.tercero.id])
+
+        for paciente_id in delta['eliminados']:
+            local.pop(paciente_id, None)
+        local.update({p['id']: p for p in delta['cambios']})
+        orden = sorted(local.values(), key=lambda p: (p['nivel_triage'] or 6, p['llegada'], p['id']))
+
+        completa = self._leer()['pacientes']
+        self.assertEqual([p['id'] for p in orden], [p['id'] for p in completa])
+        self.assertEqual(orden, completa)
+
+    def test_sin_cache_compartida_cada_lectura_se_resincroniza(self):
+        """Con una caché por proceso la generación no es fiable: se ven los cambios de otros procesos"""
+        cola = self._leer()
+        # Cambio hecho por otro proceso: no notifica a esta cola ni a esta caché
+        Paciente.objects.filter(pk=self.segundo.pk).update(estado='ATENDIDO')
+
+        with override_settings(COLA_ESPERA_CACHE_COMPARTIDA=True):
+            self.assertEqual(self._leer(cola['version'])['eliminados'], [])
+        delta = self._leer(cola['version'])
+        self.assertEqual(delta['eliminados'], [self.segundo.id])
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import ListCreatePacienteView, DetallePacienteView, ActualizarContactoEmergenciaView, ExportarPacientesCsvView
+from .views import ListCreatePacienteView, DetallePacienteView, ActualizarContactoEmergenciaView, ExportarPacientesCsvView, ColaEsperaView
 
 urlpatterns = [
     # POST /api/v1/pacientes/ - Crear un nuevo paciente
@@ -15,4 +15,7 @@ urlpatterns = [
     
     # GET /api/v1/pacientes/exportar-csv/ - Exportar tabla de pacientes a CSV
     path('exportar-csv/', ExportarPacientesCsvView.as_view(), name='paciente-exportar-csv'),
+
+    # GET /api/v1/pacientes/cola-espera?since={version} - Cola de la sala de espera (completa o solo cambios)
+    path('cola-espera', ColaEsperaView.as_view(), name='paciente-cola-espera'),
 ]
\ No newline at end of file
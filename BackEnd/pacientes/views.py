@@ -3,32 +3,67 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from rest_framework.pagination import PageNumberPagination
 from django.http import HttpResponse
 from .models import Paciente, ContactoEmergencia
 from .serializers import PacienteSerializer, ContactoEmergenciaSerializer
 from .services import PacienteCsvService
+from .paginacion import StandardResultsSetPagination, UltimaSesionCursorPagination
+from .busqueda import BusquedaPacientes
+from .cola_espera import ColaEspera
 from utils.IsAdmin import IsAdminUser
 
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+class UltimaSesionOrderingFilter(OrderingFilter):
+    """
+    Ordenamiento que traduce los campos de sesión usados por el frontend
+    a las columnas de la sesión más reciente guardadas en Paciente
+    """
+    ALIAS = {
+        'sesiones_triage__fecha_inicio': 'ultima_sesion_inicio',
+        'sesiones_triage__nivel_triage': 'ultima_sesion_nivel',
+    }
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [
+            ('-' if campo.startswith('-') else '') + self.ALIAS.get(campo.lstrip('-'), campo.lstrip('-'))
+            for campo in ordering
+        ]
+
+class BusquedaPacienteFilter(SearchFilter):
+    """
+    Búsqueda por nombres y documento insensible a tildes, resuelta con el índice
+    de términos de PacienteTermino en lugar de icontains
+    """
+    def filter_queryset(self, request, queryset, view):
+        return BusquedaPacientes.filtrar(queryset, request.query_params.get(self.search_param, ''))
 
 class ListCreatePacienteView(generics.ListCreateAPIView):
     serializer_class = PacienteSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, BusquedaPacienteFilter, UltimaSesionOrderingFilter]
     pagination_class = StandardResultsSetPagination
-    
-    # Campos de búsqueda
-    search_fields = ['primer_nombre', 'primer_apellido', 'numero_documento']
-    
+
+    @property
+    def paginator(self):
+        # ?paginacion=cursor (o un ?cursor=) activa la paginación por cursor sobre la sesión más reciente
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('paginacion') == 'cursor' or 'cursor' in params:
+                self._paginator = UltimaSesionCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     # Campos de filtrado
     filterset_fields = ['estado', 'sexo', 'tipo_documento']
-    # Campos disponibles para ordenamiento
-    ordering_fields = ['primer_nombre', 'primer_apellido', 'edad', 'sesiones_triage__fecha_inicio', 'sesiones_triage__nivel_triage']
-    ordering = ['-sesiones_triage__fecha_inicio']  # Orden por defecto: más reciente primero
+    # Campos disponibles para ordenamiento (los de sesiones_triage se traducen a ultima_sesion_*)
+    ordering_fields = [
+        'primer_nombre', 'primer_apellido', 'edad', 'ultima_sesion_inicio', 'ultima_sesion_nivel',
+        'sesiones_triage__fecha_inicio', 'sesiones_triage__nivel_triage'
+    ]
+    ordering = ['-ultima_sesion_inicio']  # Orden por defecto: más reciente primero
 
     def get_queryset(self):
         # Usar select_related y prefetch_related para optimizar las consultas
@@ -37,18 +72,18 @@ class ListCreatePacienteView(generics.ListCreateAPIView):
             'contacto_emergencia'
         )
         
+        # Los filtros usan las columnas de la sesión más reciente: sin joins ni distinct()
         # Filtro personalizado para pacientes con triage completado
         triage_completado = self.request.query_params.get('triage_completado', None)
         if triage_completado and triage_completado.lower() == 'true':
-            queryset = queryset.filter(sesiones_triage__completado=True)
+            queryset = queryset.filter(ultima_sesion_completada=True)
         
         # Filtro por nivel ESI
         nivel_triage = self.request.query_params.get('nivel_triage', None)
         if nivel_triage:
-            queryset = queryset.filter(sesiones_triage__nivel_triage=nivel_triage)
+            queryset = queryset.filter(ultima_sesion_nivel=nivel_triage)
             
-        # Usar distinct() al final para evitar duplicados si hay joins
-        return queryset.distinct()
+        return queryset
 
     # # Si el metodo HTTP es GET, pedir permisos de administrador
     # def get_permissions(self):
@@ -151,3 +186,19 @@ class ExportarPacientesCsvView(generics.GenericAPIView):
                 'exito': False,
                 'mensaje': f'Error al generar CSV: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ColaEsperaView(generics.GenericAPIView):
+    """
+    Cola de la sala de espera ordenada por nivel ESI y hora de llegada.
+    Con ?since=<version> devuelve solo los cambios desde esa versión.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        cola = ColaEspera.obtener().leer(since=request.query_params.get('since'))
+        return Response({
+            'exito': True,
+            'mensaje': 'Cola de espera obtenida satisfactoriamente',
+            'data': cola
+        }, status=status.HTTP_200_OK)
@@ -1,5 +1,30 @@
 from django.contrib import admin
+from .models import ResumenDiarioTriage, DiaConsolidado
 
-# No registramos modelos específicos para reportes ya que 
-# trabajamos directamente con agregaciones de los modelos existentes
-# (Paciente y SesionTriage)
+# Las métricas se calculan desde Paciente y SesionTriage; el resumen diario
+# se mantiene automáticamente y se muestra solo para consulta
+
+# Configuración del admin para ResumenDiarioTriage
+@admin.register(ResumenDiarioTriage)
+class ResumenDiarioTriageAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'nivel_triage', 'turno', 'sexo', 'estado', 'rango_edad', 'pacientes', 'sesiones')
+    list_filter = ('nivel_triage', 'turno', 'sexo', 'estado')
+    date_hierarchy = 'fecha'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+# Configuración del admin para DiaConsolidado
+@admin.register(DiaConsolidado)
+class DiaConsolidadoAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'actualizado')
+    date_hierarchy = 'fecha'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
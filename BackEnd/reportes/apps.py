@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReportesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "reportes"
+
+    def ready(self):
+        # Mantener el resumen diario al cambiar pacientes y sesiones de días cerrados
+        from . import signals  # noqa: F401
@@ -0,0 +1,67 @@
+"""
+Reconstruye el resumen diario de triage de los días cerrados.
+
+Uso:
+    python manage.py reconstruir_resumen_diario [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD] [--dias 31] [--pendientes]
+
+Con --pendientes solo consolida los días que aún no tienen resumen o que quedaron pendientes
+tras un cambio en sus datos; pensado para ejecutarse periódicamente fuera de las peticiones.
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from pacientes.models import Paciente
+from reportes.services import ResumenDiarioService, ReporteCacheService
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f"Fecha inválida '{valor}', use el formato AAAA-MM-DD")
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen diario de triage para un rango de días cerrados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=_fecha, help='Primer día (por defecto, el del primer paciente registrado)')
+        parser.add_argument('--hasta', type=_fecha, help='Último día (por defecto, ayer)')
+        parser.add_argument('--dias', type=int, default=31, help='Días consolidados por pasada')
+        parser.add_argument('--pendientes', action='store_true', help='Consolidar solo los días pendientes')
+
+    def handle(self, *args, **options):
+        ayer = timezone.localdate() - timedelta(days=1)
+        hasta = min(options['hasta'] or ayer, ayer)
+
+        desde = options['desde']
+        if desde is None:
+            primer_registro = Paciente.objects.aggregate(primero=Min('creado'))['primero']
+            if primer_registro is None:
+                self.stdout.write('No hay pacientes registrados.')
+                return
+            desde = timezone.localdate(primer_registro)
+
+        if desde > hasta:
+            raise CommandError('El rango no contiene días cerrados')
+        if options['dias'] < 1:
+            raise CommandError('--dias debe ser mayor que cero')
+
+        consolidar = ResumenDiarioService.asegurar_consolidado if options['pendientes'] else ResumenDiarioService.consolidar
+
+        filas = 0
+        inicio = desde
+        while inicio <= hasta:
+            fin = min(inicio + timedelta(days=options['dias'] - 1), hasta)
+            filas += consolidar(inicio, fin)
+            inicio = fin + timedelta(days=1)
+
+        # Los reportes en caché pueden haberse calculado con el resumen anterior
+        ReporteCacheService.invalidar_historico()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Resumen diario reconstruido del {desde} al {hasta}: {filas} filas.'
+        ))
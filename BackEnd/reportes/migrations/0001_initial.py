@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaConsolidado',
+            fields=[
+                ('fecha', models.DateField(primary_key=True, serialize=False)),
+                ('actualizado', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Día consolidado',
+                'verbose_name_plural': 'Días consolidados',
+                'ordering': ['fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenDiarioTriage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('nivel_triage', models.IntegerField(blank=True, null=True)),
+                ('sexo', models.CharField(max_length=10)),
+                ('estado', models.CharField(max_length=20)),
+                ('rango_edad', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('pacientes', models.PositiveIntegerField(default=0)),
+                ('sesiones', models.PositiveIntegerField(default=0)),
+                ('sesiones_con_espera', models.PositiveIntegerField(default=0)),
+                ('espera_total_segundos', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Resumen diario de triage',
+                'verbose_name_plural': 'Resúmenes diarios de triage',
+                'ordering': ['fecha'],
+                'indexes': [models.Index(fields=['fecha'], name='resumen_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:26
+
+from django.db import migrations, models
+
+
+def descartar_resumen(apps, schema_editor):
+    """El resumen existente no tiene turno: se descarta y el dashboard lo reconstruye al consultarlo."""
+    apps.get_model('reportes', 'ResumenDiarioTriage').objects.all().delete()
+    apps.get_model('reportes', 'DiaConsolidado').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0001_initial'),
+        ('triage', '0004_sesiontriage_turno'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumendiariotriage',
+            name='turno',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.RunPython(descartar_resumen, migrations.RunPython.noop),
+    ]
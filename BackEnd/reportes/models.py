@@ -3,6 +3,55 @@ from django.utils import timezone
 from pacientes.models import Paciente
 from triage.models import SesionTriage
 
-# No necesitamos modelos adicionales por ahora
-# Todas las métricas se calcularán directamente desde Paciente y SesionTriage
-# usando agregaciones optimizadas de Django
+# Las métricas se calculan desde Paciente y SesionTriage usando agregaciones optimizadas de Django.
+# Para los días completos el dashboard suma además el resumen diario precalculado.
+
+
+class ResumenDiarioTriage(models.Model):
+    """
+    Resumen precalculado de los pacientes registrados en un día (fecha local de Paciente.creado),
+    agrupado por nivel ESI, turno, sexo, estado de atención y rango de edad al llegar.
+    Cada paciente se cuenta una vez, en el nivel ESI y turno de su sesión más reciente;
+    cada sesión se cuenta una vez en su propio nivel ESI y turno.
+    """
+    fecha = models.DateField()
+    nivel_triage = models.IntegerField(null=True, blank=True)
+    turno = models.CharField(max_length=10, blank=True)  # TURNO_CHOICES de la sesión
+    sexo = models.CharField(max_length=10)
+    estado = models.CharField(max_length=20)
+    # Índice en ReportesService.RANGOS_EDAD; None si la edad no cae en ningún rango
+    rango_edad = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    pacientes = models.PositiveIntegerField(default=0)
+    sesiones = models.PositiveIntegerField(default=0)
+    # Sesiones completadas con fecha de fin, y la suma de sus tiempos de espera
+    sesiones_con_espera = models.PositiveIntegerField(default=0)
+    espera_total_segundos = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name = 'Resumen diario de triage'
+        verbose_name_plural = 'Resúmenes diarios de triage'
+        ordering = ['fecha']
+        indexes = [
+            models.Index(fields=['fecha'], name='resumen_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} ESI {self.nivel_triage} {self.sexo} {self.estado}: {self.pacientes} pacientes"
+
+
+class DiaConsolidado(models.Model):
+    """
+    Marca los días cuyo resumen diario ya fue calculado, para distinguir
+    un día sin pacientes de un día pendiente de consolidar.
+    """
+    fecha = models.DateField(primary_key=True)
+    actualizado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Día consolidado'
+        verbose_name_plural = 'Días consolidados'
+        ordering = ['fecha']
+
+    def __str__(self):
+        return f"{self.fecha} (actualizado {self.actualizado})"
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from pacientes.models import Paciente
 from triage.models import SesionTriage
 import numpy as np
+from utils.choices import TURNO_CHOICES
 
 class ReportFiltersSerializer(serializers.Serializer):
     """
@@ -28,7 +29,7 @@ class ReportFiltersSerializer(serializers.Serializer):
         allow_empty=True
     )
     turnos = serializers.ListField(
-        child=serializers.CharField(),
+        child=serializers.ChoiceField(choices=TURNO_CHOICES),
         required=False,
         allow_empty=True
     )
@@ -85,6 +86,11 @@ class TiemposEsperaSerializer(serializers.Serializer):
     Serializer para métricas de tiempos de espera (solo por ESI)
     """
     por_esi = serializers.DictField(child=serializers.FloatField())
+    # Mediana, p90 y p95 en minutos por nivel ESI
+    percentiles_por_esi = serializers.DictField(
+        child=serializers.DictField(child=serializers.FloatField()),
+        required=False
+    )
 
 class EstadisticasEstadoSerializer(serializers.Serializer):
     """
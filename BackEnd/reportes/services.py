@@ -8,14 +8,22 @@ Servicios para cálculo de métricas y repor    NOMBRES_ESI = {
     }rsión corregida que funciona con datos reales del sistema
 """
 
-from django.db.models import Count, Avg, Max, Min, Q, F, Case, When, IntegerField, FloatField, QuerySet
-from django.db.models.functions import Extract
+import hashlib
+import json
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Avg, Max, Min, Sum, Q, F, Case, When, Value, IntegerField, FloatField, QuerySet, Exists, OuterRef, ExpressionWrapper, DurationField
+from django.db.models.functions import Extract, ExtractYear
 from django.utils import timezone
 from datetime import datetime, timedelta, time, date
 from pacientes.models import Paciente
 from triage.models import SesionTriage
+from .models import ResumenDiarioTriage, DiaConsolidado
+from utils.choices import SEX_CHOICES, ESTADO_ATENCION_CHOICES
 import numpy as np
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Callable
 
 class ReportesService:
     """
@@ -52,27 +60,98 @@ class ReportesService:
         5: "ESI 5"
     }
     
-    def __init__(self, fecha_inicio: date, fecha_fin: date, filtros: Dict = None):
+    NOMBRES_GENERO = {
+        'M': 'Masculino',
+        'F': 'Femenino',
+        'NA': 'No Aplica'
+    }
+    
+    # Mapeo de nombres de estados (usando los estados reales del modelo)
+    NOMBRES_ESTADO = {
+        'EN_ESPERA': 'En Espera',
+        'EN_ATENCION': 'En Atención',
+        'ATENDIDO': 'Atendido',
+        'ABANDONO': 'Abandono'
+    }
+    
+    def __init__(self, fecha_inicio: date, fecha_fin: date, filtros: Dict = None, usar_resumen: bool = True):
         """
         Inicializa el servicio con el rango de fechas y filtros opcionales
+        Con usar_resumen los días completos se leen del resumen diario precalculado
         """
         self.fecha_inicio = fecha_inicio
         self.fecha_fin = fecha_fin
         self.filtros = filtros or {}
+        self.usar_resumen = usar_resumen
         
         # Convertir fechas a datetime timezone-aware para las consultas
         self.datetime_inicio = timezone.make_aware(datetime.combine(fecha_inicio, time.min))
         self.datetime_fin = timezone.make_aware(datetime.combine(fecha_fin, time(23, 59, 59)))
+        
+        # Resultados de las consultas agregadas, calculados una sola vez por reporte
+        self._agregados_pacientes = None
+        self._agregados_esi = None
+        self._agregados_resumen = None
+        self._servicio_dia_actual = None
+    
+    def usa_resumen(self) -> bool:
+        """
+        Indica si el periodo incluye días completos que pueden leerse del resumen diario
+        Los filtros por edad admiten cualquier rango de años, no solo los RANGOS_EDAD del resumen,
+        y requieren las tablas base
+        """
+        return (
+            self.usar_resumen
+            and self.fecha_inicio < timezone.localdate()
+            and self.filtros.get('rango_edad_min') is None
+            and self.filtros.get('rango_edad_max') is None
+        )
+    
+    def obtener_agregados_resumen(self) -> Dict:
+        """
+        Suma el resumen diario de los días completos del periodo (hasta ayer)
+        """
+        if self._agregados_resumen is None:
+            ultimo_dia_completo = min(self.fecha_fin, timezone.localdate() - timedelta(days=1))
+            ResumenDiarioService.asegurar_consolidado(self.fecha_inicio, ultimo_dia_completo)
+            self._agregados_resumen = ResumenDiarioService.agregar(self.fecha_inicio, ultimo_dia_completo, self.filtros)
+        return self._agregados_resumen
+    
+    def obtener_servicio_dia_actual(self):
+        """
+        Servicio sobre las tablas base para la parte del periodo que empieza hoy, o None si el periodo terminó antes
+        """
+        hoy = timezone.localdate()
+        if self._servicio_dia_actual is None and self.fecha_fin >= hoy:
+            self._servicio_dia_actual = ReportesService(max(self.fecha_inicio, hoy), self.fecha_fin, self.filtros, usar_resumen=False)
+        return self._servicio_dia_actual
+    
+    def _sumar_dia_actual(self, agregados: Dict, metodo: str) -> Dict:
+        """
+        Suma a los agregados del resumen los calculados sobre las tablas base para el día actual
+        """
+        servicio = self.obtener_servicio_dia_actual()
+        if servicio is None:
+            return dict(agregados)
+        agregados_dia = getattr(servicio, metodo)()
+        return {clave: valor + agregados_dia[clave] for clave, valor in agregados.items()}
     
     def get_queryset_base(self) -> 'QuerySet':
         """
         Genera el queryset base filtrado por fechas y criterios adicionales
         Solo incluye pacientes que completaron el triage
         """
+        # Exists en lugar de un join con distinct(): cada paciente aparece una sola vez
+        sesiones = SesionTriage.objects.filter(paciente=OuterRef('pk'))
+        
         queryset = Paciente.objects.filter(
-            creado__range=(self.datetime_inicio, self.datetime_fin),
-            sesiones_triage__isnull=False  # Solo pacientes que completaron triage
-        ).select_related().distinct()
+            Exists(sesiones),  # Solo pacientes que completaron triage
+            creado__range=(self.datetime_inicio, self.datetime_fin)
+        ).alias(edad_llegada=self.edad_al_llegar())
+        
+        # Cada paciente pertenece al turno de su sesión más reciente, como en el resumen diario
+        if self.filtros.get('turnos'):
+            queryset = queryset.filter(ultima_sesion_turno__in=self.filtros['turnos'])
         
         # Aplicar filtros adicionales
         if self.filtros.get('estados'):
@@ -81,16 +160,12 @@ class ReportesService:
         if self.filtros.get('generos'):
             queryset = queryset.filter(sexo__in=self.filtros['generos'])
             
-        # Filtro por rango de edad
+        # Filtro por rango de edad al llegar
         if self.filtros.get('rango_edad_min') is not None:
-            edad_min = self.filtros['rango_edad_min']
-            fecha_max_nacimiento = date.today() - timedelta(days=edad_min * 365.25)
-            queryset = queryset.filter(fecha_nacimiento__lte=fecha_max_nacimiento)
+            queryset = queryset.filter(edad_llegada__gte=self.filtros['rango_edad_min'])
             
         if self.filtros.get('rango_edad_max') is not None:
-            edad_max = self.filtros['rango_edad_max']
-            fecha_min_nacimiento = date.today() - timedelta(days=(edad_max + 1) * 365.25)
-            queryset = queryset.filter(fecha_nacimiento__gte=fecha_min_nacimiento)
+            queryset = queryset.filter(edad_llegada__lte=self.filtros['rango_edad_max'])
         
         return queryset
     
@@ -105,35 +180,93 @@ class ReportesService:
         # Aplicar filtros de ESI si están especificados
         if self.filtros.get('niveles_esi'):
             queryset = queryset.filter(nivel_triage__in=self.filtros['niveles_esi'])
+        
+        # Filtro por turno de inicio de la sesión (columna indexada)
+        if self.filtros.get('turnos'):
+            queryset = queryset.filter(turno__in=self.filtros['turnos'])
             
         return queryset
     
+    @staticmethod
+    def edad_al_llegar():
+        """
+        Expresión con la edad en años cumplidos del paciente el día local de su llegada (creado),
+        la misma que ResumenDiarioService.calcular_rango_edad aplica al consolidar el resumen
+        """
+        cumple_despues = Q(creado__month__lt=F('fecha_nacimiento__month')) | Q(
+            creado__month=F('fecha_nacimiento__month'), creado__day__lt=F('fecha_nacimiento__day')
+        )
+        return ExtractYear('creado') - ExtractYear('fecha_nacimiento') - Case(
+            When(cumple_despues, then=Value(1)), default=Value(0), output_field=IntegerField()
+        )
+    
+    def _filtro_rango_edad(self, edad_min: int, edad_max: int) -> Q:
+        """
+        Condición sobre la edad al llegar (alias edad_llegada de get_queryset_base)
+        La edad se acota en 0 como en el resumen: el primer rango no tiene mínimo
+        """
+        filtro = Q(edad_llegada__lte=edad_max)
+        if edad_min > 0:
+            filtro &= Q(edad_llegada__gte=edad_min)
+        return filtro
+    
+    def calcular_agregados_pacientes(self) -> Dict:
+        """
+        Calcula en una sola consulta de agregación condicional el total de pacientes
+        y sus conteos por género, estado de atención y rango de edad
+        """
+        if self._agregados_pacientes is None and self.usa_resumen():
+            self._agregados_pacientes = self._sumar_dia_actual(self.obtener_agregados_resumen()['pacientes'], 'calcular_agregados_pacientes')
+        
+        if self._agregados_pacientes is None:
+            agregaciones = {'total': Count('id')}
+            for codigo, _ in SEX_CHOICES:
+                agregaciones[f'sexo_{codigo}'] = Count('id', filter=Q(sexo=codigo))
+            for codigo, _ in ESTADO_ATENCION_CHOICES:
+                agregaciones[f'estado_{codigo}'] = Count('id', filter=Q(estado=codigo))
+            for indice, (edad_min, edad_max, _) in enumerate(self.RANGOS_EDAD):
+                agregaciones[f'edad_{indice}'] = Count('id', filter=self._filtro_rango_edad(edad_min, edad_max))
+            
+            self._agregados_pacientes = self.get_queryset_base().aggregate(**agregaciones)
+        return self._agregados_pacientes
+    
+    def calcular_agregados_esi(self) -> Dict:
+        """
+        Calcula en una sola consulta el total de sesiones y su conteo por nivel ESI
+        """
+        if self._agregados_esi is None and self.usa_resumen():
+            self._agregados_esi = self._sumar_dia_actual(self.obtener_agregados_resumen()['esi'], 'calcular_agregados_esi')
+        
+        if self._agregados_esi is None:
+            agregaciones = {'total': Count('id')}
+            for nivel in self.NOMBRES_ESI:
+                agregaciones[f'esi_{nivel}'] = Count('id', filter=Q(nivel_triage=nivel))
+            
+            self._agregados_esi = self.get_queryset_sesiones().aggregate(**agregaciones)
+        return self._agregados_esi
+    
     def calcular_distribucion_esi(self) -> List[Dict]:
         """
         Calcula la distribución de pacientes por nivel ESI
         """
         try:
-            sesiones = self.get_queryset_sesiones()
-            
-            # Contar por nivel ESI
-            distribucion = sesiones.values('nivel_triage').annotate(
-                cantidad=Count('id')
-            ).order_by('nivel_triage')
+            agregados = self.calcular_agregados_esi()
             
-            # Calcular total para percentajes
-            total = sum(item['cantidad'] for item in distribucion)
+            # El total incluye las sesiones sin nivel asignado, igual que el porcentaje mostrado
+            total = agregados['total']
             
             # Convertir a formato esperado por el serializer
             resultado = []
-            for item in distribucion:
-                if item['nivel_triage'] is not None:
-                    porcentaje = (item['cantidad'] / total * 100) if total > 0 else 0
+            for nivel in sorted(self.NOMBRES_ESI):
+                cantidad = agregados[f'esi_{nivel}']
+                if cantidad > 0:
+                    porcentaje = (cantidad / total * 100) if total > 0 else 0
                     resultado.append({
-                        'nivel_esi': item['nivel_triage'],
-                        'cantidad': item['cantidad'],
+                        'nivel_esi': nivel,
+                        'cantidad': cantidad,
                         'porcentaje': round(porcentaje, 2),
-                        'color': self.COLORES_ESI.get(item['nivel_triage'], "#6B7280"),
-                        'nombre_nivel': self.NOMBRES_ESI.get(item['nivel_triage'], f"ESI {item['nivel_triage']}")
+                        'color': self.COLORES_ESI.get(nivel, "#6B7280"),
+                        'nombre_nivel': self.NOMBRES_ESI.get(nivel, f"ESI {nivel}")
                     })
             
             return resultado
@@ -147,31 +280,19 @@ class ReportesService:
         Calcula la distribución de pacientes por género
         """
         try:
-            pacientes = self.get_queryset_base()
-            
-            distribucion = pacientes.values('sexo').annotate(
-                cantidad=Count('id')
-            ).order_by('sexo')
-            
-            # Calcular total para percentajes
-            total = sum(item['cantidad'] for item in distribucion)
-            
-            # Mapeo de nombres de géneros
-            nombres_genero = {
-                'M': 'Masculino',
-                'F': 'Femenino',
-                'NA': 'No Aplica'
-            }
+            agregados = self.calcular_agregados_pacientes()
+            total = agregados['total']
             
             resultado = []
-            for item in distribucion:
-                if item['sexo']:
-                    porcentaje = (item['cantidad'] / total * 100) if total > 0 else 0
+            for codigo in sorted(codigo for codigo, _ in SEX_CHOICES):
+                cantidad = agregados[f'sexo_{codigo}']
+                if cantidad > 0:
+                    porcentaje = (cantidad / total * 100) if total > 0 else 0
                     resultado.append({
-                        'genero': item['sexo'],
-                        'cantidad': item['cantidad'],
+                        'genero': codigo,
+                        'cantidad': cantidad,
                         'porcentaje': round(porcentaje, 2),
-                        'nombre_genero': nombres_genero.get(item['sexo'], item['sexo'])
+                        'nombre_genero': self.NOMBRES_GENERO.get(codigo, codigo)
                     })
             
             return resultado
@@ -202,19 +323,12 @@ class ReportesService:
         Calcula la distribución de pacientes por rangos de edad
         """
         try:
-            pacientes = self.get_queryset_base()
-            total_pacientes = pacientes.count()
+            agregados = self.calcular_agregados_pacientes()
+            total_pacientes = agregados['total']
             resultado = []
             
-            for edad_min, edad_max, etiqueta in self.RANGOS_EDAD:
-                # Filtrar pacientes en este rango de edad
-                fecha_max = date.today() - timedelta(days=edad_min * 365.25)
-                fecha_min = date.today() - timedelta(days=(edad_max + 1) * 365.25)
-                
-                cantidad = pacientes.filter(
-                    fecha_nacimiento__lte=fecha_max,
-                    fecha_nacimiento__gte=fecha_min
-                ).count()
+            for indice, (edad_min, edad_max, etiqueta) in enumerate(self.RANGOS_EDAD):
+                cantidad = agregados[f'edad_{indice}']
                 
                 if cantidad > 0:
                     porcentaje = (cantidad / total_pacientes * 100) if total_pacientes > 0 else 0
@@ -232,75 +346,122 @@ class ReportesService:
             print(f"Error en calcular_distribucion_edad: {e}")
             return []
     
+    # Percentiles de tiempo de espera reportados por nivel ESI
+    PERCENTILES_ESPERA = {
+        'mediana': 50,
+        'p90': 90,
+        'p95': 95
+    }
+    
+    def get_queryset_sesiones_espera(self) -> 'QuerySet':
+        """
+        Sesiones completadas con fechas válidas y nivel ESI asignado, sin abandonos,
+        anotadas con su duración
+        """
+        return self.get_queryset_sesiones().filter(
+            fecha_fin__isnull=False,
+            completado=True,
+            paciente__estado__isnull=False,
+            nivel_triage__in=list(self.NOMBRES_ESI)
+        ).exclude(
+            paciente__estado='ABANDONO'  # Excluir pacientes con estado ABANDONO
+        ).annotate(
+            duracion=ExpressionWrapper(F('fecha_fin') - F('fecha_inicio'), output_field=DurationField())
+        ).order_by()
+    
+    def calcular_sumas_espera(self) -> Dict:
+        """
+        Suma de segundos de espera y número de sesiones por nivel ESI
+        (claves espera_segundos_{nivel} y espera_cantidad_{nivel}), agregadas en la base de datos
+        """
+        if self.usa_resumen():
+            return self._sumar_dia_actual(self.obtener_agregados_resumen()['espera'], 'calcular_sumas_espera')
+        
+        sumas = {}
+        for nivel in self.NOMBRES_ESI:
+            sumas[f'espera_segundos_{nivel}'] = 0.0
+            sumas[f'espera_cantidad_{nivel}'] = 0
+        
+        totales = self.get_queryset_sesiones_espera().values('nivel_triage').annotate(
+            total=Sum('duracion'),
+            cantidad=Count('id')
+        )
+        for item in totales:
+            if item['total'] is not None:
+                sumas[f"espera_segundos_{item['nivel_triage']}"] = item['total'].total_seconds()
+                sumas[f"espera_cantidad_{item['nivel_triage']}"] = item['cantidad']
+        return sumas
+    
     def calcular_tiempos_espera(self) -> Dict:
         """
         Calcula métricas de tiempo de espera basándose en fecha_inicio y fecha_fin
         Solo incluye pacientes que completaron triage y NO fueron marcados como abandono
+        El promedio por ESI se obtiene de sumas agregadas (del resumen diario para los días
+        completos); la mediana y los percentiles 90 y 95 se calculan con NumPy sobre la
+        columna de duraciones de todo el periodo
         """
         try:
-            # Filtrar sesiones completadas con fechas válidas y excluir abandonos
-            sesiones = self.get_queryset_sesiones().filter(
-                fecha_fin__isnull=False,
-                completado=True,
-                paciente__estado__isnull=False
-            ).exclude(
-                paciente__estado='ABANDONO'  # Excluir pacientes con estado ABANDONO
-            )
+            sumas = self.calcular_sumas_espera()
             
             # Calcular solo por ESI (único campo usado por frontend)
-            por_esi = {}
-            for nivel in range(1, 6):
-                sesiones_esi = sesiones.filter(nivel_triage=nivel)
-                tiempos_esi = []
-                for sesion in sesiones_esi:
-                    if sesion.fecha_fin and sesion.fecha_inicio:
-                        diferencia = sesion.fecha_fin - sesion.fecha_inicio
-                        minutos = diferencia.total_seconds() / 60
-                        tiempos_esi.append(minutos)
-                
-                if tiempos_esi:
-                    por_esi[nivel] = sum(tiempos_esi) / len(tiempos_esi)
+            por_esi = {
+                nivel: sumas[f'espera_segundos_{nivel}'] / sumas[f'espera_cantidad_{nivel}'] / 60
+                for nivel in self.NOMBRES_ESI
+                if sumas[f'espera_cantidad_{nivel}'] > 0
+            }
             
             return {
-                'por_esi': {str(k): round(v, 2) for k, v in por_esi.items()}
+                'por_esi': {str(k): round(v, 2) for k, v in sorted(por_esi.items())},
+                'percentiles_por_esi': self._calcular_percentiles_espera(self.get_queryset_sesiones_espera())
             }
             
         except Exception as e:
             print(f"Error en calcular_tiempos_espera: {e}")
             return {
-                'por_esi': {}
+                'por_esi': {},
+                'percentiles_por_esi': {}
             }
     
+    def _calcular_percentiles_espera(self, sesiones: 'QuerySet') -> Dict:
+        """
+        Mediana y percentiles del tiempo de espera (minutos) por nivel ESI,
+        leyendo solo las columnas de nivel y duración
+        """
+        filas = list(sesiones.values_list('nivel_triage', 'duracion'))
+        if not filas:
+            return {}
+        
+        niveles = np.fromiter((nivel for nivel, _ in filas), dtype=np.int64, count=len(filas))
+        minutos = np.fromiter((duracion.total_seconds() for _, duracion in filas), dtype=np.float64, count=len(filas)) / 60
+        
+        nombres = list(self.PERCENTILES_ESPERA)
+        resultado = {}
+        for nivel in np.unique(niveles):
+            valores = np.percentile(minutos[niveles == nivel], list(self.PERCENTILES_ESPERA.values()))
+            resultado[str(int(nivel))] = {
+                nombre: round(float(valor), 2) for nombre, valor in zip(nombres, valores)
+            }
+        return resultado
+    
     def calcular_estadisticas_estado(self) -> List[Dict]:
         """
         Calcula estadísticas por estado de atención
         """
         try:
-            pacientes = self.get_queryset_base()
-            total_pacientes = pacientes.count()
-            
-            distribucion = pacientes.values('estado').annotate(
-                cantidad=Count('id')
-            ).order_by('estado')
-            
-            # Mapeo de nombres de estados (usando los estados reales del modelo)
-            nombres_estado = {
-                'EN_ESPERA': 'En Espera',
-                'EN_ATENCION': 'En Atención',
-                'ATENDIDO': 'Atendido',
-                'ABANDONO': 'Abandono'
-            }
+            agregados = self.calcular_agregados_pacientes()
+            total_pacientes = agregados['total']
             
             resultado = []
-            for item in distribucion:
-                if item['estado']:
-                    porcentaje = (item['cantidad'] / total_pacientes * 100) if total_pacientes > 0 else 0
+            for codigo in sorted(codigo for codigo, _ in ESTADO_ATENCION_CHOICES):
+                cantidad = agregados[f'estado_{codigo}']
+                if cantidad > 0:
+                    porcentaje = (cantidad / total_pacientes * 100) if total_pacientes > 0 else 0
                     resultado.append({
-                        'estado': item['estado'],
-                        'cantidad': item['cantidad'],
+                        'estado': codigo,
+                        'cantidad': cantidad,
                         'porcentaje': round(porcentaje, 2),
                         'tiempo_promedio_permanencia': 0.0,  # TODO: Implementar cálculo real
-                        'nombre_estado': nombres_estado.get(item['estado'], item['estado'])
+                        'nombre_estado': self.NOMBRES_ESTADO.get(codigo, codigo)
                     })
             
             return resultado
@@ -316,7 +477,7 @@ class ReportesService:
         Genera el reporte completo con las métricas usadas por frontend
         """
         try:
-            total_pacientes = self.get_queryset_base().count()
+            total_pacientes = self.calcular_agregados_pacientes()['total']
             tiempos_espera_data = self.calcular_tiempos_espera()
             
             return {
@@ -351,4 +512,279 @@ class ReportesService:
             
         except Exception as e:
             print(f"Error en generar_reporte_completo_avanzado: {e}")
-            raise Exception(f"Error al generar reporte avanzado: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error al generar reporte avanzado: {str(e)}")
+
+class ResumenDiarioService:
+    """
+    Mantiene y consulta el resumen diario precalculado (ResumenDiarioTriage)
+    Cada día se recalcula completo a partir de sus pacientes y sesiones, por lo que
+    consolidar un día es idempotente
+    """
+    
+    TAMANO_LOTE = 500
+    
+    @staticmethod
+    def limites_dia(desde: date, hasta: date) -> Tuple[datetime, datetime]:
+        """
+        Instantes [inicio, fin) que cubren los días locales de desde a hasta
+        """
+        inicio = timezone.make_aware(datetime.combine(desde, time.min))
+        fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+        return inicio, fin
+    
+    @staticmethod
+    def calcular_rango_edad(fecha_nacimiento: date, fecha: date):
+        """
+        Índice en ReportesService.RANGOS_EDAD de la edad del paciente en la fecha dada
+        """
+        if not fecha_nacimiento:
+            return None
+        
+        edad = fecha.year - fecha_nacimiento.year
+        if (fecha.month, fecha.day) < (fecha_nacimiento.month, fecha_nacimiento.day):
+            edad -= 1
+        edad = max(0, edad)
+        
+        for indice, (edad_min, edad_max, _) in enumerate(ReportesService.RANGOS_EDAD):
+            if edad_min <= edad <= edad_max:
+                return indice
+        return None
+    
+    @classmethod
+    def consolidar(cls, desde: date, hasta: date = None) -> int:
+        """
+        Recalcula el resumen de los días de desde a hasta y los marca como consolidados
+        Devuelve el número de filas de resumen generadas
+        """
+        hasta = hasta or desde
+        inicio, fin = cls.limites_dia(desde, hasta)
+        
+        # Medidas por fila: [pacientes, sesiones, sesiones_con_espera, espera_total_segundos]
+        filas = defaultdict(lambda: [0, 0, 0, 0.0])
+        
+        # Datos del paciente: (día de llegada, sexo, estado, rango de edad al llegar)
+        # Cada paciente se cuenta en el nivel y turno de su sesión más reciente (Paciente.ultima_sesion_*),
+        # la misma regla que aplica ReportesService sobre las tablas base
+        pacientes = {}
+        for paciente_id, creado, sexo, estado, fecha_nacimiento, ultima_sesion, nivel, turno in Paciente.objects.filter(
+            creado__gte=inicio, creado__lt=fin
+        ).order_by().values_list(
+            'id', 'creado', 'sexo', 'estado', 'fecha_nacimiento',
+            'ultima_sesion_id', 'ultima_sesion_nivel', 'ultima_sesion_turno'
+        ):
+            fecha = timezone.localdate(creado)
+            rango_edad = cls.calcular_rango_edad(fecha_nacimiento, fecha)
+            pacientes[paciente_id] = (fecha, sexo, estado, rango_edad)
+            if ultima_sesion is not None:
+                filas[(fecha, nivel, turno or '', sexo, estado, rango_edad)][0] += 1
+        
+        sesiones = SesionTriage.objects.filter(
+            paciente__creado__gte=inicio, paciente__creado__lt=fin
+        ).order_by().values_list('paciente_id', 'nivel_triage', 'turno', 'completado', 'fecha_inicio', 'fecha_fin')
+        
+        for paciente_id, nivel, turno, completado, fecha_inicio, fecha_fin in sesiones:
+            datos = pacientes.get(paciente_id)
+            if datos is None:
+                continue
+            fecha, sexo, estado, rango_edad = datos
+            
+            medidas = filas[(fecha, nivel, turno, sexo, estado, rango_edad)]
+            medidas[1] += 1
+            if completado and fecha_fin is not None and nivel in ReportesService.NOMBRES_ESI:
+                medidas[2] += 1
+                medidas[3] += (fecha_fin - fecha_inicio).total_seconds()
+        
+        resumen = [
+            ResumenDiarioTriage(
+                fecha=fecha, nivel_triage=nivel, turno=turno, sexo=sexo, estado=estado, rango_edad=rango_edad,
+                pacientes=medidas[0], sesiones=medidas[1],
+                sesiones_con_espera=medidas[2], espera_total_segundos=medidas[3]
+            )
+            for (fecha, nivel, turno, sexo, estado, rango_edad), medidas in filas.items()
+        ]
+        
+        ahora = timezone.now()
+        dias = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+        
+        with transaction.atomic():
+            ResumenDiarioTriage.objects.filter(fecha__range=(desde, hasta)).delete()
+            ResumenDiarioTriage.objects.bulk_create(resumen, batch_size=cls.TAMANO_LOTE)
+            DiaConsolidado.objects.bulk_create(
+                [DiaConsolidado(fecha=dia, actualizado=ahora) for dia in dias],
+                batch_size=cls.TAMANO_LOTE,
+                update_conflicts=True,
+                unique_fields=['fecha'],
+                update_fields=['actualizado']
+            )
+        
+        return len(resumen)
+    
+    @classmethod
+    def marcar_pendientes(cls, fechas) -> int:
+        """
+        Quita la marca de consolidado de los días dados para que se recalculen en la
+        siguiente lectura; el resumen anterior se conserva hasta entonces
+        """
+        return DiaConsolidado.objects.filter(fecha__in=list(fechas)).delete()[0]
+    
+    @classmethod
+    def asegurar_consolidado(cls, desde: date, hasta: date) -> int:
+        """
+        Consolida los días del rango que aún no tienen resumen, una pasada por cada
+        tramo de días pendientes consecutivos
+        Devuelve el número de filas de resumen generadas
+        """
+        if hasta < desde:
+            return 0
+        
+        consolidados = set(DiaConsolidado.objects.filter(fecha__range=(desde, hasta)).values_list('fecha', flat=True))
+        pendientes = [
+            dia for dia in (desde + timedelta(days=i) for i in range((hasta - desde).days + 1))
+            if dia not in consolidados
+        ]
+        
+        filas = 0
+        inicio = anterior = None
+        for dia in pendientes:
+            if anterior is not None and dia != anterior + timedelta(days=1):
+                filas += cls.consolidar(inicio, anterior)
+                inicio = None
+            inicio = inicio or dia
+            anterior = dia
+        if inicio is not None:
+            filas += cls.consolidar(inicio, anterior)
+        return filas
+    
+    @classmethod
+    def agregar(cls, desde: date, hasta: date, filtros: Dict) -> Dict:
+        """
+        Suma en una sola consulta las filas del resumen del rango con los mismos filtros
+        que ReportesService aplica sobre pacientes y sesiones
+        Devuelve los agregados de 'pacientes', 'esi' y 'espera' con las claves del servicio
+        """
+        filtro_pacientes = Q()
+        if filtros.get('estados'):
+            filtro_pacientes &= Q(estado__in=filtros['estados'])
+        if filtros.get('generos'):
+            filtro_pacientes &= Q(sexo__in=filtros['generos'])
+        
+        filtro_sesiones = Q()
+        if filtros.get('niveles_esi'):
+            filtro_sesiones &= Q(nivel_triage__in=filtros['niveles_esi'])
+        if filtros.get('turnos'):
+            filtro_pacientes &= Q(turno__in=filtros['turnos'])
+            filtro_sesiones &= Q(turno__in=filtros['turnos'])
+        filtro_espera = filtro_sesiones & ~Q(estado='ABANDONO')
+        
+        agregaciones = {}
+        claves = {}
+        
+        def sumar(grupo, nombre, campo, filtro):
+            alias = f'{grupo}_{nombre}'
+            agregaciones[alias] = Sum(campo, filter=filtro or None)
+            claves[alias] = (grupo, nombre)
+        
+        sumar('pacientes', 'total', 'pacientes', filtro_pacientes)
+        for codigo, _ in SEX_CHOICES:
+            sumar('pacientes', f'sexo_{codigo}', 'pacientes', filtro_pacientes & Q(sexo=codigo))
+        for codigo, _ in ESTADO_ATENCION_CHOICES:
+            sumar('pacientes', f'estado_{codigo}', 'pacientes', filtro_pacientes & Q(estado=codigo))
+        for indice in range(len(ReportesService.RANGOS_EDAD)):
+            sumar('pacientes', f'edad_{indice}', 'pacientes', filtro_pacientes & Q(rango_edad=indice))
+        
+        sumar('esi', 'total', 'sesiones', filtro_sesiones)
+        for nivel in ReportesService.NOMBRES_ESI:
+            sumar('esi', f'esi_{nivel}', 'sesiones', filtro_sesiones & Q(nivel_triage=nivel))
+            sumar('espera', f'espera_segundos_{nivel}', 'espera_total_segundos', filtro_espera & Q(nivel_triage=nivel))
+            sumar('espera', f'espera_cantidad_{nivel}', 'sesiones_con_espera', filtro_espera & Q(nivel_triage=nivel))
+        
+        valores = ResumenDiarioTriage.objects.filter(fecha__range=(desde, hasta)).aggregate(**agregaciones)
+        
+        resultado = {'pacientes': {}, 'esi': {}, 'espera': {}}
+        for alias, valor in valores.items():
+            grupo, nombre = claves[alias]
+            resultado[grupo][nombre] = valor or 0
+        return resultado
+
+
+
+class ReporteCacheService:
+    """
+    Caché de los reportes del dashboard en el backend configurado en CACHES
+    La clave combina un hash canónico de los filtros validados, el rol del usuario y la
+    generación de los datos: los periodos cerrados se guardan con vigencia larga y los que
+    incluyen el día actual con vigencia corta, y ambos se invalidan al cambiar sus datos
+    """
+    
+    PREFIJO = 'reportes:dashboard'
+    GENERACION_DIA_ACTUAL = 'reportes:generacion:dia_actual'
+    GENERACION_HISTORICA = 'reportes:generacion:historica'
+    
+    @staticmethod
+    def normalizar_filtros(filtros: Dict) -> str:
+        """
+        Representación canónica de los filtros: sin valores vacíos, listas ordenadas y sin duplicados
+        """
+        canonicos = {}
+        for nombre, valor in filtros.items():
+            if valor is None or valor == []:
+                continue
+            if isinstance(valor, (list, tuple, set)):
+                valor = sorted(set(valor), key=str)
+            elif isinstance(valor, date):
+                valor = valor.isoformat()
+            canonicos[nombre] = valor
+        return json.dumps(canonicos, sort_keys=True, ensure_ascii=False, default=str)
+    
+    @staticmethod
+    def incluye_dia_actual(filtros: Dict) -> bool:
+        return filtros['fecha_fin'] >= timezone.localdate()
+    
+    @classmethod
+    def clave(cls, filtros: Dict, rol: str) -> str:
+        """
+        Clave de caché del reporte para los filtros y el rol dados, en la generación actual de los datos
+        """
+        generaciones = cache.get_many([cls.GENERACION_HISTORICA, cls.GENERACION_DIA_ACTUAL])
+        partes = [cls.normalizar_filtros(filtros), rol or '', str(generaciones.get(cls.GENERACION_HISTORICA, 0))]
+        if cls.incluye_dia_actual(filtros):
+            partes.append(str(generaciones.get(cls.GENERACION_DIA_ACTUAL, 0)))
+        
+        resumen = hashlib.sha256('|'.join(partes).encode('utf-8')).hexdigest()
+        return f'{cls.PREFIJO}:{resumen}'
+    
+    @classmethod
+    def obtener_o_calcular(cls, filtros: Dict, rol: str, calcular: Callable[[], Dict]) -> Dict:
+        """
+        Devuelve el reporte en caché o lo calcula con calcular() y lo guarda
+        """
+        clave = cls.clave(filtros, rol)
+        reporte = cache.get(clave)
+        if reporte is None:
+            reporte = calcular()
+            vigencia = (
+                settings.REPORTES_CACHE_TTL_DIA_ACTUAL
+                if cls.incluye_dia_actual(filtros)
+                else settings.REPORTES_CACHE_TTL_HISTORICO
+            )
+            cache.set(clave, reporte, vigencia)
+        return reporte
+    
+    @staticmethod
+    def _avanzar_generacion(clave: str):
+        # add solo crea la clave si no existe; incr es atómico en los backends que lo soportan
+        if not cache.add(clave, 1, None):
+            try:
+                cache.incr(clave)
+            except ValueError:
+                cache.set(clave, 1, None)
+    
+    @classmethod
+    def invalidar_dia_actual(cls):
+        """Invalida los reportes que incluyen el día actual."""
+        cls._avanzar_generacion(cls.GENERACION_DIA_ACTUAL)
+    
+    @classmethod
+    def invalidar_historico(cls):
+        """Invalida todos los reportes, incluidos los de periodos cerrados."""
+        cls._avanzar_generacion(cls.GENERACION_HISTORICA)
@@ -0,0 +1,98 @@
+"""
+Mantenimiento del resumen diario a partir de los cambios en pacientes y sesiones.
+
+Cuando cambia un dato que entra en el resumen de un día ya cerrado, al confirmar la
+transacción ese día deja de estar consolidado: el recálculo no ocurre en la petición que
+escribe, sino en la siguiente lectura del dashboard (ResumenDiarioService.asegurar_consolidado)
+o con reconstruir_resumen_diario --pendientes. Los días afectados se acumulan por transacción,
+de modo que muchas escrituras sobre el mismo día cuestan una sola marca. El dashboard lee el
+día en curso directamente de las tablas base, por lo que sus cambios solo invalidan los
+reportes en caché que lo incluyen.
+"""
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from pacientes.models import Paciente
+from triage.models import SesionTriage
+
+# Campos que modifican las filas del resumen
+CAMPOS_PACIENTE = {'estado', 'sexo', 'fecha_nacimiento', 'creado'}
+CAMPOS_SESION = {'completado', 'nivel_triage', 'fecha_inicio', 'fecha_fin', 'paciente'}
+
+
+def _afecta_resumen(update_fields, campos):
+    return update_fields is None or bool(campos.intersection(update_fields))
+
+
+# Días afectados por las escrituras del hilo, pendientes de aplicar al confirmar la transacción
+_pendientes = threading.local()
+
+
+def _aplicar_pendientes():
+    """
+    Aplica de una vez los cambios acumulados: marca como pendientes de consolidar los días
+    cerrados afectados e invalida los reportes en caché que los incluyen.
+    """
+    from .services import ResumenDiarioService, ReporteCacheService  # Import local para evitar circular
+
+    dias = getattr(_pendientes, 'dias', None)
+    if not dias:
+        return
+    _pendientes.dias = set()
+
+    hoy = timezone.localdate()
+    cerrados = {dia for dia in dias if dia < hoy}
+    if cerrados:
+        ResumenDiarioService.marcar_pendientes(cerrados)
+        ReporteCacheService.invalidar_historico()
+    else:
+        ReporteCacheService.invalidar_dia_actual()
+
+
+def _programar_consolidacion(creado):
+    """
+    Registra el día de llegada del paciente; al confirmar la transacción los días cerrados
+    quedan pendientes de consolidar y se invalidan los reportes en caché afectados.
+    """
+    if creado is None:
+        return
+    dias = getattr(_pendientes, 'dias', None)
+    if dias is None:
+        dias = _pendientes.dias = set()
+    dias.add(timezone.localdate(creado))
+    # Cada escritura registra su callback; el primero que se ejecuta aplica todos los días
+    transaction.on_commit(_aplicar_pendientes)
+
+
+def _creado_paciente(sesion):
+    """Fecha de registro del paciente de la sesión, sin consulta si el paciente ya está cargado."""
+    if SesionTriage.paciente.is_cached(sesion):
+        return sesion.paciente.creado
+    return Paciente.objects.filter(pk=sesion.paciente_id).values_list('creado', flat=True).first()
+
+
+@receiver(post_save, sender=Paciente)
+def actualizar_resumen_paciente(sender, instance, created, update_fields=None, **kwargs):
+    # Un paciente recién registrado aún no tiene sesiones y no entra en el resumen
+    if not created and _afecta_resumen(update_fields, CAMPOS_PACIENTE):
+        _programar_consolidacion(instance.creado)
+
+
+@receiver(post_delete, sender=Paciente)
+def eliminar_resumen_paciente(sender, instance, **kwargs):
+    _programar_consolidacion(instance.creado)
+
+
+@receiver(post_save, sender=SesionTriage)
+def actualizar_resumen_sesion(sender, instance, created, update_fields=None, **kwargs):
+    if created or _afecta_resumen(update_fields, CAMPOS_SESION):
+        _programar_consolidacion(_creado_paciente(instance))
+
+
+@receiver(post_delete, sender=SesionTriage)
+def eliminar_resumen_sesion(sender, instance, **kwargs):
+    _programar_consolidacion(_creado_paciente(instance))
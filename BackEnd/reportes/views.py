@@ -1,11 +1,9 @@
 ﻿from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django.utils import timezone
 from datetime import date, timedelta
-from .services import ReportesService
+from .services import ReportesService, ReporteCacheService
 from .serializers import ReportFiltersSerializer
 
 
@@ -14,11 +12,50 @@ class ReporteDashboardView(generics.GenericAPIView):
     Vista unificada para el dashboard de reportes
     Retorna todos los datos necesarios en una sola respuesta
     Implementa principio DRY eliminando endpoints duplicados
+    Los reportes se guardan en caché por filtros y rol (ReporteCacheService)
     """
     permission_classes = [IsAuthenticated]
     serializer_class = ReportFiltersSerializer
     
-    @method_decorator(cache_page(60 * 5))  # Cache por 5 minutos
+    def _generar_dashboard(self, fecha_inicio, fecha_fin, reporte):
+        """
+        Completa el reporte con el periodo y los metadatos de esta petición
+        El reporte puede venir de la caché: solo se guardan los agregados, no los metadatos
+        """
+        ahora = timezone.localtime()
+        
+        return {
+            # Resumen principal
+            **reporte,
+            
+            # Información adicional para el dashboard
+            'periodo': {
+                'fecha_inicio': fecha_inicio.strftime('%d/%m/%Y'),
+                'fecha_fin': fecha_fin.strftime('%d/%m/%Y'),
+                'dias_analizados': (fecha_fin - fecha_inicio).days + 1
+            },
+            'metadata': {
+                'fecha_generacion': ahora.strftime('%d/%m/%Y'),
+                'hora_generacion': ahora.strftime('%H:%M:%S'),
+                # Momento en que se calcularon los agregados (anterior a la petición si vienen de la caché)
+                'datos_calculados': timezone.localtime(reporte['fecha_generacion']).strftime('%d/%m/%Y %H:%M:%S'),
+                'tipo_reporte': 'Dashboard Completo',
+                'version': '2.0'
+            }
+        }
+    
+    def _obtener_reporte(self, filtros_cache, rol, fecha_inicio, fecha_fin, filtros=None):
+        """
+        Agregados del reporte desde la caché, calculándolos si no están
+        """
+        return ReporteCacheService.obtener_o_calcular(
+            filtros_cache,
+            rol,
+            lambda: ReportesService(
+                fecha_inicio=fecha_inicio, fecha_fin=fecha_fin, filtros=filtros
+            ).generar_reporte_completo()
+        )
+    
     def post(self, request, *args, **kwargs):
         """
         Genera reporte completo para dashboard con todos los datos
@@ -32,40 +69,19 @@ class ReporteDashboardView(generics.GenericAPIView):
             )
         
         filtros_data = filter_serializer.validated_data
-        
-        # Generar reporte usando el servicio
-        service = ReportesService(
-            fecha_inicio=filtros_data['fecha_inicio'],
-            fecha_fin=filtros_data['fecha_fin'],
-            filtros={
-                'niveles_esi': filtros_data.get('niveles_esi'),
-                'estados': filtros_data.get('estados'),
-                'generos': filtros_data.get('generos'),
-                'turnos': filtros_data.get('turnos'),
-                'rango_edad_min': filtros_data.get('rango_edad_min'),
-                'rango_edad_max': filtros_data.get('rango_edad_max')
-            }
-        )
+        filtros = {
+            'niveles_esi': filtros_data.get('niveles_esi'),
+            'estados': filtros_data.get('estados'),
+            'generos': filtros_data.get('generos'),
+            'turnos': filtros_data.get('turnos'),
+            'rango_edad_min': filtros_data.get('rango_edad_min'),
+            'rango_edad_max': filtros_data.get('rango_edad_max')
+        }
         
         try:
-            # Generar todos los datos necesarios para el dashboard
-            dashboard_data = {
-                # Resumen principal
-                **service.generar_reporte_completo(),
-                
-                # Información adicional para el dashboard
-                'periodo': {
-                    'fecha_inicio': filtros_data['fecha_inicio'].strftime('%d/%m/%Y'),
-                    'fecha_fin': filtros_data['fecha_fin'].strftime('%d/%m/%Y'),
-                    'dias_analizados': (filtros_data['fecha_fin'] - filtros_data['fecha_inicio']).days + 1
-                },
-                'metadata': {
-                    'fecha_generacion': timezone.localtime().strftime('%d/%m/%Y'),
-                    'hora_generacion': timezone.localtime().strftime('%H:%M:%S'),
-                    'tipo_reporte': 'Dashboard Completo',
-                    'version': '2.0'
-                }
-            }
+            fecha_inicio, fecha_fin = filtros_data['fecha_inicio'], filtros_data['fecha_fin']
+            reporte = self._obtener_reporte(filtros_data, request.user.role, fecha_inicio, fecha_fin, filtros)
+            dashboard_data = self._generar_dashboard(fecha_inicio, fecha_fin, reporte)
             
             return Response(dashboard_data, status=status.HTTP_200_OK)
                 
@@ -82,23 +98,11 @@ class ReporteDashboardView(generics.GenericAPIView):
         fecha_fin = date.today()
         fecha_inicio = fecha_fin - timedelta(days=30)
         
-        service = ReportesService(fecha_inicio, fecha_fin)
-        
         try:
-            dashboard_data = {
-                **service.generar_reporte_completo(),
-                'periodo': {
-                    'fecha_inicio': fecha_inicio.strftime('%d/%m/%Y'),
-                    'fecha_fin': fecha_fin.strftime('%d/%m/%Y'),
-                    'dias_analizados': 31
-                },
-                'metadata': {
-                    'fecha_generacion': timezone.localtime().strftime('%d/%m/%Y'),
-                    'hora_generacion': timezone.localtime().strftime('%H:%M:%S'),
-                    'tipo_reporte': 'Dashboard Completo',
-                    'version': '2.0'
-                }
-            }
+            reporte = self._obtener_reporte(
+                {'fecha_inicio': fecha_inicio, 'fecha_fin': fecha_fin}, request.user.role, fecha_inicio, fecha_fin
+            )
+            dashboard_data = self._generar_dashboard(fecha_inicio, fecha_fin, reporte)
             
             return Response(dashboard_data, status=status.HTTP_200_OK)
                 
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+Benchmark de la búsqueda de pacientes sobre un conjunto sintético de nombres con tildes.
+Compara, en una base de datos de prueba (test_<nombre>) que se elimina al terminar, la
+búsqueda por términos indexados (pacientes/busqueda.py) con la anterior basada en icontains.
+
+Uso:
+    python scripts/development/benchmark_busqueda.py --pacientes 1000000
+"""
+
+import os
+import sys
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+import django
+
+# Configurar Django
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, backend_dir)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BackEnd.settings')
+django.setup()
+
+from django.db import connection
+from django.db.models import Q
+
+from pacientes.busqueda import BusquedaPacientes
+from pacientes.models import Paciente
+
+NOMBRES = ['María', 'José', 'Juan', 'Andrés', 'Sofía', 'Camila', 'Valentina', 'Sebastián', 'Martín', 'Lucía',
+           'Daniel', 'Alejandro', 'Isabella', 'Mateo', 'Simón', 'Tomás', 'Ángela', 'Jesús', 'Inés', 'Ramón']
+APELLIDOS = ['Gómez', 'Rodríguez', 'Martínez', 'López', 'González', 'Pérez', 'Sánchez', 'Ramírez', 'Díaz',
+             'Hernández', 'Muñoz', 'Álvarez', 'Jiménez', 'Castaño', 'Ortiz', 'Suárez', 'Vásquez', 'Peña',
+             'Quintero', 'Zuluaga', 'Restrepo', 'Arango', 'Giraldo', 'Ospina', 'Cárdenas', 'Betancur']
+
+# Búsquedas típicas de recepción: sin tildes, prefijos y documentos parciales
+BUSQUEDAS = ['gomez', 'maria gomez', 'jose ramirez', 'sebas', 'zuluaga peña', '10000123', '1000456789', 'angela car']
+
+
+def generar_datos(total_pacientes, lote, rnd):
+    """Llena la base de prueba con bulk_create y luego construye el índice de búsqueda."""
+    creados = 0
+    while creados < total_pacientes:
+        cantidad = min(lote, total_pacientes - creados)
+        Paciente.objects.bulk_create([
+            Paciente(
+                primer_nombre=rnd.choice(NOMBRES), segundo_nombre=rnd.choice(NOMBRES + [None] * 10),
+                primer_apellido=rnd.choice(APELLIDOS), segundo_apellido=rnd.choice(APELLIDOS + [None] * 5),
+                fecha_nacimiento=date(1940, 1, 1) + timedelta(days=rnd.randint(0, 30000)),
+                tipo_documento='CC', numero_documento=str(1000000000 + i),
+                sexo='F', prefijo_telefonico='+57', telefono='3000000000',
+                regimen_eps='SISBEN', eps='SURA', sintomas_iniciales='Sintético',
+            )
+            for i in range(creados, creados + cantidad)
+        ], batch_size=lote)
+        creados += cantidad
+        print(f"  {creados}/{total_pacientes} pacientes", end='\r', flush=True)
+    print()
+    # bulk_create no pasa por Paciente.save(): se indexa en bloque
+    BusquedaPacientes.rellenar(lote=lote)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def busqueda_icontains(texto):
+    """Búsqueda anterior de SearchFilter: cada palabra en alguno de los campos con icontains."""
+    queryset = Paciente.objects.all()
+    for palabra in texto.split():
+        queryset = queryset.filter(
+            Q(primer_nombre__icontains=palabra) | Q(primer_apellido__icontains=palabra) |
+            Q(numero_documento__icontains=palabra)
+        )
+    return queryset
+
+
+def medir(queryset, repeticiones):
+    """Mediana del tiempo (ms) de la primera página del listado y total encontrado."""
+    pagina = queryset.order_by('-id')[:10]
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        filas = list(pagina.all())
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), len(filas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara la búsqueda de pacientes por términos indexados con icontains')
+    parser.add_argument('--pacientes', type=int, default=1000000)
+    parser.add_argument('--lote', type=int, default=5000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.semilla)
+
+    # SQLite usa por defecto una base de prueba en memoria; para volúmenes grandes se usa un archivo temporal
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.gettempdir(), 'benchmark_busqueda.sqlite3')
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    try:
+        print("=" * 70)
+        print(f"BENCHMARK DE BÚSQUEDA DE PACIENTES ({connection.vendor})")
+        print("=" * 70)
+        inicio = time.perf_counter()
+        generar_datos(args.pacientes, args.lote, rnd)
+        print(f"Datos e índice generados en {time.perf_counter() - inicio:.1f} s")
+
+        for texto in BUSQUEDAS:
+            ms_terminos, filas = medir(BusquedaPacientes.filtrar(Paciente.objects.all(), texto), args.repeticiones)
+            ms_icontains, _ = medir(busqueda_icontains(texto), max(1, args.repeticiones // 4))
+            print(f"'{texto}': términos {ms_terminos:.2f} ms | icontains {ms_icontains:.2f} ms ({filas} filas)")
+        print("-" * 70)
+        print(BusquedaPacientes.filtrar(Paciente.objects.order_by('-id'), 'maria gomez')[:10].explain())
+        print("=" * 70)
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
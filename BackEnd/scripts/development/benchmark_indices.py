@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+"""
+Benchmark de índices sobre un conjunto sintético de pacientes, sesiones y respuestas.
+Crea una base de datos de prueba con el motor configurado (SQLite o MySQL), la llena
+y compara, para las consultas frecuentes del sistema, el plan de ejecución (EXPLAIN)
+y el tiempo antes y después de las migraciones de índices.
+
+La base de datos de desarrollo no se modifica: todo ocurre en la base de prueba
+(test_<nombre>) que se elimina al terminar.
+
+Uso:
+    python scripts/development/benchmark_indices.py --pacientes 1000000
+    python scripts/development/benchmark_indices.py --pacientes 200000 --salida planes.json
+"""
+
+import os
+import sys
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+import django
+
+# Configurar Django
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, backend_dir)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BackEnd.settings')
+django.setup()
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+from pacientes.models import Paciente
+from reportes.services import ReportesService
+from triage.models import SesionTriage, Respuesta
+from triage.utils.catalogo_preguntas import CatalogoPreguntas
+from triage.utils.preguntas import PREGUNTAS
+from utils.choices import SEX_CHOICES, ESTADO_ATENCION_CHOICES, TURNO_CHOICES
+
+# Estado de las migraciones sin los índices evaluados (antes) y con ellos (después)
+MIGRACIONES_ANTES = [('triage', '0004_sesiontriage_turno'), ('pacientes', '0003_paciente_pac_tipo_num_doc_idx_and_more')]
+MIGRACIONES_DESPUES = [('pacientes', '0004_indices_consultas')]
+
+DIAS_HISTORIA = 730
+
+
+@contextmanager
+def sin_auto_now_add(modelo, campo):
+    """Permite asignar explícitamente un campo auto_now_add en bulk_create."""
+    field = modelo._meta.get_field(campo)
+    original = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = original
+
+
+def generar_datos(total_pacientes, sesiones_con_respuestas, lote, rnd):
+    """Llena la base de prueba y devuelve una muestra de ids para las consultas."""
+    CatalogoPreguntas.sincronizar()
+    codigos = list(PREGUNTAS.keys())
+    sexos = [codigo for codigo, _ in SEX_CHOICES]
+    estados = [codigo for codigo, _ in ESTADO_ATENCION_CHOICES]
+    ahora = timezone.now()
+
+    muestra = {'pacientes_activos': [], 'sesiones': []}
+    creados = 0
+    respuestas_pendientes = sesiones_con_respuestas
+
+    with sin_auto_now_add(Paciente, 'creado'):
+        while creados < total_pacientes:
+            cantidad = min(lote, total_pacientes - creados)
+            pacientes = []
+            for i in range(creados, creados + cantidad):
+                pacientes.append(Paciente(
+                    primer_nombre=f'Nombre{i}', primer_apellido=f'Apellido{i}',
+                    fecha_nacimiento=date(1940, 1, 1) + timedelta(days=rnd.randint(0, 30000)),
+                    tipo_documento='CC', numero_documento=str(1000000000 + i),
+                    sexo=rnd.choice(sexos), prefijo_telefonico='+57', telefono='3000000000',
+                    regimen_eps='SISBEN', eps='SURA', sintomas_iniciales='Sintético',
+                    estado=rnd.choices(estados, weights=[5, 3, 85, 7])[0],
+                    creado=ahora - timedelta(minutes=rnd.randint(0, DIAS_HISTORIA * 24 * 60)),
+                ))
+            Paciente.objects.bulk_create(pacientes, batch_size=lote)
+            # SQLite y MySQL no devuelven los ids de bulk_create en todos los casos
+            pacientes = list(Paciente.objects.order_by('-id').values_list('id', 'creado')[:cantidad])
+
+            sesiones = []
+            respuestas = []
+            for paciente_id, creado in pacientes:
+                for _ in range(1 if rnd.random() < 0.75 else 2):
+                    inicio = creado + timedelta(minutes=rnd.randint(0, 30))
+                    activa = rnd.random() < 0.02
+                    sesion = SesionTriage(
+                        id=uuid.uuid4(), paciente_id=paciente_id, fecha_inicio=inicio,
+                        completado=not activa,
+                        fecha_fin=None if activa else inicio + timedelta(minutes=rnd.randint(2, 25)),
+                        nivel_triage=None if activa else rnd.choices([1, 2, 3, 4, 5], weights=[2, 10, 40, 35, 13])[0],
+                        turno=rnd.choice(TURNO_CHOICES)[0],
+                    )
+                    sesiones.append(sesion)
+                    if activa and len(muestra['pacientes_activos']) < 50:
+                        muestra['pacientes_activos'].append(paciente_id)
+                    if respuestas_pendientes > 0:
+                        respuestas_pendientes -= 1
+                        for indice, codigo in enumerate(rnd.sample(codigos, min(25, len(codigos)))):
+                            respuestas.append(Respuesta(
+                                sesion=sesion, pregunta_id=codigo, valor=False,
+                                timestamp=inicio + timedelta(seconds=indice),
+                            ))
+                        if len(muestra['sesiones']) < 50:
+                            muestra['sesiones'].append((sesion.id, codigo))
+
+            SesionTriage.objects.bulk_create(sesiones, batch_size=lote)
+            Respuesta.objects.bulk_create(respuestas, batch_size=lote)
+            creados += cantidad
+            print(f"  {creados}/{total_pacientes} pacientes", end='\r', flush=True)
+
+    print()
+    if not muestra['pacientes_activos']:
+        muestra['pacientes_activos'].append(Paciente.objects.values_list('id', flat=True).first())
+    return muestra
+
+
+def consultas_frecuentes(muestra, rnd):
+    """Consultas representativas de las vistas y servicios, con parámetros de la muestra."""
+    paciente_id = rnd.choice(muestra['pacientes_activos'])
+    sesion_id, codigo = rnd.choice(muestra['sesiones'])
+    hoy = timezone.localdate()
+    desde, hasta = hoy - timedelta(days=30), hoy
+    inicio, fin = ReportesService(desde, hasta).datetime_inicio, ReportesService(desde, hasta).datetime_fin
+
+    return {
+        # IniciarTriage: sesión activa del paciente (first() con el orden por defecto)
+        'sesion_activa_paciente': SesionTriage.objects.filter(
+            paciente_id=paciente_id, completado=False
+        ).order_by('-fecha_inicio')[:1],
+        # ReportesService: sesiones de los pacientes llegados en el periodo
+        'reporte_sesiones_periodo': ReportesService(desde, hasta).get_queryset_sesiones().order_by().values(
+            'nivel_triage'
+        ).annotate(total=Count('id')),
+        # ReportesService: pacientes llegados en el periodo
+        'reporte_pacientes_periodo': Paciente.objects.filter(
+            creado__range=(inicio, fin)
+        ).order_by().values('sexo').annotate(total=Count('id')),
+        # Sala de espera: pacientes en espera por orden de llegada
+        # (solo columnas que existen en ambos estados de las migraciones)
+        'pacientes_en_espera': Paciente.objects.filter(estado='EN_ESPERA').order_by('creado').values_list(
+            'id', 'primer_nombre', 'primer_apellido', 'creado'
+        )[:50],
+        # AdaptadorSesionTriage.cargar: respuestas de una sesión en orden
+        'respuestas_sesion': Respuesta.objects.filter(sesion_id=sesion_id).order_by('timestamp').values_list(
+            'pregunta_id', 'valor', 'informacion_adicional'
+        ),
+        # Validación de duplicados: respuesta de una pregunta en una sesión
+        'respuesta_sesion_pregunta': Respuesta.objects.filter(sesion_id=sesion_id, pregunta_id=codigo),
+    }
+
+
+def actualizar_estadisticas():
+    """Recalcula las estadísticas del planificador tras crear o eliminar índices."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('ANALYZE')
+        elif connection.vendor == 'mysql':
+            for modelo in (Paciente, SesionTriage, Respuesta):
+                cursor.execute(f'ANALYZE TABLE {connection.ops.quote_name(modelo._meta.db_table)}')
+
+
+def medir(consultas, repeticiones):
+    """Plan y mediana del tiempo de ejecución (ms) de cada consulta."""
+    resultados = {}
+    for nombre, queryset in consultas.items():
+        plan = queryset.explain()
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            list(queryset.all())
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        resultados[nombre] = {'plan': plan, 'ms': statistics.median(tiempos)}
+    return resultados
+
+
+def migrar(objetivos):
+    inicio = time.perf_counter()
+    for app, migracion in objetivos:
+        call_command('migrate', app, migracion, verbosity=0)
+    actualizar_estadisticas()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara planes y tiempos de las consultas frecuentes con y sin los índices compuestos')
+    parser.add_argument('--pacientes', type=int, default=1000000)
+    parser.add_argument('--sesiones-con-respuestas', type=int, default=20000)
+    parser.add_argument('--lote', type=int, default=5000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', help='Archivo JSON donde guardar planes y tiempos')
+    args = parser.parse_args()
+
+    rnd = random.Random(args.semilla)
+
+    # SQLite usa por defecto una base de prueba en memoria; para volúmenes grandes se usa un archivo temporal
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.gettempdir(), 'benchmark_indices.sqlite3')
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    try:
+        print("=" * 70)
+        print(f"BENCHMARK DE ÍNDICES ({connection.vendor})")
+        print("=" * 70)
+        inicio = time.perf_counter()
+        muestra = generar_datos(args.pacientes, args.sesiones_con_respuestas, args.lote, rnd)
+        print(f"Datos generados en {time.perf_counter() - inicio:.1f} s: "
+              f"{Paciente.objects.count()} pacientes, {SesionTriage.objects.count()} sesiones, "
+              f"{Respuesta.objects.count()} respuestas")
+
+        consultas = consultas_frecuentes(muestra, rnd)
+
+        migrar(MIGRACIONES_ANTES)
+        antes = medir(consultas, args.repeticiones)
+        tiempo_indices = migrar(MIGRACIONES_DESPUES)
+        despues = medir(consultas, args.repeticiones)
+        print(f"Creación de índices y estadísticas: {tiempo_indices:.1f} s")
+
+        for nombre in consultas:
+            print("-" * 70)
+            print(f"{nombre}: {antes[nombre]['ms']:.2f} ms -> {despues[nombre]['ms']:.2f} ms")
+            print(f"  Antes:   {antes[nombre]['plan']}".replace('\n', '\n           '))
+            print(f"  Después: {despues[nombre]['plan']}".replace('\n', '\n           '))
+        print("=" * 70)
+
+        if args.salida:
+            with open(args.salida, 'w', encoding='utf-8') as archivo:
+                json.dump({
+                    'motor': connection.vendor,
+                    'pacientes': args.pacientes,
+                    'consultas': {nombre: {'antes': antes[nombre], 'despues': despues[nombre]} for nombre in consultas},
+                }, archivo, ensure_ascii=False, indent=2)
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
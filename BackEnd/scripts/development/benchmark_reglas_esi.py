@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Microbenchmark del evaluador de reglas ESI.
+Compara el recorrido secuencial de REGLAS_ESI con el índice compilado por pregunta
+sobre sesiones sintéticas, verificando primero que ambos devuelvan el mismo nivel.
+
+Uso:
+    python scripts/development/benchmark_reglas_esi.py --sesiones 5000 --repeticiones 5
+"""
+
+import os
+import sys
+import argparse
+import random
+import time
+import django
+
+# Configurar Django
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, backend_dir)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BackEnd.settings')
+django.setup()
+
+from triage.utils.preguntas import PREGUNTAS, REGLAS_ESI
+from triage.utils.reglas_compiladas import ReglasESICompiladas, NIVEL_ESI_POR_DEFECTO
+from triage.utils.triage_evaluation import TriageEvaluationHelper
+
+
+def generar_valor(info_pregunta, rnd):
+    """Genera un valor de respuesta válido para el tipo de pregunta."""
+    tipo = info_pregunta['tipo']
+    opciones = info_pregunta.get('opciones') or []
+
+    if tipo == 'boolean':
+        return rnd.choice([True, False])
+    if tipo in ('choice', 'scale'):
+        return rnd.choice(opciones)
+    if tipo == 'multi_choice':
+        return rnd.sample(opciones, rnd.randint(1, min(3, len(opciones))))
+    if tipo == 'numeric':
+        return rnd.randint(0, 10)
+    return "Texto libre"
+
+
+def generar_sesiones(cantidad, semilla):
+    """Genera sesiones sintéticas como (respuestas_dict, contexto_paciente)."""
+    rnd = random.Random(semilla)
+    codigos = list(PREGUNTAS.keys())
+    sesiones = []
+
+    for _ in range(cantidad):
+        respondidas = rnd.sample(codigos, rnd.randint(5, 40))
+        respuestas_dict = {codigo: generar_valor(PREGUNTAS[codigo], rnd) for codigo in respondidas}
+        contexto_paciente = {
+            'es_embarazada': respuestas_dict.get('embarazo') in ['Sí', 'Si', True, 'True'],
+            'es_adulto_mayor': rnd.random() < 0.3,
+        }
+        sesiones.append((respuestas_dict, contexto_paciente))
+
+    return sesiones
+
+
+def medir(funcion, sesiones, repeticiones):
+    """Mejor tiempo total (segundos) de evaluar todas las sesiones."""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for respuestas_dict, contexto_paciente in sesiones:
+            funcion(respuestas_dict, contexto_paciente)
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara el evaluador ESI secuencial con el compilado')
+    parser.add_argument('--sesiones', type=int, default=5000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    sesiones = generar_sesiones(args.sesiones, args.semilla)
+
+    inicio = time.perf_counter()
+    compilado = ReglasESICompiladas.compilar(REGLAS_ESI)
+    tiempo_compilacion = time.perf_counter() - inicio
+
+    secuencial = TriageEvaluationHelper.evaluar_reglas_secuencial
+
+    def evaluar_compilado(respuestas_dict, contexto_paciente):
+        cumplidas = compilado.reglas_cumplidas(respuestas_dict, contexto_paciente)
+        return compilado.nivel_de(r.id for r in cumplidas) or NIVEL_ESI_POR_DEFECTO
+
+    # Verificar equivalencia antes de medir
+    diferencias = 0
+    for respuestas_dict, contexto_paciente in sesiones:
+        if secuencial(respuestas_dict, contexto_paciente) != evaluar_compilado(respuestas_dict, contexto_paciente):
+            diferencias += 1
+
+    tiempo_secuencial = medir(secuencial, sesiones, args.repeticiones)
+    tiempo_compilado = medir(evaluar_compilado, sesiones, args.repeticiones)
+
+    print("=" * 60)
+    print("BENCHMARK EVALUADOR REGLAS ESI")
+    print("=" * 60)
+    print(f"Sesiones sintéticas: {len(sesiones)} (semilla {args.semilla})")
+    print(f"Compilación del índice: {tiempo_compilacion * 1000:.2f} ms")
+    print(f"Diferencias de nivel ESI: {diferencias}")
+    print(f"Secuencial: {tiempo_secuencial / len(sesiones) * 1e6:.2f} µs/sesión")
+    print(f"Compilado:  {tiempo_compilado / len(sesiones) * 1e6:.2f} µs/sesión")
+    print(f"Aceleración: {tiempo_secuencial / tiempo_compilado:.1f}x")
+    print("=" * 60)
+
+    if diferencias:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,7 @@ django.setup()
 from pacientes.models import Paciente, ContactoEmergencia
 from triage.models import SesionTriage, Pregunta, Respuesta
 from triage.utils.preguntas import PREGUNTAS, FLUJO_PREGUNTAS
+from triage.utils.catalogo_preguntas import CatalogoPreguntas
 
 # Datos para generar pacientes realistas (evitando duplicados)
 NOMBRES_MASCULINOS = [
@@ -542,21 +543,8 @@ def cargar_preguntas_sistema():
     """Carga las preguntas del sistema desde el diccionario PREGUNTAS"""
     
     print("Cargando preguntas del sistema de triage...")
-    preguntas_cargadas = 0
-    
-    for codigo, datos in PREGUNTAS.items():
-        pregunta, created = Pregunta.objects.get_or_create(
-            codigo=codigo,
-            defaults={
-                'texto': datos.get('texto', ''),
-                'tipo': datos.get('tipo', 'text'),
-                'opciones': datos.get('opciones', None)
-            }
-        )
-        if created:
-            preguntas_cargadas += 1
-    
-    print(f"Preguntas cargadas: {preguntas_cargadas} nuevas de {len(PREGUNTAS)} totales")
+    resultado = CatalogoPreguntas.sincronizar()
+    print(f"Preguntas cargadas: {len(resultado.creadas)} nuevas de {len(PREGUNTAS)} totales ({resultado.resumen()})")
 
 def limpiar_datos_existentes():
     """Limpia datos de prueba anteriores (opcional)"""
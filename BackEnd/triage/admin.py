@@ -5,9 +5,9 @@ from .models import SesionTriage, Pregunta, Respuesta
 @admin.register(SesionTriage)
 class SesionTriageAdmin(admin.ModelAdmin):
     list_display = ('id', 'paciente', 'fecha_inicio', 'fecha_fin', 'nivel_triage', 'completado')
-    list_filter = ('completado', 'nivel_triage', 'fecha_inicio')
+    list_filter = ('completado', 'nivel_triage', 'turno', 'fecha_inicio')
     search_fields = ('paciente__primer_nombre', 'paciente__primer_apellido', 'paciente__numero_documento')
-    readonly_fields = ('id', 'fecha_inicio')
+    readonly_fields = ('id', 'fecha_inicio', 'turno', 'nivel_provisional', 'reglas_cumplidas', 'motivo_cierre', 'pregunta_actual', 'total_respuestas')
     date_hierarchy = 'fecha_inicio'
     
     fieldsets = (
@@ -15,8 +15,11 @@ class SesionTriageAdmin(admin.ModelAdmin):
             'fields': (
                 'id',
                 'paciente',
-                ('fecha_inicio', 'fecha_fin'),
-                ('nivel_triage', 'completado')
+                ('fecha_inicio', 'fecha_fin', 'turno'),
+                ('nivel_triage', 'completado'),
+                ('nivel_provisional', 'reglas_cumplidas'),
+                'motivo_cierre',
+                ('pregunta_actual', 'total_respuestas')
             )
         }),
     )
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class TriageConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "triage"
+
+    def ready(self):
+        # Mantener la sesión más reciente del paciente al eliminar sesiones
+        from . import signals  # noqa: F401
+
+        # Compilar el grafo de preguntas, las reglas ESI y los validadores una sola vez por proceso
+        from .utils.grafo_preguntas import GrafoPreguntas
+        from .utils.reglas_compiladas import ReglasESICompiladas
+        from .utils.validadores_respuestas import ValidadoresRespuestas
+        GrafoPreguntas.obtener()
+        ReglasESICompiladas.obtener()
+        ValidadoresRespuestas.obtener()
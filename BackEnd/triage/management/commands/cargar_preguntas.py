@@ -0,0 +1,30 @@
+"""
+Sincroniza la tabla de preguntas con el catálogo PREGUNTAS.
+
+Solo escribe las preguntas nuevas o modificadas; sin cambios no realiza escrituras.
+
+Uso:
+    python manage.py cargar_preguntas [--lote 500]
+"""
+from django.core.management.base import BaseCommand
+
+from triage.utils.catalogo_preguntas import CatalogoPreguntas
+
+
+class Command(BaseCommand):
+    help = 'Sincroniza la tabla de preguntas con el catálogo PREGUNTAS aplicando solo las diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Preguntas escritas por consulta')
+
+    def handle(self, *args, **options):
+        resultado = CatalogoPreguntas.sincronizar(lote=options['lote'])
+
+        if resultado.obsoletas:
+            self.stdout.write(self.style.WARNING(
+                f'Preguntas en la base de datos que no están en el catálogo: {", ".join(resultado.obsoletas)}'
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Catálogo {resultado.version[:12]}: {resultado.resumen()}.'
+        ))
@@ -0,0 +1,26 @@
+"""
+Rellena pregunta_actual y total_respuestas en las sesiones de triage existentes.
+La migración triage 0008 ya lo hace al desplegar; el comando permite repetirlo.
+
+Uso:
+    python manage.py materializar_estado_sesiones [--lote 500] [--solo-activas]
+"""
+from django.core.management.base import BaseCommand
+
+from triage.utils.estado_sesiones import EstadoSesionesHelper
+
+
+class Command(BaseCommand):
+    help = 'Materializa la pregunta actual y el número de respuestas de las sesiones de triage existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Sesiones actualizadas por consulta')
+        parser.add_argument('--solo-activas', action='store_true', help='Procesar solo sesiones no completadas')
+
+    def handle(self, *args, **options):
+        revisadas, actualizadas = EstadoSesionesHelper.rellenar(
+            lote=options['lote'], solo_activas=options['solo_activas']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Sesiones revisadas: {revisadas}. Sesiones actualizadas: {actualizadas}.'
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sesiontriage',
+            name='pregunta_actual',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='sesiontriage',
+            name='total_respuestas',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
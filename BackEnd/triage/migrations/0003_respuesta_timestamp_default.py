@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0002_sesiontriage_pregunta_actual'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='respuesta',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
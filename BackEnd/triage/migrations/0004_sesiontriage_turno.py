@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:26
+
+from django.db import migrations, models
+
+
+def calcular_turnos(apps, schema_editor):
+    """Asigna el turno a las sesiones existentes según su fecha de inicio."""
+    from triage.utils.turnos import calcular_turno
+
+    SesionTriage = apps.get_model('triage', 'SesionTriage')
+    pendientes = []
+    for sesion in SesionTriage.objects.filter(turno='').only('id', 'fecha_inicio').iterator(chunk_size=500):
+        sesion.turno = calcular_turno(sesion.fecha_inicio)
+        pendientes.append(sesion)
+        if len(pendientes) >= 500:
+            SesionTriage.objects.bulk_update(pendientes, ['turno'])
+            pendientes = []
+    if pendientes:
+        SesionTriage.objects.bulk_update(pendientes, ['turno'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0003_respuesta_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sesiontriage',
+            name='turno',
+            field=models.CharField(blank=True, choices=[('MANANA', 'Mañana'), ('TARDE', 'Tarde'), ('NOCHE', 'Noche')], editable=False, max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='sesiontriage',
+            index=models.Index(fields=['turno', 'fecha_inicio'], name='sesion_turno_fecha_idx'),
+        ),
+        migrations.RunPython(calcular_turnos, migrations.RunPython.noop),
+    ]
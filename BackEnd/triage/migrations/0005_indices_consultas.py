@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0004_sesiontriage_turno'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sesiontriage',
+            index=models.Index(fields=['nivel_triage', 'fecha_inicio'], name='sesion_nivel_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0005_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sesiontriage',
+            name='motivo_cierre',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:25
+
+from datetime import date
+
+from django.db import migrations, models
+
+
+def rellenar_esi_provisional(apps, schema_editor):
+    """Acumula el ESI provisional de las sesiones en curso con las respuestas que ya tienen."""
+    from triage.utils.reglas_compiladas import ReglasESICompiladas
+    from triage.utils.triage_evaluation import TriageEvaluationHelper
+
+    SesionTriage = apps.get_model('triage', 'SesionTriage')
+    compiladas = ReglasESICompiladas.obtener()
+    hoy = date.today()
+
+    sesiones = SesionTriage.objects.filter(completado=False).select_related('paciente').prefetch_related('respuestas')
+    for sesion in sesiones.iterator(chunk_size=500):
+        respuestas_dict = {
+            respuesta.pregunta_id: respuesta.valor
+            for respuesta in sorted(sesion.respuestas.all(), key=lambda r: r.timestamp)
+        }
+        if not respuestas_dict:
+            continue
+        nacimiento = sesion.paciente.fecha_nacimiento
+        edad = hoy.year - nacimiento.year - ((hoy.month, hoy.day) < (nacimiento.month, nacimiento.day))
+        contexto_paciente = TriageEvaluationHelper.contexto_paciente(edad, respuestas_dict)
+        cumplidas = {regla.id for regla in compiladas.reglas_cumplidas(respuestas_dict, contexto_paciente)}
+        sesion.reglas_cumplidas = sorted(cumplidas)
+        sesion.nivel_provisional = compiladas.nivel_de(cumplidas)
+        sesion.save(update_fields=['reglas_cumplidas', 'nivel_provisional'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0006_sesiontriage_motivo_cierre'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sesiontriage',
+            name='nivel_provisional',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sesiontriage',
+            name='reglas_cumplidas',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(rellenar_esi_provisional, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def materializar_estado_sesiones(apps, schema_editor):
+    """Rellena la pregunta pendiente y el número de respuestas de las sesiones anteriores a 0002."""
+    from triage.utils.estado_sesiones import EstadoSesionesHelper
+
+    EstadoSesionesHelper.rellenar(
+        sesiones=apps.get_model('triage', 'SesionTriage'),
+        respuestas=apps.get_model('triage', 'Respuesta'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0007_sesiontriage_esi_provisional'),
+    ]
+
+    operations = [
+        migrations.RunPython(materializar_estado_sesiones, migrations.RunPython.noop),
+    ]
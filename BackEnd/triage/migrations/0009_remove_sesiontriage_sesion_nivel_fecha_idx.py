@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('triage', '0008_materializar_estado_sesiones'),
+    ]
+
+    operations = [
+        # Ninguna consulta filtra sesiones por nivel ESI en un rango de fecha_inicio
+        migrations.RemoveIndex(
+            model_name='sesiontriage',
+            name='sesion_nivel_fecha_idx',
+        ),
+    ]
@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from pacientes.models import Paciente
+from utils.choices import TURNO_CHOICES
+from .utils.turnos import calcular_turno
+from .utils.ultima_sesion import UltimaSesionHelper
 import uuid
 
 class SesionTriage(models.Model):
@@ -11,12 +14,37 @@ class SesionTriage(models.Model):
     fecha_fin = models.DateTimeField(null=True, blank=True)
     nivel_triage = models.IntegerField(null=True, blank=True)  # Nivel ESI final (1-5)
     completado = models.BooleanField(default=False)
+    # Estado materializado: se actualiza en la misma transacción que cada Respuesta
+    pregunta_actual = models.CharField(max_length=100, null=True, blank=True)  # Código de la pregunta pendiente
+    total_respuestas = models.PositiveIntegerField(default=0)
+    # ESI provisional, acumulado con cada respuesta (ver MotorTriage.siguiente_pregunta)
+    nivel_provisional = models.IntegerField(null=True, blank=True)
+    reglas_cumplidas = models.JSONField(default=list, blank=True)  # Posiciones en REGLAS_ESI
+    # Regla que cerró el triage antes de terminar el cuestionario (nivel ESI 1)
+    motivo_cierre = models.CharField(max_length=255, null=True, blank=True)
+    # Turno de inicio de la sesión, calculado al crearla (ver utils/turnos.py)
+    turno = models.CharField(max_length=10, choices=TURNO_CHOICES, blank=True, editable=False)
     
     class Meta:
         ordering = ['-fecha_inicio']  # Default ordering to prevent pagination warnings
+        indexes = [
+            models.Index(fields=['turno', 'fecha_inicio'], name='sesion_turno_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"Triage {self.id} - Paciente: {self.paciente.primer_nombre} {self.paciente.primer_apellido}"
+    
+    def save(self, *args, **kwargs):
+        if not self.turno and self.fecha_inicio:
+            self.turno = calcular_turno(self.fecha_inicio)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'turno'}
+        
+        # Sin punto de guardado: si ya hay una transacción abierta la sesión y el paciente se guardan en ella
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if UltimaSesionHelper.afecta(kwargs.get('update_fields')):
+                UltimaSesionHelper.actualizar(self.paciente_id)
 
 class Pregunta(models.Model):
     """Modelo para representar una pregunta del sistema de triage."""
@@ -47,11 +75,12 @@ class Respuesta(models.Model):
     pregunta = models.ForeignKey(Pregunta, on_delete=models.CASCADE)
     valor = models.JSONField()  # Almacena cualquier tipo de respuesta como JSON
     informacion_adicional = models.TextField(null=True, blank=True)  # Para campos como "Otra alergia especificar"
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # default en lugar de auto_now_add: el registro por lotes asigna marcas crecientes para conservar el orden
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     pregunta_siguiente = models.CharField(max_length=100, null=True, blank=True)  # Código de la siguiente pregunta basada en esta respuesta
     
     class Meta:
-        unique_together = ('sesion', 'pregunta')  # Evita duplicados de respuestas
+        unique_together = ('sesion', 'pregunta')  # Evita duplicados de respuestas; su índice resuelve (sesion, pregunta)
         ordering = ['timestamp']
     
     def __str__(self):
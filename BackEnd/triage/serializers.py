@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from .models import SesionTriage, Pregunta, Respuesta
 from pacientes.serializers import PacienteSerializer
-import re
+from .utils.preguntas import PREGUNTAS
+from .utils.grafo_preguntas import GrafoPreguntas
+from .utils.validadores_respuestas import ValidadoresRespuestas, ValidadorPregunta
 
 class PreguntaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,68 +14,25 @@ class ValidacionRespuestasBase:
     def validate_respuesta(self, data):
         """Validar que el valor de la respuesta coincida con el tipo de pregunta."""
         pregunta = data['pregunta']
-        valor = data['valor']
+        validadores = ValidadoresRespuestas.obtener()
         
-        # Si pregunta es un string, obtener la instancia
+        # Si pregunta es un string, usar el validador precompilado o buscar la instancia
         if isinstance(pregunta, str):
-            try:
-                pregunta = Pregunta.objects.get(codigo=pregunta)
-            except Pregunta.DoesNotExist:
-                raise serializers.ValidationError(f"La pregunta con código '{pregunta}' no existe.")
-        
-        # Boolean
-        if pregunta.tipo == 'boolean':
-            if not isinstance(valor, bool):
-                raise serializers.ValidationError("La respuesta debe ser un valor booleano (true/false)")
-        
-        # Numérico
-        if pregunta.tipo == 'numeric' and not (isinstance(valor, (int, float)) or str(valor).isdigit()):
-            raise serializers.ValidationError("La respuesta debe ser un valor numérico")
-        
-        # Escala
-        if pregunta.tipo == 'scale':
-            if not isinstance(valor, (int, float)):
-                raise serializers.ValidationError("La respuesta de escala debe ser un valor numérico")
-            if pregunta.opciones:
-                min_val, max_val = min(pregunta.opciones), max(pregunta.opciones)
-                if valor < min_val or valor > max_val:
-                    raise serializers.ValidationError(f"La respuesta debe estar entre {min_val} y {max_val}")
-        
-        # Opción única
-        if pregunta.tipo == 'choice' and valor not in pregunta.opciones:
-            raise serializers.ValidationError(f"La respuesta debe ser una de las opciones válidas: {', '.join(pregunta.opciones)}")
-        
-        # Texto
-        if pregunta.tipo == 'text':
-            if not isinstance(valor, str):
-                raise serializers.ValidationError("La respuesta debe ser texto")
-            if len(valor.strip()) == 0:
-                raise serializers.ValidationError("La respuesta de texto no puede estar vacía")
-            if len(valor) > 1000:
-                raise serializers.ValidationError("La respuesta no puede exceder los 1000 caracteres")
-            if re.search(r'[<>"\']', valor):
-                raise serializers.ValidationError("La respuesta contiene caracteres no permitidos")
-        
-        # Validación extra para choice con "Otro"
-        if pregunta.tipo == 'choice':
-            if isinstance(valor, str) and "Otro (especificar)" in valor and not data.get('informacion_adicional'):
-                raise serializers.ValidationError("Debe especificar la información adicional cuando selecciona 'Otro (especificar)'")
-        
-        # Opción múltiple
-        if pregunta.tipo == 'multi_choice':
-            if not isinstance(valor, list):
-                raise serializers.ValidationError("La respuesta debe ser una lista de opciones")
-            if len(valor) == 0:
-                raise serializers.ValidationError("Debe seleccionar al menos una opción")
-            for v in valor:
-                if v not in pregunta.opciones:
-                    raise serializers.ValidationError(f"La opción '{v}' no es válida. Opciones válidas: {', '.join(pregunta.opciones)}")
-            if "Otro (especificar)" in valor and not data.get('informacion_adicional'):
-                raise serializers.ValidationError("Debe especificar la información adicional cuando selecciona 'Otro (especificar)'")
+            validador = validadores.validador(pregunta)
+            if validador is None:
+                try:
+                    validador = ValidadorPregunta.desde_pregunta(Pregunta.objects.get(codigo=pregunta))
+                except Pregunta.DoesNotExist:
+                    raise serializers.ValidationError(f"La pregunta con código '{pregunta}' no existe.")
+        else:
+            validador = validadores.validador_para(pregunta)
         
+        validador.validar(data['valor'], data.get('informacion_adicional'))
         return data
 
 class RespuestaCreateSerializer(ValidacionRespuestasBase, serializers.ModelSerializer):
+    # El paciente se trae con la sesión: el motor de triage necesita su edad y sexo
+    sesion = serializers.PrimaryKeyRelatedField(queryset=SesionTriage.objects.select_related('paciente'))
     pregunta = serializers.CharField()  # Aceptar código de pregunta como string
     
     class Meta:
@@ -81,10 +40,16 @@ class RespuestaCreateSerializer(ValidacionRespuestasBase, serializers.ModelSeria
         fields = ['sesion', 'pregunta', 'valor', 'informacion_adicional']
     
     def validate_pregunta(self, value):
-        """Validar que el código de pregunta existe y convertirlo a instancia."""
-        try:
-            pregunta = Pregunta.objects.get(codigo=value)
+        """
+        Validar que el código de pregunta existe y convertirlo a instancia.
+        Las preguntas del catálogo se sirven desde el grafo compilado, sin consultar la base de datos:
+        la tabla se sincroniza desde ese mismo catálogo al desplegar (cargar_preguntas).
+        """
+        pregunta = GrafoPreguntas.obtener().pregunta(value)
+        if pregunta is not None:
             return pregunta
+        try:
+            return Pregunta.objects.get(codigo=value)
         except Pregunta.DoesNotExist:
             raise serializers.ValidationError(f"La pregunta con código '{value}' no existe.")
     
@@ -111,5 +76,28 @@ class SesionTriageSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = SesionTriage
-        fields = ['id', 'paciente', 'paciente_detail', 'fecha_inicio', 'fecha_fin', 'nivel_triage', 'completado', 'respuestas']
-        read_only_fields = ['id', 'fecha_inicio', 'fecha_fin']
\ No newline at end of file
+        fields = ['id', 'paciente', 'paciente_detail', 'fecha_inicio', 'fecha_fin', 'nivel_triage', 'completado',
+                  'nivel_provisional', 'motivo_cierre', 'pregunta_actual', 'total_respuestas', 'respuestas']
+        read_only_fields = ['id', 'fecha_inicio', 'fecha_fin', 'nivel_provisional', 'motivo_cierre', 'pregunta_actual',
+                            'total_respuestas']
+
+class SesionTriageCompactaSerializer(serializers.ModelSerializer):
+    """
+    Representación ligera de la sesión para el sondeo del kiosco (?view=compact):
+    estado y progreso, sin historial de respuestas ni datos del paciente.
+    """
+    class Meta:
+        model = SesionTriage
+        fields = ['id', 'completado', 'nivel_triage', 'nivel_provisional', 'pregunta_actual', 'total_respuestas']
+        read_only_fields = fields
+
+class RespuestaLoteItemSerializer(serializers.Serializer):
+    """Una respuesta dentro de un lote; se valida contra el grafo de preguntas al registrarla."""
+    pregunta = serializers.CharField()
+    valor = serializers.JSONField()
+    informacion_adicional = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+class RespuestaLoteSerializer(serializers.Serializer):
+    """Lote ordenado de respuestas de una sesión, enviado por los kioscos sin conexión."""
+    sesion = serializers.PrimaryKeyRelatedField(queryset=SesionTriage.objects.select_related('paciente'))
+    respuestas = RespuestaLoteItemSerializer(many=True, allow_empty=False, max_length=len(PREGUNTAS))
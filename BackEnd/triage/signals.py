@@ -0,0 +1,15 @@
+"""
+Señales de triage: mantienen las columnas de la sesión más reciente del paciente
+cuando se eliminan sesiones (las altas y cambios se manejan en SesionTriage.save).
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import SesionTriage
+from .utils.ultima_sesion import UltimaSesionHelper
+
+
+@receiver(post_delete, sender=SesionTriage)
+def actualizar_ultima_sesion_al_eliminar(sender, instance, **kwargs):
+    # El borrado en cascada de un paciente no deja filas que actualizar: el UPDATE no afecta ninguna
+    UltimaSesionHelper.actualizar(instance.paciente_id)
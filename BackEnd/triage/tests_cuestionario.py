@@ -0,0 +1,421 @@
+"""
+Tests del cuestionario de triage: reanudación de sesiones, respuestas en lote, cierre y ESI
+acumulado, motor sin base de datos y catálogo de preguntas.
+
+Reutilizan los escenarios y ayudantes del benchmark de tests_rendimiento.py.
+"""
+import json
+from importlib import import_module
+from pathlib import Path
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from triage.models import Pregunta, Respuesta, SesionTriage
+from triage.utils.adaptador_sesion import AdaptadorSesionTriage
+from triage.utils.catalogo_preguntas import CatalogoPreguntas
+from triage.utils.grafo_preguntas import GrafoPreguntas
+from triage.utils.motor_triage import MotorTriage
+from triage.utils.preguntas import PREGUNTAS, FLUJO_PREGUNTAS
+from triage.utils.reglas_compiladas import ReglasESICompiladas
+from triage.utils.triage_evaluation import TriageEvaluationHelper
+from triage.utils.validadores_respuestas import ValidadoresRespuestas
+from .tests_rendimiento import ESCENARIOS, crear_paciente, crear_preguntas, respuesta_por_defecto
+
+# Secuencias de preguntas y niveles ESI grabados con el flujo anterior a MotorTriage; no se regeneran
+RUTA_FLUJOS_REFERENCIA = Path(__file__).resolve().parent / 'benchmarks' / 'flujos_referencia.json'
+
+
+class CuestionarioTestCase(TestCase):
+    """Base con el catálogo de preguntas cargado y un cliente de la API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        crear_preguntas()
+
+    def setUp(self):
+        self.client = APIClient()
+
+
+class SesionTriageTestCase(CuestionarioTestCase):
+    """Reanudación de sesiones, respuestas en lote y concurrencia sobre una sesión."""
+
+    def test_detalle_sesion_no_depende_del_historial(self):
+        """La reanudación compacta lee una sola fila y la completa no crece con las respuestas."""
+        paciente = crear_paciente('M', 40, 1000000100)
+        datos = self.client.post('/api/v1/triage/iniciar', {'paciente': paciente.id}, format='json').json()
+        sesion_id = datos['data']['sesion']['id']
+        pregunta = datos['data']['primera_pregunta']
+
+        consultas_completa = []
+        for _ in range(3):
+            valor = respuesta_por_defecto(PREGUNTAS[pregunta['codigo']])
+            datos = self.client.post('/api/v1/triage/respuesta', {
+                'sesion': sesion_id, 'pregunta': pregunta['codigo'], 'valor': valor,
+            }, format='json').json()
+            pregunta = datos['data']['siguiente_pregunta']
+
+            with CaptureQueriesContext(connection) as consultas:
+                completa = self.client.get(f'/api/v1/triage/sesiones/{sesion_id}').json()
+            consultas_completa.append(len(consultas.captured_queries))
+            self.assertEqual(completa['data']['siguiente_pregunta']['codigo'], pregunta['codigo'])
+
+        self.assertEqual(len(set(consultas_completa)), 1, consultas_completa)
+
+        with CaptureQueriesContext(connection) as consultas:
+            compacta = self.client.get(f'/api/v1/triage/sesiones/{sesion_id}?view=compact').json()
+        self.assertEqual(len(consultas.captured_queries), 1)
+        self.assertEqual(set(compacta['data']['sesion']), {
+            'id', 'completado', 'nivel_triage', 'nivel_provisional', 'pregunta_actual', 'total_respuestas',
+        })
+        self.assertEqual(compacta['data']['sesion']['total_respuestas'], 3)
+        self.assertEqual(compacta['data']['siguiente_pregunta']['codigo'], pregunta['codigo'])
+
+    def test_sesion_anterior_a_la_materializacion_se_reanuda_tras_migrar(self):
+        """La migración de datos rellena el estado de las sesiones con respuestas y la reanudación sigue donde quedó."""
+        paciente = crear_paciente('M', 40, 1000000110)
+        datos = self.client.post('/api/v1/triage/iniciar', {'paciente': paciente.id}, format='json').json()
+        sesion_id = datos['data']['sesion']['id']
+        pregunta = datos['data']['primera_pregunta']
+        for _ in range(3):
+            datos = self.client.post('/api/v1/triage/respuesta', {
+                'sesion': sesion_id, 'pregunta': pregunta['codigo'],
+                'valor': respuesta_por_defecto(PREGUNTAS[pregunta['codigo']]),
+            }, format='json').json()
+            pregunta = datos['data']['siguiente_pregunta']
+
+        # Estado de una sesión creada antes de 0002: columnas con sus valores por defecto
+        SesionTriage.objects.filter(pk=sesion_id).update(pregunta_actual=None, total_respuestas=0)
+        migracion = import_module('triage.migrations.0008_materializar_estado_sesiones')
+        migracion.materializar_estado_sesiones(apps, None)
+
+        sesion = SesionTriage.objects.get(pk=sesion_id)
+        self.assertEqual((sesion.pregunta_actual, sesion.total_respuestas), (pregunta['codigo'], 3))
+        compacta = self.client.get(f'/api/v1/triage/sesiones/{sesion_id}?view=compact').json()
+        self.assertEqual(compacta['data']['siguiente_pregunta']['codigo'], pregunta['codigo'])
+        respuesta = self.client.post('/api/v1/triage/respuesta', {
+            'sesion': sesion_id, 'pregunta': pregunta['codigo'],
+            'valor': respuesta_por_defecto(PREGUNTAS[pregunta['codigo']]),
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(SesionTriage.objects.get(pk=sesion_id).total_respuestas, 4)
+
+    def test_lote_replica_el_flujo_pregunta_a_pregunta(self):
+        """Un lote produce las mismas respuestas y ESI que el flujo de a una, con consultas constantes."""
+        escenario = ESCENARIOS['multiples_enfermedades_cronicas']
+        paciente = crear_paciente(escenario['sexo'], escenario['edad'], 1000000200)
+        datos = self.client.post('/api/v1/triage/iniciar', {'paciente': paciente.id}, format='json').json()
+        sesion_individual = datos['data']['sesion']['id']
+        pregunta = datos['data']['primera_pregunta']
+
+        lote = []
+        while pregunta:
+            codigo = pregunta['codigo']
+            valor = escenario['respuestas'].get(codigo, respuesta_por_defecto(PREGUNTAS[codigo]))
+            lote.append({'pregunta': codigo, 'valor': valor})
+            datos = self.client.post('/api/v1/triage/respuesta', {
+                'sesion': sesion_individual, 'pregunta': codigo, 'valor': valor,
+            }, format='json').json()
+            pregunta = datos['data'].get('siguiente_pregunta')
+        nivel_individual = datos['data']['nivel_triage']
+
+        paciente = crear_paciente(escenario['sexo'], escenario['edad'], 1000000201)
+        datos = self.client.post('/api/v1/triage/iniciar', {'paciente': paciente.id}, format='json').json()
+        sesion_lote = datos['data']['sesion']['id']
+
+        # Un lote que se sale del flujo no escribe nada
+        invalido = self.client.post('/api/v1/triage/respuestas/lote', {
+            'sesion': sesion_lote, 'respuestas': lote[:2] + lote[3:],
+        }, format='json')
+        self.assertEqual(invalido.status_code, 400)
+        self.assertEqual(Respuesta.objects.filter(sesion_id=sesion_lote).count(), 0)
+
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.post('/api/v1/triage/respuestas/lote', {
+                'sesion': sesion_lote, 'respuestas': lote,
+            }, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertLessEqual(len(consultas.captured_queries), 10)
+
+        datos = respuesta.json()['data']
+        self.assertTrue(datos['completado'])
+        self.assertEqual(datos['nivel_triage'], nivel_individual)
+
+        def historial(sesion_id):
+            return list(Respuesta.objects.filter(sesion_id=sesion_id).values_list(
+                'pregunta_id', 'valor', 'informacion_adicional', 'pregunta_siguiente'
+            ))
+        self.assertEqual(historial(sesion_lote), historial(sesion_individual))
+        self.assertEqual(SesionTriage.objects.get(id=sesion_lote).total_respuestas, len(lote))
+
+    def test_respuestas_parten_del_estado_bloqueado_de_la_sesion(self):
+        """Una copia vieja de la sesión no pisa el estado guardado por otra petición."""
+        paciente = crear_paciente('M', 40, 1000000600)
+        datos = self.client.post('/api/v1/triage/iniciar', {'paciente': paciente.id}, format='json').json()
+        vieja = SesionTriage.objects.select_related('paciente').get(pk=datos['data']['sesion']['id'])
+        primera = vieja.pregunta_actual
+
+        # Otra petición responde la primera pregunta después de que se leyó la copia
+        respuesta, _ = AdaptadorSesionTriage.responder(vieja, primera, respuesta_por_defecto(PREGUNTAS[primera]))
+        self.assertEqual(vieja.total_respuestas, 0)
+
+        segunda = respuesta.sesion.pregunta_actual
+        AdaptadorSesionTriage.responder(vieja, segunda, respuesta_por_defecto(PREGUNTAS[segunda]))
+        sesion = SesionTriage.objects.get(pk=vieja.pk)
+        self.assertEqual(sesion.total_respuestas, 2)
+        self.assertNotEqual(sesion.pregunta_actual, segunda)
+
+        # Las comprobaciones usan el estado bloqueado, no el de la copia
+        with self.assertRaisesMessage(ValidationError, 'ya fue respondida'):
+            AdaptadorSesionTriage.responder(vieja, primera, respuesta_por_defecto(PREGUNTAS[primera]))
+        lote = self.client.post('/api/v1/triage/respuestas/lote', {
+            'sesion': vieja.pk, 'respuestas': [{'pregunta': segunda, 'valor': respuesta_por_defecto(PREGUNTAS[segunda])}],
+        }, format='json')
+        self.assertEqual(lote.status_code, 400)
+        self.assertIn(f"Se esperaba la pregunta '{sesion.pregunta_actual}'", str(lote.json()['error']))
+
+        SesionTriage.objects.filter(pk=vieja.pk).update(completado=True)
+        with self.assertRaisesMessage(ValidationError, 'ya fue completada'):
+            AdaptadorSesionTriage.responder(vieja, sesion.pregunta_actual, False)
+        self.assertEqual(Respuesta.objects.filter(sesion_id=vieja.pk).count(), 2)
+
+    def test_respuesta_a_una_pregunta_no_pendiente_se_rechaza(self):
+        """El motor rechaza responder una pregunta distinta de la pendiente, en la respuesta individual y en lote."""
+        paciente = crear_paciente('M', 40, 1000000700)
+        datos = self.client.post('/api/v1/triage/iniciar', {'paciente': paciente.id}, format='json').json()
+        sesion_id = datos['data']['sesion']['id']
+        pendiente = datos['data']['primera_pregunta']['codigo']
+        otra = next(codigo for codigo in PREGUNTAS if codigo != pendiente)
+
+        individual = self.client.post('/api/v1/triage/respuesta', {
+            'sesion': sesion_id, 'pregunta': otra, 'valor': respuesta_por_defecto(PREGUNTAS[otra]),
+        }, format='json')
+        self.assertEqual(individual.status_code, 400)
+        self.assertIn('Se esperaba la pregunta', individual.json()['error'])
+        self.assertIn(pendiente, individual.json()['error'])
+
+        lote = self.client.post('/api/v1/triage/respuestas/lote', {
+            'sesion': sesion_id, 'respuestas': [{'pregunta': otra, 'valor': respuesta_por_defecto(PREGUNTAS[otra])}],
+        }, format='json')
+        self.assertEqual(lote.status_code, 400)
+        self.assertIn(f"Se esperaba la pregunta '{pendiente}'", str(lote.json()['error']))
+
+        sesion = SesionTriage.objects.get(pk=sesion_id)
+        self.assertEqual((sesion.pregunta_actual, sesion.total_respuestas), (pendiente, 0))
+        self.assertFalse(Respuesta.objects.filter(sesion_id=sesion_id).exists())
+
+        estado = MotorTriage.iniciar(40, 'M')
+        with self.assertRaisesMessage(ValidationError, 'Se esperaba la pregunta'):
+            MotorTriage.siguiente_pregunta(estado, otra, respuesta_por_defecto(PREGUNTAS[otra]))
+
+
+class NivelESITestCase(CuestionarioTestCase):
+    """Primera pregunta, ESI acumulado y cierre anticipado por una regla ESI 1."""
+
+    def test_primera_pregunta_desde_tabla_de_entradas(self):
+        """IniciarTriage resuelve la primera pregunta sin consultar preguntas y el grafo valida la tabla."""
+        casos = [('M', 72, 'adulto_mayor_ESI1'), ('F', 70, 'adulto_mayor_ESI1'),
+                 ('F', 30, 'embarazo'), ('M', 30, 'cirugias_previas'), ('NA', 30, 'cirugias_previas')]
+        for indice, (sexo, edad, esperada) in enumerate(casos):
+            paciente = crear_paciente(sexo, edad, 1000000270 + indice)
+            with CaptureQueriesContext(connection) as consultas:
+                datos = self.client.post('/api/v1/triage/iniciar', {'paciente': paciente.id}, format='json').json()
+            self.assertEqual(datos['data']['primera_pregunta']['codigo'], esperada)
+            self.assertEqual(datos['data']['sesion']['pregunta_actual'], esperada)
+            self.assertFalse([c['sql'] for c in consultas.captured_queries if 'triage_pregunta' in c['sql']])
+
+        # Una pregunta de entrada ausente del catálogo falla al compilar, no en cada petición
+        catalogo = {codigo: datos for codigo, datos in PREGUNTAS.items() if codigo != 'adulto_mayor_ESI1'}
+        with self.assertRaises(ImproperlyConfigured):
+            GrafoPreguntas.compilar(catalogo, FLUJO_PREGUNTAS)
+
+    def test_respuesta_esi_1_cierra_el_triage_de_inmediato(self):
+        """Una respuesta que cumple una regla ESI 1 finaliza la sesión, también dentro de un lote."""
+        escenario = dict(ESCENARIOS['cancer'], respuestas={
+            'antecedentes_enfermedades_cronicas': ['Cáncer'],
+            'esta_en_tratamiento': True,
+        })
+        paciente = crear_paciente(escenario['sexo'], escenario['edad'], 1000000250)
+        datos = self.client.post('/api/v1/triage/iniciar', {'paciente': paciente.id}, format='json').json()
+        sesion_id = datos['data']['sesion']['id']
+        pregunta = datos['data']['primera_pregunta']
+
+        lote = []
+        while pregunta:
+            codigo = pregunta['codigo']
+            valor = escenario['respuestas'].get(codigo, respuesta_por_defecto(PREGUNTAS[codigo]))
+            lote.append({'pregunta': codigo, 'valor': valor})
+            datos = self.client.post('/api/v1/triage/respuesta', {
+                'sesion': sesion_id, 'pregunta': codigo, 'valor': valor,
+            }, format='json').json()
+            pregunta = datos['data'].get('siguiente_pregunta')
+
+        self.assertEqual(lote[-1]['pregunta'], 'esta_en_tratamiento')
+        self.assertTrue(datos['data']['completado'])
+        self.assertEqual(datos['data']['nivel_triage'], 1)
+        self.assertIn('esta_en_tratamiento', datos['data']['motivo_cierre'])
+        sesion = SesionTriage.objects.get(id=sesion_id)
+        self.assertTrue(sesion.completado)
+        self.assertIsNone(sesion.pregunta_actual)
+        self.assertEqual(sesion.motivo_cierre, datos['data']['motivo_cierre'])
+
+        # En un lote, las respuestas posteriores al cierre se rechazan
+        paciente = crear_paciente(escenario['sexo'], escenario['edad'], 1000000251)
+        datos = self.client.post('/api/v1/triage/iniciar', {'paciente': paciente.id}, format='json').json()
+        sesion_lote = datos['data']['sesion']['id']
+        sobrante = {'pregunta': 'tipo_cancer', 'valor': 'Otro'}
+        invalido = self.client.post('/api/v1/triage/respuestas/lote', {
+            'sesion': sesion_lote, 'respuestas': lote + [sobrante],
+        }, format='json')
+        self.assertEqual(invalido.status_code, 400)
+
+        respuesta = self.client.post('/api/v1/triage/respuestas/lote', {
+            'sesion': sesion_lote, 'respuestas': lote,
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(respuesta.json()['data']['nivel_triage'], 1)
+        self.assertEqual(respuesta.json()['data']['motivo_cierre'], sesion.motivo_cierre)
+
+    def test_esi_provisional_se_acumula_con_cada_respuesta(self):
+        """El ESI acumulado coincide en cada paso con la evaluación completa y queda visible en el listado."""
+        escenario = ESCENARIOS['multiples_enfermedades_cronicas']
+        paciente = crear_paciente(escenario['sexo'], escenario['edad'], 1000000260)
+        datos = self.client.post('/api/v1/triage/iniciar', {'paciente': paciente.id}, format='json').json()
+        sesion_id = datos['data']['sesion']['id']
+        pregunta = datos['data']['primera_pregunta']
+        compiladas = ReglasESICompiladas.obtener()
+        niveles = []
+
+        while pregunta:
+            codigo = pregunta['codigo']
+            valor = escenario['respuestas'].get(codigo, respuesta_por_defecto(PREGUNTAS[codigo]))
+            datos = self.client.post('/api/v1/triage/respuesta', {
+                'sesion': sesion_id, 'pregunta': codigo, 'valor': valor,
+            }, format='json').json()
+            pregunta = datos['data'].get('siguiente_pregunta')
+
+            sesion = SesionTriage.objects.get(id=sesion_id)
+            respuestas_dict = dict(sesion.respuestas.values_list('pregunta_id', 'valor'))
+            contexto = TriageEvaluationHelper.contexto_paciente(paciente.edad, respuestas_dict)
+            esperadas = sorted(r.id for r in compiladas.reglas_cumplidas(respuestas_dict, contexto))
+            self.assertEqual(sesion.reglas_cumplidas, esperadas, codigo)
+            self.assertEqual(sesion.nivel_provisional, compiladas.nivel_de(esperadas), codigo)
+            niveles.append(sesion.nivel_provisional)
+
+            if pregunta and sesion.nivel_provisional is not None:
+                paciente.refresh_from_db()
+                self.assertEqual(paciente.ultima_sesion_nivel_provisional, sesion.nivel_provisional)
+                self.assertIsNone(paciente.ultima_sesion_nivel)
+
+        self.assertTrue(any(nivel is not None for nivel in niveles[:-1]), niveles)
+        self.assertEqual(datos['data']['nivel_triage'], TriageEvaluationHelper.evaluar_reglas_secuencial(respuestas_dict, contexto))
+
+
+class MotorTriageTestCase(CuestionarioTestCase):
+    """Motor del cuestionario sin base de datos frente a los flujos grabados."""
+
+    def test_motor_reproduce_los_flujos_sin_base_de_datos(self):
+        """
+        MotorTriage recorre cada escenario sin consultas y reproduce las secuencias y niveles
+        grabados antes de extraer el motor; el ESI acumulado coincide en cada paso con la
+        evaluación completa y el nivel final con la evaluación secuencial.
+        """
+        referencia = json.loads(RUTA_FLUJOS_REFERENCIA.read_text(encoding='utf-8'))
+        self.assertEqual(set(referencia), set(ESCENARIOS))
+        self.assertEqual({datos['nivel_triage'] for datos in referencia.values()}, {1, 2, 3, 4, 5})
+
+        compiladas = ReglasESICompiladas.obtener()
+        for indice, (nombre, escenario) in enumerate(ESCENARIOS.items()):
+            secuencia_motor = []
+            with self.assertNumQueries(0):
+                estado = MotorTriage.iniciar(escenario['edad'], escenario['sexo'])
+                codigo, nivel = estado.pregunta_actual, None
+                while codigo:
+                    secuencia_motor.append(codigo)
+                    valor = escenario['respuestas'].get(codigo, respuesta_por_defecto(PREGUNTAS[codigo]))
+                    anterior = estado
+                    estado, codigo, nivel = MotorTriage.siguiente_pregunta(estado, codigo, valor)
+                    # Los estados son inmutables: cada transición devuelve uno nuevo
+                    self.assertEqual(len(anterior.respuestas), len(estado.respuestas) - 1)
+                    # La actualización incremental equivale a reevaluar todas las reglas
+                    completas = compiladas.reglas_cumplidas(estado.respuestas, estado.contexto_paciente())
+                    self.assertEqual(estado.reglas_cumplidas, {regla.id for regla in completas}, (nombre, codigo))
+
+            self.assertTrue(estado.completado, nombre)
+            self.assertEqual(secuencia_motor, referencia[nombre]['secuencia'], nombre)
+            self.assertEqual(nivel, referencia[nombre]['nivel_triage'], nombre)
+            respuestas = dict(estado.respuestas)
+            contexto = TriageEvaluationHelper.contexto_paciente(escenario['edad'], respuestas)
+            self.assertEqual(nivel, TriageEvaluationHelper.evaluar_reglas_secuencial(respuestas, contexto), nombre)
+
+            # La sesión guardada por la API reconstruye las mismas respuestas
+            paciente = crear_paciente(escenario['sexo'], escenario['edad'], 1000000280 + indice)
+            datos = self.client.post('/api/v1/triage/iniciar', {'paciente': paciente.id}, format='json').json()
+            sesion_id = datos['data']['sesion']['id']
+            for codigo in secuencia_motor:
+                valor = escenario['respuestas'].get(codigo, respuesta_por_defecto(PREGUNTAS[codigo]))
+                datos = self.client.post('/api/v1/triage/respuesta', {
+                    'sesion': sesion_id, 'pregunta': codigo, 'valor': valor,
+                }, format='json').json()
+            self.assertEqual(datos['data']['nivel_triage'], referencia[nombre]['nivel_triage'], nombre)
+            sesion = SesionTriage.objects.get(id=sesion_id)
+            self.assertEqual(AdaptadorSesionTriage.cargar(sesion).respuestas, estado.respuestas, nombre)
+
+
+class CatalogoPreguntasTestCase(CuestionarioTestCase):
+    """Sincronización del catálogo y validación de respuestas contra el grafo."""
+
+    def test_sincronizar_catalogo_solo_aplica_diferencias(self):
+        """La sincronización del catálogo escribe solo lo que cambió y sin cambios solo lee."""
+        Pregunta.objects.filter(codigo='embarazo').update(texto='Texto desactualizado')
+        Pregunta.objects.filter(codigo='cirugias_previas').delete()
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = CatalogoPreguntas.sincronizar()
+        self.assertEqual(resultado.creadas, ['cirugias_previas'])
+        self.assertEqual(resultado.actualizadas, ['embarazo'])
+        self.assertEqual(len(consultas.captured_queries), 5)  # lectura, savepoint, insert, update, release
+        self.assertEqual(Pregunta.objects.get(codigo='embarazo').texto, PREGUNTAS['embarazo']['texto'])
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = CatalogoPreguntas.sincronizar()
+        self.assertFalse(resultado.hay_cambios)
+        self.assertEqual(resultado.sin_cambios, len(PREGUNTAS))
+        self.assertEqual(len(consultas.captured_queries), 1)
+
+    def test_respuestas_se_validan_sin_consultar_preguntas(self):
+        """Responder resuelve y valida la pregunta desde el grafo, sin leer la tabla de preguntas."""
+        paciente = crear_paciente('M', 40, 1000000500)
+        datos = self.client.post('/api/v1/triage/iniciar', {'paciente': paciente.id}, format='json').json()
+        sesion_id = datos['data']['sesion']['id']
+        pregunta = datos['data']['primera_pregunta']['codigo']
+
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.post('/api/v1/triage/respuesta', {
+                'sesion': sesion_id, 'pregunta': pregunta, 'valor': respuesta_por_defecto(PREGUNTAS[pregunta]),
+            }, format='json')
+            siguiente = respuesta.json()['data']['siguiente_pregunta']['codigo']
+            lote = self.client.post('/api/v1/triage/respuestas/lote', {
+                'sesion': sesion_id, 'respuestas': [{'pregunta': siguiente, 'valor': respuesta_por_defecto(PREGUNTAS[siguiente])}],
+            }, format='json')
+        self.assertEqual((respuesta.status_code, lote.status_code), (201, 201), lote.content)
+        self.assertFalse([c['sql'] for c in consultas.captured_queries if 'FROM "triage_pregunta"' in c['sql']])
+
+        # Un valor inválido se rechaza con el validador compilado del grafo
+        siguiente = lote.json()['data']['siguiente_pregunta']['codigo']
+        invalida = self.client.post('/api/v1/triage/respuesta', {
+            'sesion': sesion_id, 'pregunta': siguiente, 'valor': 'no es booleano',
+        }, format='json')
+        self.assertEqual(invalida.status_code, 400)
+        self.assertEqual(ValidadoresRespuestas.obtener().validador(siguiente).tipo, GrafoPreguntas.obtener().nodo(siguiente).tipo)
+
+        inexistente = self.client.post('/api/v1/triage/respuesta', {
+            'sesion': sesion_id, 'pregunta': 'no_existe', 'valor': True,
+        }, format='json')
+        self.assertEqual(inexistente.status_code, 400)
+        self.assertIn("'no_existe' no existe", str(inexistente.json()['error']))
@@ -0,0 +1,298 @@
+"""
+Benchmark de regresión de costo por petición del cuestionario de triage.
+
+Reproduce cuestionarios completos (IniciarTriage -> RespuestaCreate -> finalización)
+para los flujos de adulto mayor, embarazo, cáncer, múltiples enfermedades crónicas y
+un escenario por cada nivel ESI del 1 al 4, midiendo por cada llamada el número de consultas
+SQL, el tiempo y la memoria asignada. Cada llamada se mide ejecutando los callbacks on_commit
+que registra (cola de espera, resumen diario de reportes), como ocurre fuera de los tests.
+Las consultas y el nivel ESI son deterministas y se comparan con la línea base en
+benchmarks/linea_base_triage.json: el test falla ante cualquier aumento. El tiempo y la
+memoria dependen de la máquina, no se guardan en la línea base y solo se informan.
+
+Los tests funcionales del cuestionario están en tests_cuestionario.py y reutilizan los
+escenarios y ayudantes de este módulo.
+
+Para regenerar la línea base o ver el informe de tiempo y memoria:
+    TRIAGE_BENCHMARK_ACTUALIZAR=1 python manage.py test triage.tests_rendimiento
+    TRIAGE_BENCHMARK_INFORME=1 python manage.py test triage.tests_rendimiento
+"""
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from pacientes.cola_espera import ColaEspera
+from pacientes.models import Paciente
+from triage.models import Pregunta
+from triage.utils.preguntas import PREGUNTAS
+
+RUTA_LINEA_BASE = Path(__file__).resolve().parent / 'benchmarks' / 'linea_base_triage.json'
+
+# Métricas deterministas que se guardan en la línea base y no pueden aumentar
+METRICAS_CONSULTAS = ('consultas_totales', 'consultas_max_llamada')
+
+OPCIONES_NINGUNA = ("Ninguna de las anteriores", "Ninguno de los anteriores")
+
+ESCENARIOS = {
+    'adulto_mayor': {
+        'sexo': 'M',
+        'edad': 72,
+        'respuestas': {},
+    },
+    'embarazo': {
+        'sexo': 'F',
+        'edad': 28,
+        'respuestas': {
+            'embarazo': True,
+            'semanas_embarazo': '14-17 semanas',
+        },
+    },
+    'cancer': {
+        'sexo': 'M',
+        'edad': 40,
+        'respuestas': {
+            'antecedentes_enfermedades_cronicas': ['Cáncer'],
+            'esta_en_tratamiento': False,
+        },
+    },
+    'multiples_enfermedades_cronicas': {
+        'sexo': 'M',
+        'edad': 50,
+        'respuestas': {
+            'antecedentes_enfermedades_cronicas': [
+                'Diabetes 1/2', 'Asma', 'Hipertensión arterial',
+                'Enfermedad pulmonar obstructiva crónica (EPOC)',
+            ],
+            'sintoma_relacionado_diabetes': True,
+            'sintoma_relacionado_asma': True,
+            'sintoma_relacionado_hipertension': True,
+        },
+    },
+    'esi_1_mareo_severo': {
+        'sexo': 'M',
+        'edad': 40,
+        'respuestas': {
+            'mareo_severo': True,
+        },
+    },
+    'esi_2_cianosis': {
+        'sexo': 'M',
+        'edad': 40,
+        'respuestas': {
+            'cianosis': True,
+        },
+    },
+    'esi_3_palpitaciones': {
+        'sexo': 'M',
+        'edad': 40,
+        'respuestas': {
+            'palpitaciones_rápidas': True,
+        },
+    },
+    'esi_4_sintomas_leves': {
+        'sexo': 'M',
+        'edad': 40,
+        'respuestas': {
+            'sintomas_leves': True,
+        },
+    },
+}
+
+
+def respuesta_por_defecto(pregunta):
+    """Respuesta determinista de menor severidad para una pregunta sin valor explícito."""
+    tipo = pregunta['tipo']
+    opciones = pregunta.get('opciones') or []
+
+    if tipo == 'boolean':
+        return False
+    if tipo in ('choice', 'multi_choice'):
+        valor = next((o for o in opciones if o in OPCIONES_NINGUNA), opciones[0])
+        return [valor] if tipo == 'multi_choice' else valor
+    if tipo == 'scale':
+        return min(opciones)
+    if tipo == 'numeric':
+        return 0
+    return 'Sin antecedentes relevantes'
+
+
+def crear_preguntas():
+    """Carga el catálogo de preguntas de utils/preguntas.py en la tabla Pregunta."""
+    Pregunta.objects.bulk_create([
+        Pregunta(
+            codigo=codigo,
+            texto=datos.get('texto', ''),
+            tipo=datos.get('tipo', 'text'),
+            opciones=datos.get('opciones', None),
+        )
+        for codigo, datos in PREGUNTAS.items()
+    ])
+
+
+def crear_paciente(sexo, edad, documento):
+    """Paciente con los campos obligatorios, del sexo y la edad del escenario."""
+    hoy = date.today()
+    return Paciente.objects.create(
+        primer_nombre='Paciente',
+        primer_apellido='Benchmark',
+        fecha_nacimiento=date(hoy.year - edad - 1, 1, 1),
+        tipo_documento='CC',
+        numero_documento=str(documento),
+        sexo=sexo,
+        prefijo_telefonico='+57',
+        telefono='3001234567',
+        regimen_eps='SISBEN',
+        eps='SURA',
+        sintomas_iniciales='Benchmark de triage',
+    )
+
+
+class TriageRendimientoTest(TestCase):
+    """Compara el costo de cada flujo completo contra la línea base registrada."""
+
+    @classmethod
+    def setUpTestData(cls):
+        crear_preguntas()
+
+    def setUp(self):
+        self.client = APIClient()
+        # Cola de la sala de espera cargada en el proceso, como tras la primera lectura del tablero:
+        # los cambios de sesión la refrescan al confirmar la transacción
+        ColaEspera.invalidar()
+        ColaEspera.obtener()
+        self.addCleanup(ColaEspera.invalidar)
+
+    def _medir(self, endpoint, pregunta, metodo, *args, **kwargs):
+        """Ejecuta una llamada a la API registrando consultas, tiempo y memoria."""
+        # Recolectar antes de medir: si el GC libera basura previa durante la llamada, el pico varía
+        gc.collect()
+        tracemalloc.reset_peak()
+        memoria_inicial = tracemalloc.get_traced_memory()[0]
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            # TestCase no confirma transacciones: los callbacks on_commit se ejecutan aquí
+            with self.captureOnCommitCallbacks(execute=True):
+                respuesta = metodo(*args, format='json', **kwargs)
+            transcurrido = time.perf_counter() - inicio
+        memoria_pico = tracemalloc.get_traced_memory()[1] - memoria_inicial
+
+        self.assertLess(respuesta.status_code, 300, respuesta.content)
+        medicion = {
+            'endpoint': endpoint,
+            'pregunta': pregunta,
+            'consultas': len(consultas.captured_queries),
+            'tiempo_ms': round(transcurrido * 1000, 3),
+            'memoria_pico_kb': round(memoria_pico / 1024, 1),
+        }
+        return respuesta.json(), medicion
+
+    def _ejecutar_escenario(self, indice, nombre, escenario):
+        paciente = crear_paciente(escenario['sexo'], escenario['edad'], 1000000000 + indice)
+        llamadas = []
+
+        datos, medicion = self._medir('iniciar', None, self.client.post, '/api/v1/triage/iniciar', {'paciente': paciente.id})
+        llamadas.append(medicion)
+        sesion_id = datos['data']['sesion']['id']
+        pregunta = datos['data']['primera_pregunta']
+        nivel_triage = None
+
+        while pregunta:
+            codigo = pregunta['codigo']
+            valor = escenario['respuestas'].get(codigo, respuesta_por_defecto(PREGUNTAS[codigo]))
+            datos, medicion = self._medir('respuesta', codigo, self.client.post, '/api/v1/triage/respuesta', {
+                'sesion': sesion_id,
+                'pregunta': codigo,
+                'valor': valor,
+            })
+            self.assertTrue(datos['exito'], datos)
+
+            if datos['data'].get('completado'):
+                medicion['endpoint'] = 'finalizacion'
+                nivel_triage = datos['data']['nivel_triage']
+            llamadas.append(medicion)
+            pregunta = datos['data'].get('siguiente_pregunta')
+
+        self.assertIsNotNone(nivel_triage, f"El escenario '{nombre}' no completó el triage")
+        return {
+            'nivel_triage': nivel_triage,
+            'llamadas': len(llamadas),
+            'consultas_totales': sum(m['consultas'] for m in llamadas),
+            'consultas_max_llamada': max(m['consultas'] for m in llamadas),
+            'tiempo_total_ms': round(sum(m['tiempo_ms'] for m in llamadas), 3),
+            'memoria_pico_kb': max(m['memoria_pico_kb'] for m in llamadas),
+            'detalle': llamadas,
+        }
+
+    @staticmethod
+    def _linea_base(resultado):
+        """Parte determinista de un resultado: sin tiempos ni memoria."""
+        return {
+            'nivel_triage': resultado['nivel_triage'],
+            'llamadas': resultado['llamadas'],
+            **{clave: resultado[clave] for clave in METRICAS_CONSULTAS},
+            'detalle': [
+                {campo: medicion[campo] for campo in ('endpoint', 'pregunta', 'consultas')}
+                for medicion in resultado['detalle']
+            ],
+        }
+
+    @staticmethod
+    def _informar(resultados):
+        """Informe de tiempo y memoria por flujo; no forma parte de la comparación."""
+        lineas = ['', 'Tiempo y memoria por flujo (solo informativo):']
+        for nombre, resultado in resultados.items():
+            lineas.append(
+                f"  {nombre}: {resultado['tiempo_total_ms']:.1f} ms en {resultado['llamadas']} llamadas, "
+                f"pico {resultado['memoria_pico_kb']:.1f} KB"
+            )
+        sys.stderr.write('\n'.join(lineas) + '\n')
+
+    def test_costo_por_flujo_no_supera_linea_base(self):
+        tracemalloc.start()
+        try:
+            # Calentamiento: descartar el costo de importaciones y cachés de la primera petición
+            self._ejecutar_escenario(len(ESCENARIOS), 'calentamiento', ESCENARIOS['adulto_mayor'])
+
+            resultados = {
+                nombre: self._ejecutar_escenario(indice, nombre, escenario)
+                for indice, (nombre, escenario) in enumerate(ESCENARIOS.items())
+            }
+        finally:
+            tracemalloc.stop()
+
+        if os.environ.get('TRIAGE_BENCHMARK_INFORME'):
+            self._informar(resultados)
+
+        if os.environ.get('TRIAGE_BENCHMARK_ACTUALIZAR'):
+            RUTA_LINEA_BASE.parent.mkdir(parents=True, exist_ok=True)
+            contenido = {'escenarios': {nombre: self._linea_base(r) for nombre, r in resultados.items()}}
+            RUTA_LINEA_BASE.write_text(json.dumps(contenido, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+            return
+
+        self.assertTrue(RUTA_LINEA_BASE.exists(), f"No existe la línea base {RUTA_LINEA_BASE}")
+        linea_base = json.loads(RUTA_LINEA_BASE.read_text(encoding='utf-8'))
+
+        regresiones = []
+        for nombre, actual in resultados.items():
+            base = linea_base['escenarios'].get(nombre)
+            if base is None:
+                regresiones.append(f"{nombre}: no existe en la línea base")
+                continue
+
+            if actual['nivel_triage'] != base['nivel_triage']:
+                regresiones.append(f"{nombre}: nivel ESI {actual['nivel_triage']} (línea base {base['nivel_triage']})")
+            for clave in METRICAS_CONSULTAS:
+                if actual[clave] > base[clave]:
+                    regresiones.append(f"{nombre}: {clave} = {actual[clave]} (línea base {base[clave]})")
+
+        self.assertFalse(regresiones, "Regresiones de rendimiento:\n" + "\n".join(regresiones))
@@ -5,6 +5,7 @@ from .views import (
     SesionTriageListView,
     SesionTriageDetailView,
     RespuestaCreate, 
+    RespuestaLoteCreate,
     IniciarTriage,
     CargarPreguntas
 )
@@ -20,6 +21,7 @@ urlpatterns = [
     
     # Otras rutas
     path('respuesta', RespuestaCreate.as_view(), name='respuesta-create'),
+    path('respuestas/lote', RespuestaLoteCreate.as_view(), name='respuesta-lote-create'),
     path('iniciar', IniciarTriage.as_view(), name='iniciar-triage'),
     path('cargar-preguntas', CargarPreguntas.as_view(), name='cargar-preguntas'),
 ]
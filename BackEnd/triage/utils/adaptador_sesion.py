@@ -0,0 +1,131 @@
+"""
+Persistencia del motor de triage.
+
+AdaptadorSesionTriage es el único punto en que el cuestionario lee o escribe la base de
+datos: carga el EstadoTriage de una SesionTriage con una consulta, y guarda las respuestas
+y el estado resultante de MotorTriage (utils/motor_triage.py) en una sola transacción.
+La sesión se relee con su fila bloqueada dentro de esa transacción, de modo que dos
+peticiones sobre la misma sesión se aplican una tras otra y ninguna parte de un estado viejo.
+"""
+from types import MappingProxyType
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .motor_triage import EstadoTriage, MotorTriage
+
+
+class AdaptadorSesionTriage:
+    """Traduce entre SesionTriage/Respuesta y el estado en memoria del motor."""
+
+    @classmethod
+    def bloquear(cls, sesion):
+        """
+        Relee la sesión con su fila bloqueada hasta el final de la transacción en curso.
+        Conserva el paciente ya cargado: su edad y sexo no forman parte del estado que se escribe.
+        """
+        from triage.models import SesionTriage  # Import local para evitar circular
+
+        bloqueada = SesionTriage.objects.select_for_update().get(pk=sesion.pk)
+        if SesionTriage.paciente.is_cached(sesion):
+            bloqueada.paciente = sesion.paciente
+        return bloqueada
+
+    @classmethod
+    def cargar(cls, sesion):
+        """
+        Estado de la sesión con una sola consulta de respuestas.
+        Usa sesion.paciente: conviene obtener la sesión con select_related('paciente').
+        """
+        from triage.models import Respuesta  # Import local para evitar circular
+
+        respuestas = {}
+        informacion_adicional = {}
+        filas = Respuesta.objects.filter(sesion=sesion).order_by('timestamp').values_list(
+            'pregunta_id', 'valor', 'informacion_adicional'
+        )
+        for codigo, valor, info in filas:
+            respuestas[codigo] = valor
+            if info:
+                informacion_adicional[codigo] = info
+
+        edad, sexo = sesion.paciente.edad, sesion.paciente.sexo
+        pregunta_actual = sesion.pregunta_actual
+        if pregunta_actual is None and not respuestas and not sesion.completado:
+            # Sesión sin pregunta pendiente guardada: el cuestionario empieza por la de entrada
+            pregunta_actual = MotorTriage.iniciar(edad, sexo).pregunta_actual
+
+        return EstadoTriage(
+            edad=edad,
+            sexo=sexo,
+            respuestas=MappingProxyType(respuestas),
+            informacion_adicional=MappingProxyType(informacion_adicional),
+            pregunta_actual=pregunta_actual,
+            reglas_cumplidas=frozenset(sesion.reglas_cumplidas or ()),
+            nivel_provisional=sesion.nivel_provisional,
+            completado=sesion.completado,
+            nivel_triage=sesion.nivel_triage,
+        )
+
+    @classmethod
+    def respuesta(cls, sesion, estado, codigo, valor, informacion_adicional=None, **campos):
+        """Respuesta (sin guardar) con la pregunta siguiente y la información normalizada por el motor."""
+        from triage.models import Respuesta  # Import local para evitar circular
+
+        return Respuesta(
+            sesion=sesion,
+            pregunta_id=codigo,
+            valor=valor,
+            informacion_adicional=estado.informacion_adicional.get(codigo, informacion_adicional),
+            pregunta_siguiente=estado.pregunta_actual,
+            **campos
+        )
+
+    @classmethod
+    def responder(cls, sesion, codigo, valor, informacion_adicional=None):
+        """
+        Registra una respuesta: resuelve con el motor la siguiente pregunta y el ESI y guarda
+        la respuesta y la sesión. Devuelve la respuesta creada (respuesta.sesion es la sesión
+        actualizada) y el nuevo estado.
+        Lanza ValidationError si la sesión ya terminó o la pregunta ya fue respondida.
+        """
+        with transaction.atomic():
+            sesion = cls.bloquear(sesion)
+            anterior = cls.cargar(sesion)
+            if anterior.completado:
+                raise serializers.ValidationError("La sesión de triage ya fue completada")
+            if codigo in anterior.respuestas:
+                raise serializers.ValidationError(f"La pregunta '{codigo}' ya fue respondida")
+
+            estado, _, _ = MotorTriage.siguiente_pregunta(anterior, codigo, valor, informacion_adicional)
+            respuesta = cls.respuesta(sesion, estado, codigo, valor, informacion_adicional)
+            respuesta.save(force_insert=True)
+            cls.guardar(sesion, anterior, estado)
+        return respuesta, estado
+
+    @classmethod
+    def guardar(cls, sesion, anterior, estado):
+        """
+        Materializa en la sesión la pregunta pendiente, el número de respuestas y el ESI
+        acumulado; si el cuestionario terminó, la marca como completada con su nivel final.
+        El nivel provisional solo se escribe si cambió, porque actualiza también al paciente.
+        """
+        sesion.total_respuestas = len(estado.respuestas)
+        sesion.pregunta_actual = estado.pregunta_actual
+        sesion.reglas_cumplidas = sorted(estado.reglas_cumplidas)
+        sesion.nivel_provisional = estado.nivel_provisional
+
+        if not estado.completado:
+            campos = ['pregunta_actual', 'total_respuestas', 'reglas_cumplidas']
+            if estado.nivel_provisional != anterior.nivel_provisional:
+                campos.append('nivel_provisional')
+            sesion.save(update_fields=campos)
+            return
+
+        sesion.completado = True
+        sesion.fecha_fin = timezone.now()
+        sesion.nivel_triage = estado.nivel_triage
+        if estado.regla_cierre is not None:
+            sesion.motivo_cierre = f"Cierre anticipado: {estado.regla_cierre.describir()}"
+        sesion.save()
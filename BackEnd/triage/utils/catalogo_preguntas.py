@@ -0,0 +1,115 @@
+"""
+Sincronización del catálogo de preguntas (PREGUNTAS) con la tabla de preguntas.
+
+Compara el hash del contenido de cada pregunta con el de la fila guardada y aplica
+solo las diferencias con bulk_create/bulk_update en una única transacción. Si nada
+cambió, la sincronización se reduce a una consulta de lectura.
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from .preguntas import PREGUNTAS
+
+CAMPOS_PREGUNTA = ('texto', 'tipo', 'opciones')
+
+
+def _hash_contenido(contenido):
+    serializado = json.dumps(contenido, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+
+
+def hash_catalogo(preguntas):
+    """Hash estable del contenido del catálogo de preguntas."""
+    return _hash_contenido(preguntas)
+
+
+def datos_pregunta(datos):
+    """Valores de los campos de Pregunta para una entrada de PREGUNTAS."""
+    return {
+        'texto': datos.get('texto', ''),
+        'tipo': datos.get('tipo', 'text'),
+        'opciones': datos.get('opciones', None),
+    }
+
+
+def hash_pregunta(texto, tipo, opciones):
+    """Hash del contenido persistido de una pregunta."""
+    return _hash_contenido([texto, tipo, opciones])
+
+
+@dataclass
+class ResultadoSincronizacion:
+    """Resumen de una sincronización del catálogo."""
+    version: str
+    creadas: list = field(default_factory=list)
+    actualizadas: list = field(default_factory=list)
+    sin_cambios: int = 0
+    # Códigos presentes en la tabla pero no en el catálogo; no se eliminan para conservar las respuestas
+    obsoletas: list = field(default_factory=list)
+
+    @property
+    def hay_cambios(self):
+        return bool(self.creadas or self.actualizadas)
+
+    def resumen(self):
+        return (
+            f'{len(self.creadas)} creadas, {len(self.actualizadas)} actualizadas, '
+            f'{self.sin_cambios} sin cambios, {len(self.obsoletas)} obsoletas'
+        )
+
+
+class CatalogoPreguntas:
+    """
+    Motor de sincronización idempotente del catálogo de preguntas.
+    """
+
+    @classmethod
+    def sincronizar(cls, preguntas=None, lote=500):
+        """
+        Sincroniza la tabla de preguntas con el catálogo y devuelve el ResultadoSincronizacion.
+        Ejecutarlo de nuevo sin cambios en el catálogo no escribe nada.
+        """
+        from triage.models import Pregunta  # Import local para evitar circular
+
+        preguntas = PREGUNTAS if preguntas is None else preguntas
+        resultado = ResultadoSincronizacion(version=hash_catalogo(preguntas))
+
+        existentes = {
+            codigo: (hash_pregunta(texto, tipo, opciones), Pregunta(codigo=codigo, texto=texto, tipo=tipo, opciones=opciones))
+            for codigo, texto, tipo, opciones in Pregunta.objects.values_list('codigo', *CAMPOS_PREGUNTA)
+        }
+
+        nuevas = []
+        modificadas = []
+        for codigo, datos in preguntas.items():
+            valores = datos_pregunta(datos)
+            existente = existentes.get(codigo)
+
+            if existente is None:
+                nuevas.append(Pregunta(codigo=codigo, **valores))
+                continue
+
+            hash_actual, pregunta = existente
+            if hash_actual == hash_pregunta(valores['texto'], valores['tipo'], valores['opciones']):
+                resultado.sin_cambios += 1
+                continue
+
+            for campo, valor in valores.items():
+                setattr(pregunta, campo, valor)
+            modificadas.append(pregunta)
+
+        resultado.creadas = [pregunta.codigo for pregunta in nuevas]
+        resultado.actualizadas = [pregunta.codigo for pregunta in modificadas]
+        resultado.obsoletas = sorted(codigo for codigo in existentes if codigo not in preguntas)
+
+        if nuevas or modificadas:
+            with transaction.atomic():
+                if nuevas:
+                    Pregunta.objects.bulk_create(nuevas, batch_size=lote)
+                if modificadas:
+                    Pregunta.objects.bulk_update(modificadas, list(CAMPOS_PREGUNTA), batch_size=lote)
+
+        return resultado
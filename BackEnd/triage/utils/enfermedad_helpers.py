@@ -64,61 +64,66 @@ class EnfermedadEvaluationHelper:
         return None
     
     @classmethod
-    def obtener_enfermedades_de_sesion(cls, sesion):
+    def enfermedades_de_respuestas(cls, respuestas, informacion_adicional):
         """
-        Obtiene las enfermedades crónicas originalmente seleccionadas en la sesión.
+        Enfermedades crónicas seleccionadas a partir del mapa de respuestas en memoria.
+        Prioriza la lista normalizada guardada en informacion_adicional.
         """
-        from triage.models import Respuesta  # Import local para evitar circular
-        
-        try:
-            # Buscar la respuesta de enfermedades crónicas
-            respuesta_enfermedades = Respuesta.objects.get(
-                sesion=sesion, 
-                pregunta__codigo='antecedentes_enfermedades_cronicas'
-            )
-            
-            if respuesta_enfermedades.informacion_adicional:
-                return respuesta_enfermedades.informacion_adicional.split(',')
-            
-            return cls.obtener_enfermedades_seleccionadas(respuesta_enfermedades.valor)
-            
-        except Respuesta.DoesNotExist:
+        codigo = 'antecedentes_enfermedades_cronicas'
+        if codigo not in respuestas:
             return []
+        
+        if informacion_adicional.get(codigo):
+            return informacion_adicional[codigo].split(',')
+        
+        return cls.obtener_enfermedades_seleccionadas(respuestas[codigo])
     
     @classmethod
-    def obtener_enfermedades_evaluadas(cls, sesion):
+    def enfermedades_evaluadas_de_respuestas(cls, respuestas):
         """
-        Obtiene las enfermedades que ya han sido completamente evaluadas.
-        Una enfermedad se considera completamente evaluada si se respondió 
-        la pregunta de síntomas relacionados.
+        Enfermedades completamente evaluadas según el mapa de respuestas en memoria.
+        Una enfermedad se considera evaluada si se respondió "No" a la pregunta de
+        síntomas relacionados, o si se respondió una pregunta de cierre de su flujo.
         """
-        from triage.models import Respuesta
-        
         enfermedades_evaluadas = []
-        respuestas = Respuesta.objects.filter(sesion=sesion)
         
         for enfermedad, prefijo in cls.PREFIJOS_POR_ENFERMEDAD.items():
             pregunta_sintoma = f'sintoma_relacionado_{enfermedad}'
-            respuesta_sintoma = respuestas.filter(pregunta__codigo=pregunta_sintoma).first()
+            if pregunta_sintoma not in respuestas:
+                continue
             
-            if respuesta_sintoma:
-                if respuesta_sintoma.valor in [False, "False", "No", "false"]:
+            if respuestas[pregunta_sintoma] in [False, "False", "No", "false"]:
+                enfermedades_evaluadas.append(enfermedad)
+                continue
+            
+            for codigo in respuestas:
+                if codigo.startswith(prefijo) and cls._es_pregunta_cierre(codigo):
                     enfermedades_evaluadas.append(enfermedad)
-                    continue
-                
-                respuestas_especificas = respuestas.filter(pregunta__codigo__startswith=prefijo)
-                
-                if respuestas_especificas.exists():
-                    for resp in respuestas_especificas:
-                        codigo = resp.pregunta.codigo
-                        if (codigo.endswith('_ESI1') or codigo.endswith('_ESI2') or 
-                            codigo.endswith('_ESI3') or codigo.endswith('_ESI45') or
-                            cls._es_pregunta_final_flujo(codigo)):
-                            enfermedades_evaluadas.append(enfermedad)
-                            break
+                    break
         
         return enfermedades_evaluadas
     
+    @classmethod
+    def flujo_especifico_completado_en(cls, respuestas):
+        """
+        Verifica en el mapa de respuestas si se completó al menos un flujo específico
+        (usuario respondió "Sí" a síntomas relacionados y siguió el flujo específico).
+        """
+        for enfermedad, prefijo in cls.PREFIJOS_POR_ENFERMEDAD.items():
+            pregunta_sintoma = f'sintoma_relacionado_{enfermedad}'
+            if respuestas.get(pregunta_sintoma) is True:
+                if any(codigo.startswith(prefijo) for codigo in respuestas):
+                    return True
+        
+        return False
+    
+    @classmethod
+    def _es_pregunta_cierre(cls, codigo):
+        """Pregunta de nivel ESI o última pregunta del flujo específico de una enfermedad."""
+        return (codigo.endswith('_ESI1') or codigo.endswith('_ESI2') or 
+                codigo.endswith('_ESI3') or codigo.endswith('_ESI45') or
+                cls._es_pregunta_final_flujo(codigo))
+    
     @classmethod
     def _es_pregunta_final_flujo(cls, codigo_pregunta):
         """
@@ -131,24 +136,3 @@ class EnfermedadEvaluationHelper:
                 return flujo.get("siguiente") == "DINAMICO_SIGUIENTE_ENFERMEDAD"
             return flujo == "DINAMICO_SIGUIENTE_ENFERMEDAD"
         return False
-    
-    @classmethod
-    def se_completo_flujo_especifico(cls, sesion):
-        """
-        Verifica si se completó al menos un flujo específico de enfermedad
-        (usuario respondió "Sí" a síntomas relacionados y siguió el flujo específico).
-        """
-        from triage.models import Respuesta
-        
-        respuestas = Respuesta.objects.filter(sesion=sesion)
-        
-        for enfermedad, prefijo in cls.PREFIJOS_POR_ENFERMEDAD.items():
-            pregunta_sintoma = f'sintoma_relacionado_{enfermedad}'
-            respuesta_sintoma = respuestas.filter(pregunta__codigo=pregunta_sintoma).first()
-            
-            if respuesta_sintoma and respuesta_sintoma.valor is True:
-                respuestas_especificas = respuestas.filter(pregunta__codigo__startswith=prefijo)
-                if respuestas_especificas.exists():
-                    return True
-        
-        return False
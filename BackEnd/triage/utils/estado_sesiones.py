@@ -0,0 +1,81 @@
+"""
+Pregunta pendiente y número de respuestas materializados en SesionTriage.
+
+Los recalcula desde las respuestas guardadas para las sesiones creadas antes de que
+existieran esas columnas; lo usan la migración de datos y el comando
+materializar_estado_sesiones.
+"""
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+
+
+class EstadoSesionesHelper:
+    """
+    Rellena pregunta_actual y total_respuestas por lotes de sesiones.
+    Los modelos pueden pasarse explícitamente para usar los modelos históricos en migraciones.
+    """
+
+    @staticmethod
+    def _modelos(sesiones, respuestas):
+        if sesiones is None or respuestas is None:
+            from triage.models import SesionTriage, Respuesta  # Import local para evitar circular
+            return SesionTriage, Respuesta
+        return sesiones, respuestas
+
+    @classmethod
+    def rellenar(cls, lote=500, solo_activas=False, sesiones=None, respuestas=None):
+        """Recorre las sesiones por lotes de claves primarias. Devuelve (revisadas, actualizadas)."""
+        sesiones, respuestas = cls._modelos(sesiones, respuestas)
+        queryset = sesiones.objects.order_by('pk')
+        if solo_activas:
+            queryset = queryset.filter(completado=False)
+
+        revisadas = 0
+        actualizadas = 0
+        ultimo_id = 0
+        while True:
+            ids = list(queryset.filter(pk__gt=ultimo_id).values_list('pk', flat=True)[:lote])
+            if not ids:
+                break
+            revisadas += len(ids)
+            actualizadas += cls.materializar(ids, lote, sesiones, respuestas)
+            ultimo_id = ids[-1]
+        return revisadas, actualizadas
+
+    @classmethod
+    def materializar(cls, ids, lote=500, sesiones=None, respuestas=None):
+        """
+        Recalcula y guarda el estado de un lote de sesiones con sus filas bloqueadas: una
+        respuesta concurrente espera a que termine el lote o ya está incluida en el conteo.
+        Devuelve el número de sesiones que cambiaron.
+        """
+        sesiones, respuestas = cls._modelos(sesiones, respuestas)
+        ultima_pregunta_siguiente = respuestas.objects.filter(
+            sesion=OuterRef('pk')
+        ).order_by('-timestamp').values('pregunta_siguiente')[:1]
+
+        with transaction.atomic():
+            # Bloquear antes de leer; el bloqueo no se combina con la agregación de la lectura
+            list(sesiones.objects.select_for_update().filter(pk__in=ids).values_list('pk', flat=True))
+            filas = sesiones.objects.filter(pk__in=ids).order_by().annotate(
+                conteo=Count('respuestas'),
+                ultima_pregunta_siguiente=Subquery(ultima_pregunta_siguiente),
+            )
+
+            pendientes = []
+            for sesion in filas:
+                if sesion.completado or not sesion.conteo:
+                    # Completadas: no hay pregunta pendiente. Sin respuestas: se usa la primera pregunta
+                    pregunta_actual = None
+                else:
+                    pregunta_actual = sesion.ultima_pregunta_siguiente
+
+                if sesion.pregunta_actual == pregunta_actual and sesion.total_respuestas == sesion.conteo:
+                    continue
+
+                sesion.pregunta_actual = pregunta_actual
+                sesion.total_respuestas = sesion.conteo
+                pendientes.append(sesion)
+
+            sesiones.objects.bulk_update(pendientes, ['pregunta_actual', 'total_respuestas'], batch_size=lote)
+        return len(pendientes)
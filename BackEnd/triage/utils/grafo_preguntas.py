@@ -0,0 +1,205 @@
+"""
+Grafo compilado de preguntas del triage.
+
+Se construye una sola vez por proceso (en TriageConfig.ready) a partir de PREGUNTAS
+y FLUJO_PREGUNTAS. La resolución de la primera y la siguiente pregunta y el payload que
+devuelve PreguntaSerializer se sirven desde memoria, sin consultar la tabla de preguntas.
+
+Es una caché del catálogo en código, no de la tabla: la tabla de preguntas se sincroniza
+desde ese mismo catálogo (CatalogoPreguntas) y las ediciones hechas directamente en la base
+de datos no cambian el flujo. Cambiar el catálogo requiere desplegar el código y reiniciar
+los procesos, por lo que el grafo no se invalida en tiempo de ejecución.
+"""
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from django.core.exceptions import ImproperlyConfigured
+
+from utils.choices import SEX_CHOICES
+
+from .preguntas import PREGUNTAS, FLUJO_PREGUNTAS
+
+# Marcador de FLUJO_PREGUNTAS que delega en el flujo dinámico de enfermedades crónicas
+CODIGO_DINAMICO = "DINAMICO_SIGUIENTE_ENFERMEDAD"
+
+# Los pacientes con más de esta edad entran por el flujo de adulto mayor
+EDAD_ADULTO_MAYOR = 65
+
+
+def codigo_de_entrada(es_adulto_mayor, sexo, flujo):
+    """
+    Primera pregunta del cuestionario: adultos mayores primero, luego mujeres
+    (embarazo) y para el resto el inicio de FLUJO_PREGUNTAS.
+    """
+    if es_adulto_mayor:
+        return 'adulto_mayor_ESI1'
+    if sexo == 'F':
+        return 'embarazo'
+    return flujo.get("inicio")
+
+
+@dataclass(frozen=True)
+class NodoPregunta:
+    """
+    Nodo inmutable del grafo: datos de la pregunta y sus transiciones de salida.
+    """
+    codigo: str
+    texto: str
+    tipo: str
+    opciones: tuple
+    payload: MappingProxyType
+    # Transiciones por valor exacto de la respuesta (sin la clave "siguiente")
+    transiciones: MappingProxyType
+    siguiente: str = None
+    tiene_flujo: bool = False
+
+    def siguiente_codigo(self, valor_respuesta):
+        """
+        Código de la siguiente pregunta para el valor dado.
+        Primero la coincidencia exacta según FLUJO_PREGUNTAS (para listas, el primer
+        elemento con transición) y luego la regla "siguiente".
+        """
+        if not self.tiene_flujo:
+            return None
+
+        exacto = None
+        if isinstance(valor_respuesta, list):
+            for valor in valor_respuesta:
+                if valor in self.transiciones:
+                    exacto = self.transiciones[valor]
+                    break
+        elif valor_respuesta in self.transiciones:
+            exacto = self.transiciones[valor_respuesta]
+
+        return exacto or self.siguiente
+
+    def como_pregunta(self):
+        """Construye una instancia (no persistida) de Pregunta con los datos del nodo."""
+        from triage.models import Pregunta  # Import local para evitar circular
+
+        return Pregunta(
+            codigo=self.codigo,
+            texto=self.texto,
+            tipo=self.tipo,
+            opciones=list(self.opciones) if self.opciones is not None else None,
+        )
+
+
+class GrafoPreguntas:
+    """
+    Grafo de preguntas compilado e inmutable.
+    Mantiene una única instancia por proceso, compilada en el primer acceso.
+    """
+    _instancia = None
+    _lock = threading.Lock()
+
+    def __init__(self, nodos, inicio, entradas):
+        self.nodos = MappingProxyType(nodos)
+        self.inicio = inicio
+        # (es adulto mayor, sexo) -> nodo de la primera pregunta; sexo None = cualquier otro
+        self.entradas = MappingProxyType(entradas)
+
+    @classmethod
+    def compilar(cls, preguntas, flujo):
+        """
+        Compila el catálogo de preguntas y las reglas de flujo en un grafo.
+        Falla si alguna transición o primera pregunta no existe en el catálogo.
+        """
+        from triage.models import Pregunta  # Import local para evitar circular
+        from triage.serializers import PreguntaSerializer
+
+        nodos = {}
+        for codigo, datos in preguntas.items():
+            opciones = datos.get('opciones', None)
+            regla = flujo.get(codigo)
+            transiciones = {}
+            siguiente = None
+
+            if isinstance(regla, dict):
+                transiciones = {valor: destino for valor, destino in regla.items() if valor != "siguiente"}
+                siguiente = regla.get("siguiente")
+            elif regla is not None:
+                siguiente = regla
+
+            pregunta = Pregunta(
+                codigo=codigo,
+                texto=datos.get('texto', ''),
+                tipo=datos.get('tipo', 'text'),
+                opciones=opciones,
+            )
+            nodos[codigo] = NodoPregunta(
+                codigo=codigo,
+                texto=pregunta.texto,
+                tipo=pregunta.tipo,
+                opciones=tuple(opciones) if opciones is not None else None,
+                payload=MappingProxyType(dict(PreguntaSerializer(pregunta).data)),
+                transiciones=MappingProxyType(transiciones),
+                siguiente=siguiente,
+                tiene_flujo=codigo in flujo,
+            )
+
+        cls._validar_destinos(nodos, flujo)
+        return cls(nodos, flujo.get("inicio"), cls._compilar_entradas(nodos, flujo))
+
+    @classmethod
+    def _compilar_entradas(cls, nodos, flujo):
+        """Tabla de primeras preguntas por (es adulto mayor, sexo), validada contra el catálogo."""
+        entradas = {}
+        for es_adulto_mayor in (True, False):
+            for sexo in [codigo for codigo, _ in SEX_CHOICES] + [None]:
+                codigo = codigo_de_entrada(es_adulto_mayor, sexo, flujo)
+                if codigo not in nodos:
+                    raise ImproperlyConfigured(
+                        f"La primera pregunta '{codigo}' (adulto mayor: {es_adulto_mayor}, sexo: {sexo}) "
+                        f"no existe en el catálogo"
+                    )
+                entradas[(es_adulto_mayor, sexo)] = nodos[codigo]
+        return entradas
+
+    @classmethod
+    def _validar_destinos(cls, nodos, flujo):
+        """Verifica que todos los destinos del flujo existan en el catálogo."""
+        for codigo, regla in flujo.items():
+            destinos = regla.values() if isinstance(regla, dict) else [regla]
+            for destino in destinos:
+                if destino and destino != CODIGO_DINAMICO and destino not in nodos:
+                    raise ImproperlyConfigured(
+                        f"FLUJO_PREGUNTAS['{codigo}'] apunta a la pregunta inexistente '{destino}'"
+                    )
+
+    @classmethod
+    def obtener(cls):
+        """Devuelve el grafo del proceso, compilándolo si aún no existe."""
+        grafo = cls._instancia
+        if grafo is None:
+            with cls._lock:
+                if cls._instancia is None:
+                    cls._instancia = cls.compilar(PREGUNTAS, FLUJO_PREGUNTAS)
+                grafo = cls._instancia
+        return grafo
+
+    def contiene(self, codigo):
+        return codigo in self.nodos
+
+    def nodo(self, codigo):
+        return self.nodos.get(codigo)
+
+    def pregunta(self, codigo):
+        """Instancia de Pregunta para el código, o None si no existe."""
+        nodo = self.nodos.get(codigo) if codigo else None
+        return nodo.como_pregunta() if nodo else None
+
+    def payload(self, codigo):
+        """Copia del payload serializado de la pregunta, o None si no existe."""
+        nodo = self.nodos.get(codigo) if codigo else None
+        return dict(nodo.payload) if nodo else None
+
+    def entrada(self, es_adulto_mayor, sexo):
+        """Nodo de la primera pregunta para un paciente."""
+        return self.entradas.get((es_adulto_mayor, sexo)) or self.entradas[(es_adulto_mayor, None)]
+
+    def siguiente_codigo(self, codigo, valor_respuesta):
+        """Código de la siguiente pregunta según FLUJO_PREGUNTAS."""
+        nodo = self.nodos.get(codigo)
+        return nodo.siguiente_codigo(valor_respuesta) if nodo else None
@@ -0,0 +1,208 @@
+"""
+Motor del cuestionario de triage, sin acceso a la base de datos.
+
+A partir del estado de una sesión en memoria y una respuesta devuelve el nuevo estado, el
+código de la siguiente pregunta (None si el triage terminó) y el nivel ESI final:
+
+    estado = MotorTriage.iniciar(edad, sexo)
+    estado, siguiente, nivel = MotorTriage.siguiente_pregunta(estado, estado.pregunta_actual, valor)
+
+El flujo se resuelve con el grafo compilado (GrafoPreguntas) y el ESI se acumula con las
+reglas compiladas (ReglasESICompiladas). Cargar y guardar el estado de una SesionTriage
+es tarea de AdaptadorSesionTriage (utils/adaptador_sesion.py).
+"""
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+
+from rest_framework import serializers
+
+from .enfermedad_helpers import EnfermedadEvaluationHelper
+from .grafo_preguntas import GrafoPreguntas, CODIGO_DINAMICO, EDAD_ADULTO_MAYOR
+from .reglas_compiladas import ReglasESICompiladas, NIVEL_ESI_MAXIMO, NIVEL_ESI_POR_DEFECTO
+from .triage_evaluation import TriageEvaluationHelper
+
+PREGUNTA_ENFERMEDADES = 'antecedentes_enfermedades_cronicas'
+PREGUNTA_ALERGIAS = 'antecedentes_alergias'
+PREGUNTA_CANCER = 'esta_en_tratamiento'
+OPCION_NINGUNA = 'Ninguna de las anteriores'
+
+
+def _vacio():
+    return MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class EstadoTriage:
+    """
+    Estado inmutable de un cuestionario de triage: datos del paciente, respuestas
+    (código -> valor, en orden de respuesta), pregunta pendiente y ESI acumulado.
+    """
+    edad: int
+    sexo: str
+    respuestas: MappingProxyType = field(default_factory=_vacio)
+    informacion_adicional: MappingProxyType = field(default_factory=_vacio)
+    pregunta_actual: str = None
+    # Posiciones en REGLAS_ESI de las reglas cumplidas y el nivel más crítico entre ellas
+    reglas_cumplidas: frozenset = field(default_factory=frozenset)
+    nivel_provisional: int = None
+    completado: bool = False
+    nivel_triage: int = None
+    # Regla ESI 1 que terminó el cuestionario antes de tiempo
+    regla_cierre: object = None
+
+    def contexto_paciente(self):
+        """Contexto de evaluación de las reglas ESI."""
+        return TriageEvaluationHelper.contexto_paciente(self.edad, self.respuestas)
+
+    def enfermedades_seleccionadas(self):
+        return EnfermedadEvaluationHelper.enfermedades_de_respuestas(self.respuestas, self.informacion_adicional)
+
+    def enfermedades_evaluadas(self):
+        return EnfermedadEvaluationHelper.enfermedades_evaluadas_de_respuestas(self.respuestas)
+
+    def enfermedades_pendientes(self):
+        evaluadas = self.enfermedades_evaluadas()
+        return [e for e in self.enfermedades_seleccionadas() if e not in evaluadas]
+
+    def se_completo_flujo_especifico(self):
+        return EnfermedadEvaluationHelper.flujo_especifico_completado_en(self.respuestas)
+
+
+class MotorTriage:
+    """
+    Transiciones puras del cuestionario: no consulta ni escribe en la base de datos,
+    por lo que puede ejecutarse en pruebas y simulaciones sin sesiones persistidas.
+    """
+
+    @classmethod
+    def iniciar(cls, edad, sexo):
+        """Estado inicial con la primera pregunta según la edad y el sexo del paciente."""
+        nodo = GrafoPreguntas.obtener().entrada(edad > EDAD_ADULTO_MAYOR, sexo)
+        return EstadoTriage(edad=edad, sexo=sexo, pregunta_actual=nodo.codigo)
+
+    @classmethod
+    def siguiente_pregunta(cls, estado, codigo, valor, informacion_adicional=None):
+        """
+        Aplica la respuesta `valor` a la pregunta `codigo` y devuelve
+        (nuevo estado, código de la siguiente pregunta o None, nivel ESI final o None).
+        Lanza ValidationError si `codigo` no es la pregunta pendiente del estado.
+        """
+        cls.comprobar_pregunta(estado, codigo)
+
+        respuestas = dict(estado.respuestas)
+        respuestas[codigo] = valor
+        informacion = dict(estado.informacion_adicional)
+        if informacion_adicional:
+            informacion[codigo] = informacion_adicional
+        else:
+            informacion.pop(codigo, None)
+        nuevo = replace(
+            estado,
+            respuestas=MappingProxyType(respuestas),
+            informacion_adicional=MappingProxyType(informacion),
+        )
+
+        # ESI: solo las reglas con alguna condición sobre la pregunta respondida
+        nuevo = cls._acumular(nuevo, codigo)
+        regla_cierre = cls.regla_terminal(nuevo)
+
+        siguiente = None
+        if regla_cierre is None:
+            siguiente, normalizada = cls._resolver(nuevo, codigo, valor)
+            if normalizada is not None:
+                # Enfermedades crónicas seleccionadas, normalizadas para el flujo secuencial
+                informacion[codigo] = normalizada
+                nuevo = replace(nuevo, informacion_adicional=MappingProxyType(informacion))
+            if siguiente is not None and not GrafoPreguntas.obtener().contiene(siguiente):
+                siguiente = None
+
+        if siguiente is not None:
+            return replace(nuevo, pregunta_actual=siguiente), siguiente, None
+
+        nivel_triage = nuevo.nivel_provisional or NIVEL_ESI_POR_DEFECTO
+        return replace(
+            nuevo, pregunta_actual=None, completado=True, nivel_triage=nivel_triage, regla_cierre=regla_cierre
+        ), None, nivel_triage
+
+    @classmethod
+    def comprobar_pregunta(cls, estado, codigo):
+        """Verifica que `codigo` sea la pregunta pendiente del cuestionario."""
+        if estado.completado or estado.pregunta_actual is None:
+            raise serializers.ValidationError("El triage ya finalizó y no admite más respuestas")
+        if codigo != estado.pregunta_actual:
+            raise serializers.ValidationError(
+                f"Se esperaba la pregunta '{estado.pregunta_actual}' y se recibió '{codigo}'"
+            )
+
+    @classmethod
+    def regla_terminal(cls, estado):
+        """Regla cumplida que asigna el nivel más crítico (NIVEL_ESI_MAXIMO), o None."""
+        if estado.nivel_provisional is None or estado.nivel_provisional > NIVEL_ESI_MAXIMO:
+            return None
+        reglas = ReglasESICompiladas.obtener().reglas
+        return next(
+            (reglas[id_regla] for id_regla in sorted(estado.reglas_cumplidas)
+             if reglas[id_regla].nivel_esi <= NIVEL_ESI_MAXIMO),
+            None
+        )
+
+    @classmethod
+    def _acumular(cls, estado, codigo):
+        """Reevalúa las reglas de la pregunta respondida y actualiza el ESI acumulado."""
+        compiladas = ReglasESICompiladas.obtener()
+        reglas = compiladas.reglas_de_respuesta(codigo)
+        if not reglas:
+            return estado
+
+        contexto_paciente = estado.contexto_paciente()
+        cumplidas = set(estado.reglas_cumplidas)
+        for regla in reglas:
+            # Una respuesta corregida puede dejar de cumplir una regla
+            if regla.se_cumple(estado.respuestas, contexto_paciente):
+                cumplidas.add(regla.id)
+            else:
+                cumplidas.discard(regla.id)
+        return replace(estado, reglas_cumplidas=frozenset(cumplidas), nivel_provisional=compiladas.nivel_de(cumplidas))
+
+    @classmethod
+    def _resolver(cls, estado, codigo, valor):
+        """
+        Código de la siguiente pregunta según FLUJO_PREGUNTAS y el flujo de enfermedades
+        crónicas, junto con las enfermedades normalizadas a guardar (o None).
+        """
+        if codigo == PREGUNTA_ENFERMEDADES:
+            return cls._enfermedades_cronicas(valor)
+
+        if codigo.startswith('sintoma_relacionado_') and codigo != 'sintoma_relacionado_con_enfermedad_cronica':
+            enfermedad = codigo.replace('sintoma_relacionado_', '')
+            if enfermedad in estado.enfermedades_seleccionadas() and valor is True:
+                return GrafoPreguntas.obtener().siguiente_codigo(codigo, valor), None
+            return cls._siguiente_enfermedad(estado), None
+
+        siguiente = GrafoPreguntas.obtener().siguiente_codigo(codigo, valor)
+        if siguiente == CODIGO_DINAMICO:
+            return cls._siguiente_enfermedad(estado), None
+        return siguiente, None
+
+    @classmethod
+    def _enfermedades_cronicas(cls, valor):
+        """Primera pregunta del flujo específico según las enfermedades crónicas seleccionadas."""
+        if not valor or valor == OPCION_NINGUNA or (isinstance(valor, list) and OPCION_NINGUNA in valor):
+            return PREGUNTA_ALERGIAS, None
+
+        # Si seleccionó cáncer, ir al flujo específico de cáncer
+        if valor == 'Cáncer' or (isinstance(valor, list) and 'Cáncer' in valor):
+            return PREGUNTA_CANCER, None
+
+        enfermedades = EnfermedadEvaluationHelper.obtener_enfermedades_seleccionadas(valor)
+        return EnfermedadEvaluationHelper.obtener_primera_enfermedad_a_evaluar(enfermedades), ','.join(enfermedades)
+
+    @classmethod
+    def _siguiente_enfermedad(cls, estado):
+        """Siguiente enfermedad pendiente, alergias si no se completó ningún flujo específico, o fin."""
+        pendientes = estado.enfermedades_pendientes()
+        if pendientes:
+            return EnfermedadEvaluationHelper.obtener_primera_enfermedad_a_evaluar(pendientes)
+        if not estado.se_completo_flujo_especifico():
+            return PREGUNTA_ALERGIAS
+        return None
@@ -0,0 +1,220 @@
+"""
+Evaluador compilado de las reglas ESI.
+
+Convierte REGLAS_ESI en un índice por código de pregunta con predicados ya normalizados
+(frozensets para listas, flotantes pre-calculados para operadores numéricos y banderas
+de contexto calculadas una sola vez). La evaluación solo recorre las reglas cuyas
+preguntas fueron respondidas.
+"""
+import operator
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from .preguntas import REGLAS_ESI
+
+# Nivel más crítico posible; al alcanzarlo no hace falta seguir evaluando
+NIVEL_ESI_MAXIMO = 1
+# Nivel asignado cuando ninguna regla aplica
+NIVEL_ESI_POR_DEFECTO = 5
+
+_OPERADORES_NUMERICOS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+
+def _a_float(valor):
+    try:
+        return float(valor)
+    except (ValueError, TypeError):
+        return None
+
+
+def _a_frozenset(valores):
+    try:
+        return frozenset(valores)
+    except TypeError:
+        return None
+
+
+@dataclass(frozen=True)
+class CondicionCompilada:
+    """
+    Condición de una regla ESI con el valor esperado ya normalizado.
+    Conserva la semántica de TriageEvaluationHelper._comparar_valores_con_operador.
+    """
+    pregunta: str
+    operador: str
+    valor: object
+    # Valores esperados como tupla (orden original) y frozenset (búsqueda O(1))
+    valores: tuple = None
+    conjunto: frozenset = None
+    # Valores esperados convertidos a float para "in" y operadores numéricos
+    flotantes: frozenset = None
+    flotante: float = None
+
+    @classmethod
+    def compilar(cls, condicion):
+        valor = condicion["valor"]
+        operador = condicion.get("operador", "==")
+        datos = {'pregunta': condicion["pregunta"], 'operador': operador, 'valor': valor}
+
+        if isinstance(valor, list):
+            datos['valores'] = tuple(valor)
+            datos['conjunto'] = _a_frozenset(valor)
+            flotantes = [_a_float(x) for x in valor]
+            if all(f is not None for f in flotantes):
+                datos['flotantes'] = frozenset(flotantes)
+        elif operador in _OPERADORES_NUMERICOS:
+            datos['flotante'] = _a_float(valor)
+
+        return cls(**datos)
+
+    def _contiene(self, valor):
+        """Pertenencia en los valores esperados; usa el frozenset si el valor es hashable."""
+        if self.conjunto is not None:
+            try:
+                return valor in self.conjunto
+            except TypeError:
+                pass
+        return valor in self.valores
+
+    def evaluar(self, valor_respuesta):
+        if self.operador == "==":
+            if self.valores is None:
+                return valor_respuesta == self.valor
+            if isinstance(valor_respuesta, list):
+                # Respuesta múltiple: al menos un valor debe coincidir
+                return any(self._contiene(val) for val in valor_respuesta)
+            return self._contiene(valor_respuesta)
+
+        if self.operador == "in":
+            if self.valores is None:
+                return valor_respuesta == self.valor
+            if self.flotantes is not None:
+                flotante = _a_float(valor_respuesta)
+                if flotante is not None:
+                    return flotante in self.flotantes
+            return self._contiene(valor_respuesta)
+
+        comparador = _OPERADORES_NUMERICOS.get(self.operador)
+        if comparador is not None:
+            flotante = _a_float(valor_respuesta)
+            if flotante is None or self.flotante is None:
+                return False
+            return comparador(flotante, self.flotante)
+
+        # Operador no reconocido, usar igualdad por defecto
+        return valor_respuesta == self.valor
+
+
+@dataclass(frozen=True)
+class ReglaCompilada:
+    """Regla ESI compilada. El id es su posición en REGLAS_ESI."""
+    id: int
+    nivel_esi: int
+    condiciones: tuple
+    es_regla_embarazo: bool
+    es_regla_adulto_mayor: bool
+
+    @classmethod
+    def compilar(cls, id_regla, regla):
+        preguntas = [condicion.get('pregunta', '') for condicion in regla["condiciones"]]
+        return cls(
+            id=id_regla,
+            nivel_esi=regla["nivel_esi"],
+            condiciones=tuple(CondicionCompilada.compilar(c) for c in regla["condiciones"]),
+            es_regla_embarazo=any('embarazo' in p for p in preguntas),
+            es_regla_adulto_mayor=any('adulto_mayor' in p for p in preguntas),
+        )
+
+    def aplica_al_contexto(self, contexto_paciente):
+        if self.es_regla_embarazo and not contexto_paciente['es_embarazada']:
+            return False
+        if self.es_regla_adulto_mayor and not contexto_paciente['es_adulto_mayor']:
+            return False
+        return True
+
+    def condiciones_cumplidas(self, respuestas_dict):
+        """Condiciones de la regla sin considerar el contexto del paciente."""
+        for condicion in self.condiciones:
+            if condicion.pregunta not in respuestas_dict:
+                return False
+            if not condicion.evaluar(respuestas_dict[condicion.pregunta]):
+                return False
+        return True
+
+    def se_cumple(self, respuestas_dict, contexto_paciente):
+        return self.aplica_al_contexto(contexto_paciente) and self.condiciones_cumplidas(respuestas_dict)
+
+    def describir(self):
+        preguntas = ', '.join(condicion.pregunta for condicion in self.condiciones)
+        return f"ESI {self.nivel_esi} por la regla {self.id} ({preguntas})"
+
+
+class ReglasESICompiladas:
+    """
+    Índice inmutable de reglas ESI por código de pregunta.
+    Cada regla se indexa bajo la pregunta de su primera condición: si esa pregunta
+    no fue respondida la regla no puede cumplirse. Para la evaluación incremental,
+    además se indexa bajo cada pregunta de sus condiciones.
+    """
+    _instancia = None
+    _lock = threading.Lock()
+
+    def __init__(self, reglas, por_pregunta, por_condicion):
+        self.reglas = reglas
+        self.por_pregunta = MappingProxyType(por_pregunta)
+        self.por_condicion = MappingProxyType(por_condicion)
+
+    @classmethod
+    def compilar(cls, reglas_esi):
+        reglas = tuple(ReglaCompilada.compilar(i, regla) for i, regla in enumerate(reglas_esi))
+
+        por_pregunta = {}
+        por_condicion = {}
+        for regla in reglas:
+            if not regla.condiciones:
+                continue
+            por_pregunta.setdefault(regla.condiciones[0].pregunta, []).append(regla)
+            for pregunta in {condicion.pregunta for condicion in regla.condiciones}:
+                por_condicion.setdefault(pregunta, []).append(regla)
+
+        # Dentro de cada pregunta, evaluar primero las reglas más críticas
+        def ordenar(indice):
+            return {
+                codigo: tuple(sorted(lista, key=lambda r: (r.nivel_esi, r.id)))
+                for codigo, lista in indice.items()
+            }
+        return cls(reglas, ordenar(por_pregunta), ordenar(por_condicion))
+
+    @classmethod
+    def obtener(cls):
+        """Devuelve el índice del proceso, compilándolo si aún no existe."""
+        indice = cls._instancia
+        if indice is None:
+            with cls._lock:
+                if cls._instancia is None:
+                    cls._instancia = cls.compilar(REGLAS_ESI)
+                indice = cls._instancia
+        return indice
+
+    def reglas_de_respuesta(self, codigo):
+        """Reglas con alguna condición sobre la pregunta: las únicas que una nueva respuesta puede cumplir."""
+        return self.por_condicion.get(codigo, ())
+
+    def nivel_de(self, ids_reglas):
+        """Nivel ESI más crítico entre las reglas indicadas por id, o None si no hay ninguna."""
+        return min((self.reglas[id_regla].nivel_esi for id_regla in ids_reglas), default=None)
+
+    def reglas_cumplidas(self, respuestas_dict, contexto_paciente):
+        """Reglas que se cumplen con las respuestas dadas, recorriendo solo las preguntas respondidas."""
+        return [
+            regla
+            for codigo in respuestas_dict
+            for regla in self.por_pregunta.get(codigo, ())
+            if regla.se_cumple(respuestas_dict, contexto_paciente)
+        ]
@@ -0,0 +1,90 @@
+"""
+Registro por lotes de las respuestas de una sesión de triage.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .adaptador_sesion import AdaptadorSesionTriage
+from .motor_triage import MotorTriage
+from .triage_flow import TriageFlowHelper
+
+
+class RespuestasLoteHelper:
+    """
+    Registra un lote ordenado de respuestas con un único recorrido del motor de triage.
+    La validación y la siguiente pregunta de cada respuesta se resuelven en memoria; las
+    respuestas se insertan con bulk_create y la sesión se actualiza en la misma transacción.
+    """
+
+    @classmethod
+    def registrar(cls, sesion, items):
+        """
+        Valida y guarda las respuestas del lote a partir de la pregunta pendiente de la sesión,
+        leída con la fila de la sesión bloqueada.
+        Devuelve la sesión actualizada, las respuestas creadas y la siguiente pregunta
+        (None si el triage finalizó).
+        Lanza ValidationError sin escribir nada si alguna respuesta no es válida.
+        """
+        from triage.models import Respuesta  # Import local para evitar circular
+
+        with transaction.atomic():
+            sesion = AdaptadorSesionTriage.bloquear(sesion)
+            if sesion.completado:
+                raise serializers.ValidationError("La sesión de triage ya fue completada")
+
+            anterior = AdaptadorSesionTriage.cargar(sesion)
+            respuestas, estado = cls._construir_respuestas(sesion, items, anterior)
+            Respuesta.objects.bulk_create(respuestas)
+            AdaptadorSesionTriage.guardar(sesion, anterior, estado)
+
+        return sesion, respuestas, TriageFlowHelper.buscar_pregunta_por_codigo(estado.pregunta_actual)
+
+    @classmethod
+    def _construir_respuestas(cls, sesion, items, estado):
+        """
+        Recorre el lote siguiendo el flujo: cada respuesta debe corresponder a la pregunta
+        que el flujo espera en ese punto. Como en RespuestaCreate, una respuesta que cumple
+        una regla ESI 1 termina el recorrido. Devuelve las instancias de Respuesta sin
+        guardar y el estado del motor tras la última.
+        """
+        from triage.serializers import ValidacionRespuestasBase
+
+        validador = ValidacionRespuestasBase()
+        # Marcas de tiempo crecientes para conservar el orden de respuesta dentro del lote
+        marca_inicial = timezone.now()
+        respuestas = []
+
+        for indice, item in enumerate(items):
+            posicion = indice + 1
+            codigo = item['pregunta']
+
+            try:
+                MotorTriage.comprobar_pregunta(estado, codigo)
+            except serializers.ValidationError as e:
+                raise serializers.ValidationError(f"Respuesta {posicion}: {e.detail[0]}")
+            if codigo in estado.respuestas:
+                raise serializers.ValidationError(f"Respuesta {posicion}: la pregunta '{codigo}' ya fue respondida")
+
+            datos = {
+                'pregunta': codigo,
+                'valor': item['valor'],
+                'informacion_adicional': item.get('informacion_adicional'),
+            }
+            try:
+                validador.validate_respuesta(datos)
+            except serializers.ValidationError as e:
+                detalle = e.detail[0] if isinstance(e.detail, list) else e.detail
+                raise serializers.ValidationError(f"Respuesta {posicion} ({codigo}): {detalle}")
+
+            estado, _, _ = MotorTriage.siguiente_pregunta(
+                estado, codigo, datos['valor'], datos['informacion_adicional']
+            )
+            respuestas.append(AdaptadorSesionTriage.respuesta(
+                sesion, estado, codigo, datos['valor'], datos['informacion_adicional'],
+                timestamp=marca_inicial + timedelta(microseconds=indice),
+            ))
+
+        return respuestas, estado
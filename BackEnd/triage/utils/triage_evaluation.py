@@ -1,6 +1,7 @@
 """
 Utilidades para la evaluación y determinación de niveles de triage ESI.
 """
+from .grafo_preguntas import EDAD_ADULTO_MAYOR
 from .preguntas import REGLAS_ESI
 
 
@@ -10,15 +11,11 @@ class TriageEvaluationHelper:
     """
     
     @classmethod
-    def determinar_nivel_triage(cls, sesion):
+    def evaluar_reglas_secuencial(cls, respuestas_dict, contexto_paciente):
         """
-        Determina el nivel ESI (Emergency Severity Index) basado en las respuestas
-        de la sesión y las reglas definidas en REGLAS_ESI.
-        Para múltiples enfermedades crónicas, selecciona el ESI más crítico (menor número).
+        Evaluación de referencia que recorre todas las REGLAS_ESI en orden.
+        Se conserva para validar y comparar las reglas compiladas.
         """
-        respuestas_dict = cls._obtener_respuestas_dict(sesion)
-        contexto_paciente = cls._obtener_contexto_paciente(sesion, respuestas_dict)
-        
         niveles_esi_encontrados = []
         
         # Evaluar reglas ESI por orden de prioridad
@@ -34,18 +31,10 @@ class TriageEvaluationHelper:
         return 5
     
     @classmethod
-    def _obtener_respuestas_dict(cls, sesion):
-        """Obtiene las respuestas de la sesión en formato diccionario."""
-        from triage.models import Respuesta  # Import local para evitar circular
-        
-        respuestas = Respuesta.objects.filter(sesion=sesion)
-        return {resp.pregunta.codigo: resp.valor for resp in respuestas}
-    
-    @classmethod
-    def _obtener_contexto_paciente(cls, sesion, respuestas_dict):
-        """Obtiene el contexto del paciente (embarazo, edad, etc.)."""
+    def contexto_paciente(cls, edad, respuestas_dict):
+        """Contexto de evaluación a partir de la edad y las respuestas."""
         es_embarazada = respuestas_dict.get('embarazo') in ['Sí', 'Si', True, 'True']
-        es_adulto_mayor = sesion.paciente.edad > 65
+        es_adulto_mayor = edad > EDAD_ADULTO_MAYOR
         
         return {
             'es_embarazada': es_embarazada,
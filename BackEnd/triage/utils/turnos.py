@@ -0,0 +1,19 @@
+"""
+Turno (mañana, tarde o noche) en que inicia una sesión de triage.
+
+Los límites son horas locales (TIME_ZONE, Bogotá por defecto) configurables en
+settings.TURNOS_INICIO. El turno nocturno cruza la medianoche.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+
+def calcular_turno(momento):
+    """Código del turno (TURNO_CHOICES) al que pertenece un instante."""
+    inicio = settings.TURNOS_INICIO
+    hora = timezone.localtime(momento).hour
+    if inicio['MANANA'] <= hora < inicio['TARDE']:
+        return 'MANANA'
+    if inicio['TARDE'] <= hora < inicio['NOCHE']:
+        return 'TARDE'
+    return 'NOCHE'
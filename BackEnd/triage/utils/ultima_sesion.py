@@ -0,0 +1,84 @@
+"""
+Columnas de la sesión más reciente desnormalizadas en Paciente.
+
+Se recalculan con un único UPDATE con subconsultas sobre las sesiones del paciente,
+en la misma transacción en que se crea, modifica o elimina una sesión.
+"""
+from django.db import transaction
+from django.db.models import BooleanField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+# Campo de Paciente -> campo de SesionTriage
+CAMPOS_ULTIMA_SESION = {
+    'ultima_sesion': 'id',
+    'ultima_sesion_nivel': 'nivel_triage',
+    'ultima_sesion_nivel_provisional': 'nivel_provisional',
+    'ultima_sesion_inicio': 'fecha_inicio',
+    'ultima_sesion_fin': 'fecha_fin',
+    'ultima_sesion_completada': 'completado',
+    'ultima_sesion_turno': 'turno',
+}
+
+# Campos de SesionTriage cuyo cambio puede alterar las columnas del paciente
+CAMPOS_SESION_RELEVANTES = {
+    'paciente', 'fecha_inicio', 'fecha_fin', 'nivel_triage', 'nivel_provisional', 'completado', 'turno',
+}
+
+
+class UltimaSesionHelper:
+    """
+    Mantiene las columnas ultima_sesion_* de Paciente.
+    Los modelos pueden pasarse explícitamente para usar los modelos históricos en migraciones.
+    """
+
+    @staticmethod
+    def afecta(update_fields):
+        """Indica si un save() con estos update_fields puede cambiar la sesión más reciente."""
+        return update_fields is None or bool(CAMPOS_SESION_RELEVANTES.intersection(update_fields))
+
+    @staticmethod
+    def valores(pacientes, sesiones):
+        """
+        Expresiones de actualización con los datos de la sesión más reciente de cada paciente.
+        Solo incluye las columnas presentes en ambos modelos (los históricos pueden no tenerlas todas).
+        """
+        ultima = sesiones.objects.filter(paciente=OuterRef('pk')).order_by('-fecha_inicio', '-id')
+        campos_paciente = {campo.name for campo in pacientes._meta.get_fields()}
+        campos_sesion = {campo.name for campo in sesiones._meta.get_fields()}
+        valores = {
+            campo: Subquery(ultima.values(origen)[:1])
+            for campo, origen in CAMPOS_ULTIMA_SESION.items()
+            if campo in campos_paciente and origen in campos_sesion
+        }
+        # Sin sesiones la subconsulta devuelve NULL y completada no admite nulos
+        valores['ultima_sesion_completada'] = Coalesce(
+            valores['ultima_sesion_completada'], Value(False), output_field=BooleanField()
+        )
+        return valores
+
+    @staticmethod
+    def _modelos(pacientes, sesiones):
+        if pacientes is None or sesiones is None:
+            from pacientes.models import Paciente  # Import local para evitar circular
+            from triage.models import SesionTriage
+            return Paciente, SesionTriage
+        return pacientes, sesiones
+
+    @classmethod
+    def actualizar(cls, paciente_id, pacientes=None, sesiones=None):
+        """
+        Recalcula las columnas de un paciente con una sola consulta y, al confirmar
+        la transacción, actualiza su posición en la cola de la sala de espera.
+        """
+        from pacientes.cola_espera import ColaEspera  # Import local para evitar circular
+        pacientes, sesiones = cls._modelos(pacientes, sesiones)
+        filas = pacientes.objects.filter(pk=paciente_id).update(**cls.valores(pacientes, sesiones))
+        if filas:
+            transaction.on_commit(lambda: ColaEspera.notificar(paciente_id))
+        return filas
+
+    @classmethod
+    def rellenar(cls, pacientes=None, sesiones=None):
+        """Recalcula las columnas de todos los pacientes con una sola consulta."""
+        pacientes, sesiones = cls._modelos(pacientes, sesiones)
+        return pacientes.objects.update(**cls.valores(pacientes, sesiones))
@@ -0,0 +1,154 @@
+"""
+Validadores precompilados de respuestas por código de pregunta.
+
+Se construyen una sola vez por proceso a partir de los nodos del grafo de preguntas
+(GrafoPreguntas): opciones como frozenset, límites numéricos de las escalas y la expresión
+de caracteres no permitidos ya compilada. Como el grafo, no cambian en tiempo de ejecución.
+Validar una respuesta no accede a la base de datos.
+"""
+import re
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from rest_framework import serializers
+
+from .grafo_preguntas import GrafoPreguntas
+
+OPCION_OTRO = "Otro (especificar)"
+_CARACTERES_NO_PERMITIDOS = re.compile(r'[<>"\']')
+_LONGITUD_MAXIMA_TEXTO = 1000
+
+
+@dataclass(frozen=True)
+class ValidadorPregunta:
+    """
+    Validador de respuestas de una pregunta.
+    Conserva las reglas y mensajes de ValidacionRespuestasBase.validate_respuesta.
+    """
+    codigo: str
+    tipo: str
+    # Opciones en su orden original (para los mensajes) y como frozenset (búsqueda O(1))
+    opciones: tuple = None
+    conjunto: frozenset = frozenset()
+    minimo: float = None
+    maximo: float = None
+
+    @classmethod
+    def compilar(cls, codigo, tipo, opciones):
+        opciones = tuple(opciones) if opciones is not None else None
+        conjunto = frozenset()
+        minimo = maximo = None
+        if opciones:
+            try:
+                conjunto = frozenset(opciones)
+            except TypeError:
+                conjunto = frozenset()
+            if tipo == 'scale':
+                minimo, maximo = min(opciones), max(opciones)
+        return cls(codigo=codigo, tipo=tipo, opciones=opciones, conjunto=conjunto, minimo=minimo, maximo=maximo)
+
+    @classmethod
+    def desde_pregunta(cls, pregunta):
+        return cls.compilar(pregunta.codigo, pregunta.tipo, pregunta.opciones)
+
+    def _es_opcion(self, valor):
+        try:
+            return valor in self.conjunto
+        except TypeError:
+            # Valores no hashables (p. ej. listas) nunca son una opción válida
+            return False
+
+    def _opciones_texto(self):
+        return ', '.join(self.opciones or ())
+
+    def validar(self, valor, informacion_adicional=None):
+        """Lanza ValidationError si el valor no es válido para el tipo de la pregunta."""
+        tipo = self.tipo
+
+        # Boolean
+        if tipo == 'boolean':
+            if not isinstance(valor, bool):
+                raise serializers.ValidationError("La respuesta debe ser un valor booleano (true/false)")
+
+        # Numérico
+        elif tipo == 'numeric':
+            if not (isinstance(valor, (int, float)) or str(valor).isdigit()):
+                raise serializers.ValidationError("La respuesta debe ser un valor numérico")
+
+        # Escala
+        elif tipo == 'scale':
+            if not isinstance(valor, (int, float)):
+                raise serializers.ValidationError("La respuesta de escala debe ser un valor numérico")
+            if self.minimo is not None and (valor < self.minimo or valor > self.maximo):
+                raise serializers.ValidationError(f"La respuesta debe estar entre {self.minimo} y {self.maximo}")
+
+        # Opción única
+        elif tipo == 'choice':
+            if not self._es_opcion(valor):
+                raise serializers.ValidationError(f"La respuesta debe ser una de las opciones válidas: {self._opciones_texto()}")
+            if isinstance(valor, str) and OPCION_OTRO in valor and not informacion_adicional:
+                raise serializers.ValidationError("Debe especificar la información adicional cuando selecciona 'Otro (especificar)'")
+
+        # Texto
+        elif tipo == 'text':
+            if not isinstance(valor, str):
+                raise serializers.ValidationError("La respuesta debe ser texto")
+            if len(valor.strip()) == 0:
+                raise serializers.ValidationError("La respuesta de texto no puede estar vacía")
+            if len(valor) > _LONGITUD_MAXIMA_TEXTO:
+                raise serializers.ValidationError("La respuesta no puede exceder los 1000 caracteres")
+            if _CARACTERES_NO_PERMITIDOS.search(valor):
+                raise serializers.ValidationError("La respuesta contiene caracteres no permitidos")
+
+        # Opción múltiple: O(k) para k opciones seleccionadas
+        elif tipo == 'multi_choice':
+            if not isinstance(valor, list):
+                raise serializers.ValidationError("La respuesta debe ser una lista de opciones")
+            if len(valor) == 0:
+                raise serializers.ValidationError("Debe seleccionar al menos una opción")
+            for v in valor:
+                if not self._es_opcion(v):
+                    raise serializers.ValidationError(f"La opción '{v}' no es válida. Opciones válidas: {self._opciones_texto()}")
+            if OPCION_OTRO in valor and not informacion_adicional:
+                raise serializers.ValidationError("Debe especificar la información adicional cuando selecciona 'Otro (especificar)'")
+
+
+class ValidadoresRespuestas:
+    """
+    Caché de validadores por código de pregunta, compilada del grafo de preguntas.
+    Mantiene una única instancia por proceso, compilada en el primer acceso.
+    """
+    _instancia = None
+    _lock = threading.Lock()
+
+    def __init__(self, validadores):
+        self.validadores = MappingProxyType(validadores)
+
+    @classmethod
+    def compilar(cls, grafo):
+        validadores = {
+            codigo: ValidadorPregunta.compilar(codigo, nodo.tipo, nodo.opciones)
+            for codigo, nodo in grafo.nodos.items()
+        }
+        return cls(validadores)
+
+    @classmethod
+    def obtener(cls):
+        """Devuelve la caché del proceso, compilándola si aún no existe."""
+        validadores = cls._instancia
+        if validadores is None:
+            with cls._lock:
+                if cls._instancia is None:
+                    cls._instancia = cls.compilar(GrafoPreguntas.obtener())
+                validadores = cls._instancia
+        return validadores
+
+    def validador(self, codigo):
+        """Validador para el código, o None si la pregunta no está en el catálogo."""
+        return self.validadores.get(codigo)
+
+    def validador_para(self, pregunta):
+        """Validador para una instancia de Pregunta; se compila al vuelo si no está en el catálogo."""
+        validador = self.validadores.get(pregunta.codigo)
+        return validador if validador is not None else ValidadorPregunta.desde_pregunta(pregunta)
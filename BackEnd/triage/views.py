@@ -1,22 +1,46 @@
 from django.utils import timezone
-from rest_framework import generics, status, permissions
+from rest_framework import generics, status, permissions, serializers
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from .models import SesionTriage, Pregunta, Respuesta
-from .serializers import SesionTriageSerializer, PreguntaSerializer, RespuestaSerializer, RespuestaCreateSerializer
-from .utils.preguntas import PREGUNTAS
+from .serializers import (
+    SesionTriageSerializer, SesionTriageCompactaSerializer, PreguntaSerializer,
+    RespuestaSerializer, RespuestaCreateSerializer, RespuestaLoteSerializer,
+)
 from pacientes.models import Paciente
 from utils.IsAdmin import IsAdminUser
-from .utils.enfermedad_helpers import EnfermedadEvaluationHelper
-from .utils.triage_evaluation import TriageEvaluationHelper
 from .utils.triage_flow import TriageFlowHelper
+from .utils.catalogo_preguntas import CatalogoPreguntas
+from .utils.adaptador_sesion import AdaptadorSesionTriage
+from .utils.respuestas_lote import RespuestasLoteHelper
 import uuid
 
 
 class TriagePreguntaMixin:
     """
     Mixin que proporciona lógica común para determinar preguntas de triage
+    y serializar la sesión en su forma completa o compacta (?view=compact)
     """
+    VISTA_COMPACTA = 'compact'
+    
+    def _es_vista_compacta(self):
+        return self.request.query_params.get('view') == self.VISTA_COMPACTA
+    
+    def _sesiones_queryset(self):
+        """
+        Sesiones con el paciente ya unido (necesario para la primera pregunta).
+        La forma completa precarga respuestas, contacto y sesiones del paciente.
+        """
+        queryset = SesionTriage.objects.select_related('paciente')
+        if self._es_vista_compacta():
+            return queryset
+        return queryset.prefetch_related('respuestas', 'paciente__contacto_emergencia', 'paciente__sesiones_triage')
+    
+    def _serializar_sesion(self, sesion):
+        if self._es_vista_compacta():
+            return SesionTriageCompactaSerializer(sesion).data
+        return SesionTriageSerializer(sesion).data
+    
     def _determinar_primera_pregunta(self, paciente):
         """
         Determina la primera pregunta según la edad y sexo del paciente
@@ -25,21 +49,13 @@ class TriagePreguntaMixin:
     
     def _determinar_siguiente_pregunta_sesion(self, sesion):
         """
-        Determina la siguiente pregunta basada en las respuestas existentes de una sesión.
+        Determina la siguiente pregunta de una sesión a partir de su estado materializado
+        (pregunta_actual y total_respuestas), sin consultar las respuestas.
         Método común para evitar duplicación entre vistas.
         """
-        respuestas_existentes = sesion.respuestas.all().order_by('timestamp')
-        
-        if respuestas_existentes.exists():
-            # Si ya hay respuestas, obtener la última y determinar la siguiente pregunta
-            ultima_respuesta = respuestas_existentes.last()
-            if ultima_respuesta.pregunta_siguiente:
-                try:
-                    return Pregunta.objects.get(codigo=ultima_respuesta.pregunta_siguiente)
-                except Pregunta.DoesNotExist:
-                    return None
-            else:
-                return None
+        if sesion.total_respuestas:
+            # Si ya hay respuestas, la pregunta pendiente está guardada en la sesión
+            return TriageFlowHelper.buscar_pregunta_por_codigo(sesion.pregunta_actual)
         else:
             # No hay respuestas, obtener la primera pregunta
             return self._determinar_primera_pregunta(sesion.paciente)
@@ -63,7 +79,9 @@ class SesionTriageListView(generics.ListAPIView):
     """
     API para listar sesiones de triage
     """
-    queryset = SesionTriage.objects.all()
+    queryset = SesionTriage.objects.select_related('paciente').prefetch_related(
+        'respuestas', 'paciente__contacto_emergencia', 'paciente__sesiones_triage'
+    )
     serializer_class = SesionTriageSerializer
     
     def perform_create(self, serializer):
@@ -77,6 +95,14 @@ class SesionTriageDetailView(TriagePreguntaMixin, generics.RetrieveAPIView):
     serializer_class = SesionTriageSerializer
     permission_classes = [permissions.AllowAny]
     
+    def get_queryset(self):
+        return self._sesiones_queryset()
+    
+    def get_serializer_class(self):
+        if self._es_vista_compacta():
+            return SesionTriageCompactaSerializer
+        return SesionTriageSerializer
+    
     def _is_valid_uuid(self, uuid_string):
         """
         Valida si una cadena es un UUID válido
@@ -121,7 +147,7 @@ class SesionTriageDetailView(TriagePreguntaMixin, generics.RetrieveAPIView):
                 'mensaje': 'Sesión encontrada exitosamente',
                 'data': {
                     'sesion': serializer.data,
-                    'siguiente_pregunta': PreguntaSerializer(siguiente_pregunta).data if siguiente_pregunta else None,
+                    'siguiente_pregunta': TriageFlowHelper.serializar_pregunta(siguiente_pregunta),
                     'completado': False
                 }
             }, status=status.HTTP_200_OK)
@@ -166,7 +192,7 @@ class IniciarTriage(TriagePreguntaMixin, APIView):
             }, status=status.HTTP_404_NOT_FOUND)
         
         # Verificar si ya existe una sesión activa (no completada) para este paciente
-        sesion_activa = SesionTriage.objects.filter(
+        sesion_activa = self._sesiones_queryset().filter(
             paciente=paciente,
             completado=False
         ).first()
@@ -174,15 +200,14 @@ class IniciarTriage(TriagePreguntaMixin, APIView):
         if sesion_activa:
             # Ya existe una sesión activa, recuperar directamente usando el método común
             try:
-                sesion_serializer = SesionTriageSerializer(sesion_activa)
                 siguiente_pregunta = self._determinar_siguiente_pregunta_sesion(sesion_activa)
                 
                 return Response({
                     'exito': True,
                     'mensaje': 'Sesión de triage activa recuperada',
                     'data': {
-                        'sesion': sesion_serializer.data,
-                        'primera_pregunta': PreguntaSerializer(siguiente_pregunta).data if siguiente_pregunta else None
+                        'sesion': self._serializar_sesion(sesion_activa),
+                        'primera_pregunta': TriageFlowHelper.serializar_pregunta(siguiente_pregunta)
                     }
                 }, status=status.HTTP_200_OK)
                 
@@ -193,11 +218,6 @@ class IniciarTriage(TriagePreguntaMixin, APIView):
                     'error': f'Error al recuperar la sesión activa: {str(e)}'
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        # Crear nueva sesión de triage
-        sesion_serializer = SesionTriageSerializer(data={'paciente': paciente_id})
-        sesion_serializer.is_valid(raise_exception=True)
-        sesion = sesion_serializer.save(fecha_inicio=timezone.now())
-        
         # Determinar la primera pregunta usando el método auxiliar
         primera_pregunta = self._determinar_primera_pregunta(paciente)
         
@@ -208,12 +228,17 @@ class IniciarTriage(TriagePreguntaMixin, APIView):
                 'error': 'No hay preguntas definidas en el sistema'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
+        # Crear nueva sesión de triage con la primera pregunta ya materializada
+        sesion_serializer = SesionTriageSerializer(data={'paciente': paciente_id})
+        sesion_serializer.is_valid(raise_exception=True)
+        sesion = sesion_serializer.save(fecha_inicio=timezone.now(), pregunta_actual=primera_pregunta.codigo)
+        
         return Response({
             'exito': True,
             'mensaje': 'Sesión de triage iniciada exitosamente',
             'data': {
-                'sesion': SesionTriageSerializer(sesion).data,
-                'primera_pregunta': PreguntaSerializer(primera_pregunta).data
+                'sesion': self._serializar_sesion(sesion),
+                'primera_pregunta': TriageFlowHelper.serializar_pregunta(primera_pregunta)
             }
         }, status=status.HTTP_201_CREATED)
 
@@ -229,45 +254,33 @@ class RespuestaCreate(generics.CreateAPIView):
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
             
-            # Guardar la respuesta
-            respuesta = serializer.save()
-            
-            # Buscar la siguiente pregunta según las reglas de flujo
-            siguiente_pregunta = self.determinar_siguiente_pregunta(respuesta)
+            # El motor resuelve en memoria la siguiente pregunta y el ESI acumulado (una regla
+            # ESI 1 cierra el triage); el adaptador guarda la respuesta y la sesión
+            datos = serializer.validated_data
+            respuesta, estado = AdaptadorSesionTriage.responder(
+                datos['sesion'], datos['pregunta'].codigo, datos['valor'], datos.get('informacion_adicional')
+            )
+            sesion = respuesta.sesion
+            siguiente_pregunta = TriageFlowHelper.buscar_pregunta_por_codigo(estado.pregunta_actual)
             
             if siguiente_pregunta:
-                # Si hay siguiente pregunta, actualizar el campo pregunta_siguiente
-                respuesta.pregunta_siguiente = siguiente_pregunta.codigo
-                respuesta.save()
-                
                 # Devolver la siguiente pregunta junto con la respuesta guardada
                 return Response({
                     'exito': True,
                     'mensaje': 'Respuesta guardada exitosamente',
                     'data': {
                         'respuesta': RespuestaSerializer(respuesta).data,
-                        'siguiente_pregunta': PreguntaSerializer(siguiente_pregunta).data
+                        'siguiente_pregunta': TriageFlowHelper.serializar_pregunta(siguiente_pregunta)
                     }
                 }, status=status.HTTP_201_CREATED)
             else:
-                # No hay más preguntas, finalizar el triage
-                sesion = respuesta.sesion
-                sesion.completado = True
-                sesion.fecha_fin = timezone.now()
-                
-                # Determinar nivel de triage basado en las respuestas
-                nivel_triage = self.determinar_nivel_triage(sesion)
-                if nivel_triage:
-                    sesion.nivel_triage = nivel_triage
-                
-                sesion.save()
-                
                 return Response({
                     'exito': True,
                     'mensaje': 'Triage completado exitosamente',
                     'data': {
                         'respuesta': RespuestaSerializer(respuesta).data,
                         'nivel_triage': sesion.nivel_triage,
+                        'motivo_cierre': sesion.motivo_cierre,
                         'completado': True
                     }
                 }, status=status.HTTP_201_CREATED)
@@ -278,57 +291,58 @@ class RespuestaCreate(generics.CreateAPIView):
                 'mensaje': f'Error al procesar la respuesta: {str(e)}',
                 'error': f'Error al procesar la respuesta: {str(e)}'
             }, status=status.HTTP_400_BAD_REQUEST)
+
+class RespuestaLoteCreate(APIView):
+    """
+    API para registrar en una sola petición un lote ordenado de respuestas
+    (kioscos sin conexión) y obtener la siguiente pregunta o el nivel de triage
+    """
+    permission_classes = [permissions.AllowAny]
     
-    def determinar_siguiente_pregunta(self, respuesta):
-        """
-        Determina la siguiente pregunta basada en la respuesta actual
-        y las reglas de flujo definidas en FLUJO_PREGUNTAS.
-        """
-        codigo_pregunta = respuesta.pregunta.codigo
-        valor_respuesta = respuesta.valor
-        
-        if codigo_pregunta == 'antecedentes_enfermedades_cronicas':
-            return TriageFlowHelper.manejar_flujo_enfermedades_cronicas(respuesta)
-        
-        if codigo_pregunta.startswith('sintoma_relacionado_') and codigo_pregunta != 'sintoma_relacionado_con_enfermedad_cronica':
-            return TriageFlowHelper.manejar_sintoma_enfermedad_especifica(respuesta)
-        
-        siguiente_codigo = TriageFlowHelper.obtener_siguiente_codigo(codigo_pregunta, valor_respuesta)
-        
-        if siguiente_codigo == "DINAMICO_SIGUIENTE_ENFERMEDAD":
-            return self._manejar_flujo_dinamico_enfermedades(respuesta)
-        
-        return TriageFlowHelper.buscar_pregunta_por_codigo(siguiente_codigo)
-    
-    def _manejar_flujo_dinamico_enfermedades(self, respuesta):
-        """
-        Maneja el flujo dinámico cuando se ha completado el flujo específico de una enfermedad.
-        """
-        siguiente_enfermedad = TriageFlowHelper.obtener_siguiente_enfermedad_a_evaluar(respuesta)
-        
-        if siguiente_enfermedad:
-            return siguiente_enfermedad
-        
-        enfermedades_originales = EnfermedadEvaluationHelper.obtener_enfermedades_de_sesion(respuesta.sesion)
-        enfermedades_evaluadas = EnfermedadEvaluationHelper.obtener_enfermedades_evaluadas(respuesta.sesion)
-        enfermedades_pendientes = [e for e in enfermedades_originales if e not in enfermedades_evaluadas]
+    def post(self, request, format=None):
+        serializer = RespuestaLoteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'exito': False,
+                'mensaje': 'Datos del lote inválidos',
+                'error': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        if enfermedades_pendientes:
-            siguiente_enfermedad = EnfermedadEvaluationHelper.obtener_primera_enfermedad_a_evaluar(enfermedades_pendientes)
-            return TriageFlowHelper.buscar_pregunta_por_codigo(siguiente_enfermedad)
+        try:
+            sesion, respuestas, siguiente_pregunta = RespuestasLoteHelper.registrar(
+                serializer.validated_data['sesion'], serializer.validated_data['respuestas']
+            )
+        except serializers.ValidationError as e:
+            return Response({
+                'exito': False,
+                'mensaje': 'Error al procesar el lote de respuestas',
+                'error': e.detail
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'exito': False,
+                'mensaje': f'Error al procesar el lote de respuestas: {str(e)}',
+                'error': f'Error al procesar el lote de respuestas: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        if EnfermedadEvaluationHelper.se_completo_flujo_especifico(respuesta.sesion):
-            return None
+        data = {
+            'respuestas': RespuestaSerializer(respuestas, many=True).data,
+            'total_respuestas': sesion.total_respuestas,
+        }
+        if siguiente_pregunta:
+            mensaje = 'Respuestas guardadas exitosamente'
+            data['siguiente_pregunta'] = TriageFlowHelper.serializar_pregunta(siguiente_pregunta)
+        else:
+            mensaje = 'Triage completado exitosamente'
+            data['nivel_triage'] = sesion.nivel_triage
+            data['motivo_cierre'] = sesion.motivo_cierre
+            data['completado'] = True
         
-        return TriageFlowHelper.buscar_pregunta_por_codigo("antecedentes_alergias")
-    
-    def determinar_nivel_triage(self, sesion):
-        """
-        Determina el nivel ESI (Emergency Severity Index) basado en las respuestas
-        de la sesión y las reglas definidas en REGLAS_ESI.
-        Para múltiples enfermedades crónicas, selecciona el ESI más crítico (menor número).
-        """
-        return TriageEvaluationHelper.determinar_nivel_triage(sesion)
+        return Response({
+            'exito': True,
+            'mensaje': mensaje,
+            'data': data
+        }, status=status.HTTP_201_CREATED)
 
 class CargarPreguntas(APIView):
     """
@@ -338,20 +352,19 @@ class CargarPreguntas(APIView):
     
     def post(self, request, format=None):
         try:
-            # Cargar las preguntas desde el diccionario PREGUNTAS
-            for codigo, datos in PREGUNTAS.items():
-                Pregunta.objects.update_or_create(
-                    codigo=codigo,
-                    defaults={
-                        'texto': datos.get('texto', ''),
-                        'tipo': datos.get('tipo', 'text'),
-                        'opciones': datos.get('opciones', None),
-                    }
-                )
+            # Sincronizar la tabla con el diccionario PREGUNTAS aplicando solo las diferencias
+            # El grafo y los validadores se compilan del mismo catálogo en código y no cambian con la tabla
+            resultado = CatalogoPreguntas.sincronizar()
             
             return Response({
                 'exito': True,
-                'mensaje': f'Se han cargado las preguntas exitosamente'
+                'mensaje': f'Se han cargado las preguntas exitosamente ({resultado.resumen()})',
+                'data': {
+                    'version': resultado.version,
+                    'creadas': resultado.creadas,
+                    'actualizadas': resultado.actualizadas,
+                    'obsoletas': resultado.obsoletas
+                }
             }, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({
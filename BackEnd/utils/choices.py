@@ -62,3 +62,9 @@ ESTADO_ATENCION_CHOICES = [
     ('ABANDONO', 'Abandono'),
 ]
 
+
+TURNO_CHOICES = [
+    ('MANANA', 'Mañana'),
+    ('TARDE', 'Tarde'),
+    ('NOCHE', 'Noche'),
+]